@@ -9,6 +9,7 @@ import sys
 from loguru import logger
 from src.remote_developer import RemoteDeveloper
 from src.config import Config
+from src.database import db
 
 # Configure logger
 logger.remove()
@@ -90,5 +91,21 @@ def status(devpod):
         sys.exit(1)
 
 
+@cli.command(name="rebuild-repo-summaries")
+def rebuild_repo_summaries():
+    """Rebuild per-repository task summaries (backfill or repair)"""
+    db.connect()
+    if not db._connected:
+        logger.error("MongoDB is not accessible")
+        sys.exit(1)
+    
+    try:
+        count = db.rebuild_repo_summaries()
+        logger.success(f"Rebuilt summaries for {count} repositories")
+    except Exception as e:
+        logger.error(f"Rebuild failed: {e}")
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     cli()
\ No newline at end of file
@@ -4,9 +4,12 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.api_server import app
+from src.api_server import app, start_async_stream_server
 
 if __name__ == "__main__":
     print("Starting Remote Developer API Server...")
     print("Web interface available at: http://localhost:15001")
+    # With debug=True the reloader serves requests from a child process; start streams there
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_async_stream_server()
     app.run(host="0.0.0.0", port=15001, debug=True)
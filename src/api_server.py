@@ -5,7 +5,7 @@ from flask import Flask, request, jsonify, render_template, Response
 from flask_cors import CORS
 from datetime import datetime
 import git
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import subprocess
 import json
 import logging
@@ -13,24 +13,66 @@ import tempfile
 import queue
 import pickle
 from pathlib import Path
-import select
-import fcntl
+import atexit
+import hashlib
 
 try:
     # Try relative imports (when running as module)
     from .remote_developer import RemoteDeveloper
     from .config import Config
     from .task_manager import task_manager
-    from .database import db, save_task_to_db, get_task_from_db, add_log_to_db
+    from .database import db, save_task_to_db, get_task_from_db, add_log_to_db, add_logs_to_db, claim_idempotency_key_in_db, release_idempotency_key_in_db
+    from .log_pipeline import LogPipeline
+    from .log_broker import LogBroker
+    from .sse import TaskLogStream, parse_last_event_id, parse_cursors, parse_task_ids, format_event, HEARTBEAT_EVENT
+    from .multiplex_stream import MultiplexRegistry
+    from .dashboard_feed import DashboardFeed, parse_cursor
+    from .async_stream_server import AsyncStreamServer
+    from .stream_executor import StreamExecutor, truncate_line
+    from .exec_session import ExecSessionPool, ExecSessionBusy, ExecSessionError
+    from .kube_backend import BackendError, KubectlBackend, create_backend
+    from .pod_resolver import PodResolver
+    from .task_scheduler import TaskScheduler
+    from .task_ids import new_task_id
+    from .task_persister import TaskPersister
+    from .task_store import TaskStore
+    from .task_query import InvalidQuery, parse_list, parse_page_size
+    from .ring_buffer import bounded
+    from .output_classifier import OutputClassifier, OutputEvent
+    from .claude_events import ClaudeEvent, ClaudeStreamParser
+    from .devpod_toolchain import GH_INSTALL_COMMAND, INSTALL_COMMANDS, STAMP_CHECK_COMMAND, STAMP_WRITE_COMMAND, prebaked_toolchain
+    from .devpod_pool import DevpodPool
+    from .repo_sync import parse_sync_output, sync_options, sync_script, worktree_path, worktree_remove_command
 except ImportError:
     # Fall back to absolute imports (when running directly)
     from remote_developer import RemoteDeveloper
     from config import Config
     from task_manager import task_manager
-    from database import db, save_task_to_db, get_task_from_db, add_log_to_db
+    from database import db, save_task_to_db, get_task_from_db, add_log_to_db, add_logs_to_db, claim_idempotency_key_in_db, release_idempotency_key_in_db
+    from log_pipeline import LogPipeline
+    from log_broker import LogBroker
+    from sse import TaskLogStream, parse_last_event_id, parse_cursors, parse_task_ids, format_event, HEARTBEAT_EVENT
+    from multiplex_stream import MultiplexRegistry
+    from dashboard_feed import DashboardFeed, parse_cursor
+    from async_stream_server import AsyncStreamServer
+    from stream_executor import StreamExecutor, truncate_line
+    from exec_session import ExecSessionPool, ExecSessionBusy, ExecSessionError
+    from kube_backend import BackendError, KubectlBackend, create_backend
+    from pod_resolver import PodResolver
+    from task_scheduler import TaskScheduler
+    from task_ids import new_task_id
+    from task_persister import TaskPersister
+    from task_store import TaskStore
+    from task_query import InvalidQuery, parse_list, parse_page_size
+    from ring_buffer import bounded
+    from output_classifier import OutputClassifier, OutputEvent
+    from claude_events import ClaudeEvent, ClaudeStreamParser
+    from devpod_toolchain import GH_INSTALL_COMMAND, INSTALL_COMMANDS, STAMP_CHECK_COMMAND, STAMP_WRITE_COMMAND, prebaked_toolchain
+    from devpod_pool import DevpodPool
+    from repo_sync import parse_sync_output, sync_options, sync_script, worktree_path, worktree_remove_command
 
 app = Flask(__name__, template_folder='../templates', static_folder='../static')
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,40 +85,196 @@ try:
 except Exception as e:
     logger.warning(f"MongoDB connection failed, using local storage: {e}")
 
+# Load long-running task settings
+task_settings = Config(str(Path(__file__).resolve().parent.parent / 'config' / 'long_running_tasks.yaml'))
+
+# Application settings (devpod image etc.)
+app_config = Config(str(Path(__file__).resolve().parent.parent / 'config.yaml'))
+
+# Image for new devpods; the one built from docker/devpod/Dockerfile has the toolchain preinstalled
+DEVPOD_IMAGE = app_config.get('devpod.default_image')
+
 # Create directory for task persistence
 TASKS_DIR = Path.home() / '.remote_developer' / 'tasks'
 TASKS_DIR.mkdir(parents=True, exist_ok=True)
 
-# Store active tasks and their status
-tasks_status = {}
-tasks_lock = threading.Lock()
+# Store active tasks and their status; each task has its own lock (tasks_status.lock(task_id))
+tasks_status = TaskStore()
+
+# Publish log lines and status changes to SSE subscribers
+log_broker = LogBroker(capacity=task_settings.get('connection.sse_buffer_size', 1000))
+
+# Push changed dashboard fields to open dashboards instead of having them poll
+dashboard_feed = DashboardFeed(capacity=task_settings.get('connection.dashboard_feed_size', 1000))
+
+# Save task status every N log lines
+STATUS_SAVE_INTERVAL = task_settings.get('task_execution.status_save_interval', 10)
+
+# Classifies each output line once (status markers, progress, file operations, completion)
+output_classifier = OutputClassifier()
+
+# Output events parse_claude_output records on the task (the first one of a line wins)
+CLAUDE_OUTPUT_KINDS = ('claude_status', 'progress_bar', 'file_operation', 'thinking', 'completed')
+
+# Run Claude with --output-format stream-json ('stream-json') or plain text output ('text')
+CLAUDE_OUTPUT_FORMAT = task_settings.get('task_execution.claude_output_format', 'stream-json')
+
+# task_id -> ClaudeStreamParser of the Claude run in progress (stream-json mode)
+claude_parsers: Dict[str, ClaudeStreamParser] = {}
+
+# Recent log lines kept in each task record (the full log is in MongoDB). The
+# record, logs included, is what gets persisted and returned by the task API
+MAX_MEMORY_LOGS = task_settings.get('persistence.max_memory_logs', 100)
+# File operations kept in each task record
+MAX_FILE_EVENTS = task_settings.get('persistence.max_file_events', 1000)
+
+# Idempotency-Key -> {'task_id', 'fingerprint'} of tasks created through this server
+idempotency_keys = {}
+idempotency_lock = threading.Lock()
+
+# Task fields pushed to stream subscribers when they change
+STREAM_STATUS_FIELDS = ('status', 'claude_status', 'progress', 'queue_position')
+
+# Batch log lines to MongoDB in the background instead of one insert per line
+log_pipeline = LogPipeline(
+    writer=add_logs_to_db,
+    batch_size=task_settings.get('persistence.log_batch_size', 200),
+    flush_interval=task_settings.get('persistence.log_flush_interval', 0.5),
+    max_buffer=task_settings.get('persistence.log_buffer_size', 10000),
+    seq_loader=db.get_last_log_seq,
+    max_retries=task_settings.get('persistence.log_write_retries', 3)
+)
+log_pipeline.start()
+atexit.register(log_pipeline.close)
+
+DEFAULT_EXEC_TIMEOUT = task_settings.get('task_execution.default_timeout', 120)
 
-# Store log streams for real-time updates
-log_streams = {}
-log_streams_lock = threading.Lock()
+# Cloning a large repository can take far longer than other commands
+REPO_SYNC_TIMEOUT = task_settings.get('repository_sync.timeout', 1800)
+
+# Each task works in its own git worktree off the devpod's shared clone, so
+# tasks on one devpod can run side by side (task_execution.tasks_per_devpod)
+REPO_WORKTREES = task_settings.get('repository_sync.worktrees', True)
+WORKTREE_TTL_HOURS = task_settings.get('repository_sync.worktree_ttl_hours', 24)
+
+# Commands, streams, pod lookups and port-forwards go through kubectl or
+# straight to the Kubernetes API (task_execution.exec_backend); kubectl stays
+# the fallback when the API client cannot be used
+exec_backend = create_backend(
+    task_settings.get('task_execution.exec_backend', 'kubectl'),
+    pool_size=task_settings.get('task_execution.api_pool_size', 16),
+    request_timeout=task_settings.get('task_execution.kube_request_timeout', 5)
+)
+kubectl_backend = exec_backend if isinstance(exec_backend, KubectlBackend) else KubectlBackend()
+atexit.register(exec_backend.close)
+
+# local port -> running port-forward
+port_forwards: Dict[int, Any] = {}
+
+# Longer log lines are cut; stream-json output is parsed whole and only its log text is cut
+MAX_LOG_LINE_LENGTH = task_settings.get('task_execution.stream_max_line_length', 65536)
+LOG_TRUNCATION_MARKER = task_settings.get('task_execution.stream_truncation_marker', ' [line truncated]')
+
+# Output of every streamed command is read on one event loop and logged in batches
+stream_executor = StreamExecutor(
+    batch_size=task_settings.get('task_execution.stream_batch_lines', 200),
+    batch_interval=task_settings.get('task_execution.stream_batch_interval', 0.05),
+    max_line_length=MAX_LOG_LINE_LENGTH,
+    truncation_marker=LOG_TRUNCATION_MARKER,
+    dispatch_threads=task_settings.get('task_execution.stream_dispatch_threads', 4)
+)
+atexit.register(stream_executor.close)
+
+# Reuse one exec shell per pod instead of a new exec per command
+exec_sessions = None
+if task_settings.get('task_execution.persistent_exec_sessions', True):
+    exec_sessions = ExecSessionPool(
+        max_sessions_per_pod=task_settings.get('task_execution.exec_sessions_per_pod', 2),
+        backend=exec_backend
+    )
+    atexit.register(exec_sessions.close_all)
+
+def snapshot_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Copy a task record for persistence"""
+    task = tasks_status.snapshot(task_id)
+    if task is not None:
+        # MongoDB's _id (present on tasks loaded from the database) cannot be $set
+        task.pop('_id', None)
+    return task
+
+def write_task_file(task_id: str, task_data: Dict[str, Any]):
+    """Save the full task record to its local backup file"""
+    task_file = TASKS_DIR / f"{task_id}.json"
+    tmp_file = task_file.with_suffix('.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(task_data, f, default=str)
+    os.replace(tmp_file, task_file)
+
+# Coalesce task saves: changed fields only, serialized and written outside the task lock
+task_persister = TaskPersister(
+    snapshot=snapshot_task,
+    writer=save_task_to_db,
+    file_writer=write_task_file,
+    interval=task_settings.get('persistence.status_flush_interval', 1.0)
+)
+task_persister.start()
+atexit.register(task_persister.close)
 
 def save_task_status(task_id: str):
-    """Save task status to MongoDB and file (for backup)"""
-    try:
-        with tasks_lock:
-            if task_id in tasks_status:
-                # Create a copy of task data and convert datetime objects to strings
-                task_data = dict(tasks_status[task_id])
-                
-                # Convert datetime objects to ISO strings
-                for key, value in task_data.items():
-                    if isinstance(value, datetime):
-                        task_data[key] = value.isoformat()
-                
-                # Save to MongoDB
-                save_task_to_db(task_id, task_data)
-                
-                # Also save to file as backup
-                task_file = TASKS_DIR / f"{task_id}.json"
-                with open(task_file, 'w') as f:
-                    json.dump(task_data, f, indent=2, default=str)
-    except Exception as e:
-        logger.error(f"Failed to save task {task_id}: {e}")
+    """Schedule the task's status to be saved to MongoDB and file (for backup)"""
+    task_persister.mark_dirty(task_id)
+
+def dashboard_record(task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of a task shown on the dashboard (no sensitive data, no logs)"""
+    return {
+        'task_id': task_id,
+        'status': task_data.get('status', 'unknown'),
+        'progress': task_data.get('progress', 0),
+        'created_at': task_data.get('created_at', ''),
+        'last_updated': task_data.get('last_updated', ''),
+        'devpod_name': task_data.get('devpod_name', ''),
+        'task_description': task_data.get('task_description', ''),
+        'github_repo': task_data.get('github_repo', ''),
+        'claude_status': task_data.get('claude_status', ''),
+        'app_url': task_data.get('app_url', ''),
+        'server_running': task_data.get('server_running', False),
+        'branch_name': task_data.get('branch_name', ''),
+        'queue_position': task_data.get('queue_position'),
+        'awaiting_token': task_data.get('awaiting_token', False),
+        'has_changes': task_data.get('has_changes', False),
+        'is_committed': task_data.get('is_committed', False)
+    }
+
+def publish_task_status(task_id: str):
+    """Publish the task's current status to stream subscribers and dashboards (caller holds the task's lock)"""
+    task = tasks_status[task_id]
+    log_broker.publish_status(task_id, {
+        'status': task.get('status'),
+        'claude_status': task.get('claude_status', ''),
+        'progress': task.get('progress', 0),
+        'queue_position': task.get('queue_position'),
+        # Structured progress of a stream-json Claude run
+        **({'claude': task['claude_activity']} if task.get('claude_activity') else {})
+    })
+    publish_dashboard_record(task_id)
+
+def publish_dashboard_record(task_id: str):
+    """Push the task's changed dashboard fields to open dashboards (caller holds the task's lock)"""
+    record = dashboard_record(task_id, tasks_status[task_id])
+    # last_updated changes with every log line; leave it out so only real transitions are pushed
+    record.pop('last_updated')
+    dashboard_feed.publish(task_id, record)
+
+def update_task(task_id: str, **fields):
+    """Update task fields and notify stream subscribers of status changes"""
+    with tasks_status.locked(task_id):
+        # update_fields keeps the dashboard counters in step with status changes
+        if not tasks_status.update_fields(task_id, fields):
+            return
+        if any(field in fields for field in STREAM_STATUS_FIELDS):
+            publish_task_status(task_id)
+        else:
+            publish_dashboard_record(task_id)
 
 def load_all_tasks():
     """Load all tasks from MongoDB on startup"""
@@ -96,7 +294,7 @@ def load_all_tasks():
             task_id = task_file.stem
             
             # Skip special files that are not tasks
-            if task_id in ['active_tasks', 'task_manager_state']:
+            if task_id in ['active_tasks', 'task_manager_state', 'pending_queue']:
                 continue
                 
             if task_id not in tasks_status:
@@ -113,35 +311,53 @@ def load_all_tasks():
                             logger.warning(f"Skipping invalid task file: {task_file}")
                 except Exception as e:
                     logger.error(f"Failed to migrate task {task_id}: {e}")
+        
+        # Rebuild the Idempotency-Key index from loaded tasks
+        for task_id, task_data in tasks_status.items():
+            if task_data.get('idempotency_key'):
+                idempotency_keys[task_data['idempotency_key']] = {
+                    'task_id': task_id,
+                    'fingerprint': task_data.get('idempotency_fingerprint')
+                }
     except Exception as e:
         logger.error(f"Failed to load tasks: {e}")
 
 # Load existing tasks on startup
 load_all_tasks()
 
-def create_or_get_devpod(devpod_name: str) -> bool:
-    """Create devpod if it doesn't exist"""
+# devpod binary found by find_devpod_binary (probed once, not per task)
+devpod_binary = None
+
+def find_devpod_binary() -> Optional[str]:
+    """Path of a working devpod command; the first successful probe is cached"""
+    global devpod_binary
+    if devpod_binary:
+        return devpod_binary
+    
+    # Try to find devpod in common locations
+    devpod_paths = [
+        '/usr/local/bin/devpod',
+        '/home/walter/bin/devpod',
+        '~/bin/devpod',
+        'devpod'  # Try from PATH
+    ]
+    
+    for path in devpod_paths:
+        try:
+            expanded_path = os.path.expanduser(path)
+            result = subprocess.run([expanded_path, 'version'], 
+                                  capture_output=True, text=True, timeout=5)
+            if result.returncode == 0:
+                devpod_binary = expanded_path
+                return devpod_binary
+        except (subprocess.TimeoutExpired, FileNotFoundError):
+            continue
+    return None
+
+def create_or_get_devpod(devpod_name: str, image: Optional[str] = DEVPOD_IMAGE) -> bool:
+    """Create devpod (from image, if given) if it doesn't exist"""
     try:
-        # Try to find devpod in common locations
-        devpod_paths = [
-            '/usr/local/bin/devpod',
-            '/home/walter/bin/devpod',
-            '~/bin/devpod',
-            'devpod'  # Try from PATH
-        ]
-        
-        devpod_path = None
-        for path in devpod_paths:
-            try:
-                expanded_path = os.path.expanduser(path)
-                result = subprocess.run([expanded_path, 'version'], 
-                                      capture_output=True, text=True, timeout=5)
-                if result.returncode == 0:
-                    devpod_path = expanded_path
-                    break
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                continue
-        
+        devpod_path = find_devpod_binary()
         if not devpod_path:
             logger.error("DevPod command not found. Please install DevPod: https://devpod.sh/docs/getting-started/install")
             return False
@@ -187,13 +403,15 @@ def create_or_get_devpod(devpod_name: str) -> bool:
             workspace_dir = f"/tmp/devpod-workspace-{devpod_name}"
             os.makedirs(workspace_dir, exist_ok=True)
             
+            image_args = ['--devcontainer-image', image] if image else []
+            
             # Create new devpod with kubernetes provider (default)
-            create_result = subprocess.run([devpod_path, 'up', '--provider', 'kubernetes', f'--source', f'local:{workspace_dir}', devpod_name], 
+            create_result = subprocess.run([devpod_path, 'up', '--provider', 'kubernetes', f'--source', f'local:{workspace_dir}', *image_args, devpod_name], 
                                          capture_output=True, text=True)
             if create_result.returncode != 0:
                 logger.error(f"Failed to create devpod with kubernetes: {create_result.stderr}")
                 # Try without specifying provider (use default)
-                create_result = subprocess.run([devpod_path, 'up', f'--source', f'local:{workspace_dir}', devpod_name], 
+                create_result = subprocess.run([devpod_path, 'up', f'--source', f'local:{workspace_dir}', *image_args, devpod_name], 
                                              capture_output=True, text=True)
                 if create_result.returncode != 0:
                     logger.error(f"Failed to create devpod: {create_result.stderr}")
@@ -219,134 +437,290 @@ def create_or_get_devpod(devpod_name: str) -> bool:
         logger.error(f"Error managing devpod: {e}")
         return False
 
-def add_log(task_id: str, message: str):
-    """Add log message to MongoDB and notify streams"""
-    # Save to MongoDB
-    add_log_to_db(task_id, message)
+def add_log(task_id: str, message: str, events: Optional[List[OutputEvent]] = None):
+    """Add log message to MongoDB and notify streams (events: output_classifier.classify(message), if known)"""
+    if events is None:
+        events = output_classifier.classify(message)
+    add_logs(task_id, [(message, events)])
+
+def add_logs(task_id: str, lines: List[Tuple[str, List[OutputEvent]]]):
+    """Add (message, events) log lines with one pipeline hand-off, task lock and stream wakeup"""
+    if not lines:
+        return
+    lines = [(truncate_line(message, MAX_LOG_LINE_LENGTH, LOG_TRUNCATION_MARKER), events)
+             for message, events in lines]
     
-    with tasks_lock:
+    # Seeding the seq (MongoDB) and waiting out backpressure happen before the task lock
+    log_pipeline.prepare(task_id)
+    
+    # Numbered, kept and published under one lock, so subscribers get lines in seq order
+    with tasks_status.lock(task_id):
+        # Queue for batched write to MongoDB
+        entries = log_pipeline.submit_many(task_id, [message for message, _ in lines], block=False)
+        
         if task_id in tasks_status:
-            # Keep recent logs in memory for quick access
-            if 'logs' not in tasks_status[task_id]:
-                tasks_status[task_id]['logs'] = []
-            
-            # Keep only last 100 logs in memory
-            tasks_status[task_id]['logs'].append(message)
-            if len(tasks_status[task_id]['logs']) > 100:
-                tasks_status[task_id]['logs'] = tasks_status[task_id]['logs'][-100:]
+            # Keep the last MAX_MEMORY_LOGS lines in memory for quick access
+            logs = bounded(tasks_status[task_id].get('logs'), MAX_MEMORY_LOGS)
+            tasks_status[task_id]['logs'] = logs
+            saved_at = logs.total // STATUS_SAVE_INTERVAL
+            for message, events in lines:
+                logs.append(message)
+                
+                # Auto-detect completion from log messages
+                if any(event.kind == 'task_finished' for event in events):
+                    if tasks_status[task_id]['status'] != 'completed':
+                        logger.info(f"Auto-detected task completion for {task_id}")
             
             tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
             
-            # Auto-detect completion from log messages
-            if any(keyword in message.lower() for keyword in ['completed!', 'finished!', 'all tasks finished']):
-                if tasks_status[task_id]['status'] != 'completed':
-                    logger.info(f"Auto-detected task completion for {task_id}")
-            
-            # Periodically save status for long-running tasks (every 10 logs)
-            if len(tasks_status[task_id]['logs']) % 10 == 0:
+            # Periodically save status for long-running tasks (every N logs)
+            if logs.total // STATUS_SAVE_INTERVAL > saved_at:
                 save_task_status(task_id)
+        
+        # Notify all streams watching this task
+        log_broker.publish_many(task_id, [(entry['seq'], entry['message']) for entry in entries])
+
+def discard_log_topic(task_id: str):
+    """Drop the task's broker topic after logging outside its run (commit, PR), unless the run is still going"""
+    if task_id not in task_manager.active_tasks:
+        log_broker.discard(task_id)
+
+def add_output_lines(task_id: str, lines: List[str]):
+    """Log a batch of Claude output and track what it says, classifying each line once"""
+    parser = claude_parsers.get(task_id)
+    plain = []  # (line, events) logged together until a Claude event needs its own update
+    for line_text in lines:
+        if parser is not None:
+            claude_events = parser.feed(line_text)
+            if claude_events is not None:
+                flush_output_lines(task_id, plain)
+                plain = []
+                add_claude_events(task_id, parser, claude_events)
+                continue
+            if parser.structured:
+                # Claude's progress comes from its events; keywords in the run
+                # script's own lines must not change claude_status
+                plain.append((line_text, None))
+                continue
+        plain.append((line_text, output_classifier.classify(line_text)))
+    flush_output_lines(task_id, plain)
+
+def flush_output_lines(task_id: str, lines: List[Tuple[str, Optional[List[OutputEvent]]]]):
+    """Log plain output lines, then apply what the classified ones say (events None: log only)"""
+    add_logs(task_id, [(line_text, events or []) for line_text, events in lines])
+    for line_text, events in lines:
+        if events:
+            parse_claude_output(task_id, line_text, events)
+
+def add_claude_events(task_id: str, parser: ClaudeStreamParser, claude_events: List[ClaudeEvent]):
+    """Log stream-json events readably and record them as structured task fields"""
+    add_logs(task_id, [(event.log, []) for event in claude_events if event.log])
+    if not claude_events:
+        return
     
-    # Notify all streams watching this task
-    with log_streams_lock:
-        if task_id in log_streams:
-            for stream_queue in log_streams[task_id]:
-                try:
-                    stream_queue.put(message)
-                except:
-                    pass
+    with tasks_status.lock(task_id):
+        if task_id not in tasks_status:
+            return
+        task = tasks_status[task_id]
+        for event in claude_events:
+            if event.type == 'init':
+                task['claude_status'] = 'RUNNING'
+                task['claude_session_id'] = parser.session_id
+            elif event.type == 'tool_use' and event.file_path:
+                files_modified = bounded(task.get('claude_files_modified'), MAX_FILE_EVENTS)
+                task['claude_files_modified'] = files_modified
+                if event.file_path not in files_modified:
+                    files_modified.append(event.file_path)
+            elif event.type == 'result':
+                task['claude_status'] = 'FAILED' if event.is_error else 'COMPLETED'
+                if parser.result.get('duration_ms') is not None:
+                    task['claude_runtime'] = parser.result['duration_ms'] // 1000
+        
+        # Text and successful tool results leave the summary as it was
+        if not any(event.type in ('init', 'tool_use', 'result') or event.is_error for event in claude_events):
+            return
+        task['claude_activity'] = parser.summary()
+        task['last_updated'] = datetime.now().isoformat()
+        publish_task_status(task_id)
 
-def parse_claude_output(task_id: str, line_text: str):
+def parse_claude_output(task_id: str, line_text: str, events: Optional[List[OutputEvent]] = None):
     """Parse Claude-specific output patterns for better progress tracking"""
-    with tasks_lock:
+    # Classify before taking the lock; most lines produce no event at all
+    if events is None:
+        events = output_classifier.classify(line_text)
+    event = next((event for event in events if event.kind in CLAUDE_OUTPUT_KINDS), None)
+    if event is None:
+        return
+    
+    with tasks_status.lock(task_id):
         if task_id not in tasks_status:
             return
+        task = tasks_status[task_id]
             
         # Parse various Claude output patterns
-        if "CLAUDE_STATUS:" in line_text:
-            if "RUNNING" in line_text and "minutes" in line_text:
-                try:
-                    minutes = int(line_text.split('(')[1].split(' ')[0])
-                    tasks_status[task_id]['claude_runtime'] = minutes * 60
-                except:
-                    pass
-            status = line_text.split("CLAUDE_STATUS:")[1].strip().split()[0]
-            tasks_status[task_id]['claude_status'] = status
-            tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
-            # save_task_status(task_id)  # Commented out for performance
+        if event.kind == 'claude_status':
+            if event.runtime is not None:
+                task['claude_runtime'] = event.runtime
+            if event.status:
+                task['claude_status'] = event.status
+                task['last_updated'] = datetime.now().isoformat()
+                publish_task_status(task_id)
             
         # Parse Claude progress indicators
-        elif "█" in line_text or "▓" in line_text:  # Progress bar
-            tasks_status[task_id]['claude_progress_bar'] = line_text
+        elif event.kind == 'progress_bar':
+            task['claude_progress_bar'] = line_text
             
         # Parse file operations
-        elif any(keyword in line_text.lower() for keyword in ['creating', 'writing', 'updating', 'modifying']):
-            if 'claude_files_modified' not in tasks_status[task_id]:
-                tasks_status[task_id]['claude_files_modified'] = []
-            tasks_status[task_id]['claude_files_modified'].append(line_text)
+        elif event.kind == 'file_operation':
+            files_modified = bounded(task.get('claude_files_modified'), MAX_FILE_EVENTS)
+            task['claude_files_modified'] = files_modified
+            files_modified.append(line_text)
             
         # Parse thinking/planning output
-        elif any(keyword in line_text.lower() for keyword in ['thinking', 'planning', 'analyzing']):
-            tasks_status[task_id]['claude_thinking'] = True
+        elif event.kind == 'thinking':
+            task['claude_thinking'] = True
             
         # Parse completion indicators
-        elif any(keyword in line_text.lower() for keyword in ['completed', 'finished', 'done', '완료']):
-            tasks_status[task_id]['claude_status'] = 'COMPLETED'
-            tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
-            # save_task_status(task_id)  # Commented out for performance
+        elif event.kind == 'completed':
+            task['claude_status'] = 'COMPLETED'
+            task['last_updated'] = datetime.now().isoformat()
+            publish_task_status(task_id)
 
 def get_pod_name(devpod_name: str) -> str:
-    """Get pod name for devpod with timeout"""
+    """Get pod name for devpod (cached, see pod_resolver)"""
+    return pod_resolver.resolve(devpod_name)
+
+def lookup_pod_name(devpod_name: str) -> str:
+    """Look up pod name for devpod via the exec backend"""
     logger.info(f"Getting pod name for devpod: {devpod_name}")
     try:
-        # Method 1: Try with label selector (reduced timeout)
-        pod_name_cmd = f"timeout 2 kubectl get pods -n devpod -l devpod.sh/workspace={devpod_name} -o jsonpath='{{.items[0].metadata.name}}'"
-        logger.debug(f"Running: {pod_name_cmd}")
-        pod_result = subprocess.run(pod_name_cmd, shell=True, capture_output=True, text=True)
-        pod_name = pod_result.stdout.strip()
+        # Method 1: Try with label selector
+        pods = exec_backend.find_pods(f'devpod.sh/workspace={devpod_name}')
+        pod_name = pods[0] if pods else ''
         logger.debug(f"Method 1 result: {pod_name}")
         
         # Method 2: If not found, try with name prefix
         if not pod_name:
+            all_pods = exec_backend.find_pods()
             # DevPod names get truncated, so search by prefix
-            pod_name_cmd = f"timeout 2 kubectl get pods -n devpod | grep -E 'devpod-{devpod_name[:10]}' | awk '{{print $1}}' | head -1"
-            pod_result = subprocess.run(pod_name_cmd, shell=True, capture_output=True, text=True)
-            pod_name = pod_result.stdout.strip()
+            prefix = f'devpod-{devpod_name[:10]}'
+            pod_name = next((name for name in all_pods if prefix in name), '')
             
             # Method 3: More flexible search
             if not pod_name:
                 # Try even shorter prefix
-                short_name = devpod_name.replace('-', '')[:10]
-                pod_name_cmd = f"timeout 2 kubectl get pods -n devpod | grep -i '{short_name}' | awk '{{print $1}}' | head -1"
-                pod_result = subprocess.run(pod_name_cmd, shell=True, capture_output=True, text=True)
-                pod_name = pod_result.stdout.strip()
-        
-        if not pod_name:
-            # List all devpod pods for debugging
-            list_cmd = "timeout 2 kubectl get pods -n devpod"
-            list_result = subprocess.run(list_cmd, shell=True, capture_output=True, text=True)
-            logger.error(f"Available pods:\n{list_result.stdout}")
-            raise Exception(f"Pod not found for devpod {devpod_name}")
+                short_name = devpod_name.replace('-', '')[:10].lower()
+                pod_name = next((name for name in all_pods if short_name in name.lower()), '')
+            
+            if not pod_name:
+                # List all devpod pods for debugging
+                logger.error(f"Available pods: {', '.join(all_pods) or 'none'}")
+                raise Exception(f"Pod not found for devpod {devpod_name}")
         
         return pod_name
     except Exception as e:
         logger.error(f"Failed to get pod name for {devpod_name}: {e}")
         raise
 
-def exec_in_devpod(devpod_name: str, command: str, pod_name: str = None) -> subprocess.CompletedProcess:
-    """Execute command in devpod using kubectl exec"""
+# Cache devpod -> pod lookups; a pod watch drops entries for pods that change
+pod_resolver = PodResolver(
+    lookup_pod_name,
+    ttl=task_settings.get('task_execution.pod_cache_ttl', 300),
+    watch=task_settings.get('task_execution.pod_watch', True),
+    watch_source=exec_backend.watch_pods
+)
+atexit.register(pod_resolver.close)
+
+def exec_in_devpod(devpod_name: str, command: str, pod_name: str = None,
+                   timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+    """Execute command in devpod (over a pooled exec session when enabled)"""
     if not pod_name:
         pod_name = get_pod_name(devpod_name)
+    timeout = timeout or DEFAULT_EXEC_TIMEOUT
     
     logger.info(f"Using pod: {pod_name}")
     
-    # Escape single quotes in command
-    escaped_cmd = command.replace("'", "'\"'\"'")
-    # Add timeout to kubectl exec (increased for long operations)
-    kubectl_cmd = f"timeout 120 kubectl exec -n devpod {pod_name} -- bash -c '{escaped_cmd}'"
-    return subprocess.run(kubectl_cmd, shell=True, capture_output=True, text=True)
+    if exec_sessions is not None:
+        try:
+            return exec_sessions.run(pod_name, command, timeout=timeout)
+        except ExecSessionBusy as e:
+            logger.warning(f"{e}, falling back to a one-off exec")
+        except ExecSessionError as e:
+            logger.warning(f"Exec session unavailable, falling back to a one-off exec: {e}")
+            # The cached pod may be gone; look it up again next time
+            pod_resolver.invalidate(devpod_name)
+    
+    try:
+        return exec_backend.run(pod_name, command, timeout=timeout)
+    except BackendError as e:
+        if exec_backend is kubectl_backend:
+            raise
+        logger.warning(f"Kubernetes API exec failed, falling back to kubectl: {e}")
+        return kubectl_backend.run(pod_name, command, timeout=timeout)
+
+def spawn_in_devpod(pod_name: str, command: str):
+    """Start a command in the pod with stdout and stderr merged into process.stdout (binary)"""
+    argv = ['bash', '-c', command]
+    try:
+        return exec_backend.spawn(pod_name, argv, merge_stderr=True)
+    except BackendError as e:
+        if exec_backend is kubectl_backend:
+            raise
+        logger.warning(f"Kubernetes API exec failed, falling back to kubectl: {e}")
+        return kubectl_backend.spawn(pod_name, argv, merge_stderr=True)
+
+def task_workspace(task: Dict[str, Any]) -> str:
+    """Directory a task works in: its worktree, or the devpod's shared clone"""
+    return task.get('worktree') or f"~/{task['github_repo'].split('/')[-1]}"
+
+def release_worktree(task_id: str):
+    """Remove the task's worktree once nothing needs it any more"""
+    task = tasks_status.get(task_id) or {}
+    if not task.get('worktree'):
+        return
+    repo_name = task['github_repo'].split('/')[-1]
+    try:
+        exec_in_devpod(task['devpod_name'], worktree_remove_command(f'$HOME/{repo_name}', task['worktree']))
+        update_task(task_id, worktree=None)
+        save_task_status(task_id)
+        add_log(task_id, 'Removed task worktree')
+    except Exception as e:
+        # Left for the next sync's stale worktree collection
+        logger.warning(f"Failed to remove worktree of task {task_id}: {e}")
+
+def delete_devpod(devpod_name: str) -> bool:
+    """Delete a devpod workspace and forget its pod and exec sessions"""
+    devpod_path = find_devpod_binary()
+    if not devpod_path:
+        logger.error(f"DevPod command not found, cannot delete {devpod_name}")
+        return False
+    try:
+        pod_name = get_pod_name(devpod_name)
+    except Exception:
+        pod_name = None
+    result = subprocess.run([devpod_path, 'delete', '--force', devpod_name], capture_output=True, text=True)
+    if result.returncode != 0:
+        logger.error(f"Failed to delete devpod {devpod_name}: {result.stderr}")
+        return False
+    pod_resolver.invalidate(devpod_name)
+    if exec_sessions is not None and pod_name:
+        exec_sessions.close_pod(pod_name)
+    logger.info(f"Deleted devpod {devpod_name}")
+    return True
+
+def release_devpod(task_id: str):
+    """Delete the devpod a task got from the warm pool or created under an auto- name"""
+    task = tasks_status.get(task_id) or {}
+    if task.get('devpod_pool') not in ('hit', 'miss') or task.get('devpod_deleted'):
+        return
+    # A used devpod holds the task's files and its user's credentials: never recycle it
+    if delete_devpod(task['devpod_name']):
+        update_task(task_id, devpod_deleted=True)
+        save_task_status(task_id)
+        add_log(task_id, f"Deleted devpod {task['devpod_name']}")
 
 def exec_in_devpod_stream_realtime(devpod_name: str, command: str, task_id: str, pod_name: str = None):
-    """Execute command in devpod with real-time streaming using non-blocking I/O"""
+    """Execute command in devpod, streaming its output to the task log (see stream_executor)"""
     if not pod_name:
         logger.warning(f"Pod name not provided for streaming execution, getting it now...")
         try:
@@ -356,74 +730,12 @@ def exec_in_devpod_stream_realtime(devpod_name: str, command: str, task_id: str,
             add_log(task_id, f"Error: Failed to get pod name: {e}")
             return -1
     
-    # Escape single quotes in command
-    escaped_cmd = command.replace("'", "'\"'\"'")
-    # Note: -t flag removed as it can cause issues with non-interactive scripts
-    kubectl_cmd = f"kubectl exec -n devpod {pod_name} -- bash -c '{escaped_cmd}'"
-    
     try:
-        # Set environment variables to disable buffering
-        env = os.environ.copy()
-        env['PYTHONUNBUFFERED'] = '1'
-        
-        # Run the command with real-time output capture
-        process = subprocess.Popen(
-            kubectl_cmd, 
-            shell=True, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            bufsize=0,  # Unbuffered
-            env=env
-        )
-        
-        # Make stdout non-blocking
-        fd = process.stdout.fileno()
-        fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-        fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
-        
-        output_buffer = b""
-        while True:
-            # Check if process has ended
-            poll_status = process.poll()
-            
-            # Use select to check if data is available
-            ready, _, _ = select.select([process.stdout], [], [], 0.1)
-            
-            if ready:
-                try:
-                    # Read available data
-                    chunk = os.read(fd, 4096)
-                    if chunk:
-                        output_buffer += chunk
-                        
-                        # Process complete lines
-                        while b'\n' in output_buffer:
-                            line, output_buffer = output_buffer.split(b'\n', 1)
-                            try:
-                                line_text = line.decode('utf-8', errors='replace').rstrip()
-                                add_log(task_id, line_text)
-                                
-                                # Parse Claude status updates
-                                parse_claude_output(task_id, line_text)
-                            except Exception as e:
-                                logger.warning(f"Error decoding line: {e}")
-                except OSError:
-                    # No data available
-                    pass
-            
-            # If process ended and no more data, break
-            if poll_status is not None and not ready:
-                # Process any remaining data
-                if output_buffer:
-                    try:
-                        line_text = output_buffer.decode('utf-8', errors='replace').rstrip()
-                        if line_text:
-                            add_log(task_id, line_text)
-                    except:
-                        pass
-                break
-        
-        return_code = process.wait()
+        # Output is read on the stream executor's loop and logged in batches;
+        # stream-json events must reach the parser whole, add_logs cuts what is logged
+        process = spawn_in_devpod(pod_name, command)
+        return_code = stream_executor.run(process, lambda lines: add_output_lines(task_id, lines),
+                                          cap_lines=task_id not in claude_parsers, key=task_id)
         
         # Log process completion
         if return_code == 0:
@@ -449,33 +761,12 @@ def exec_in_devpod_stream_simple(devpod_name: str, command: str, task_id: str, p
             add_log(task_id, f"Error: Failed to get pod name: {e}")
             return -1
     
-    # Escape single quotes in command
-    escaped_cmd = command.replace("'", "'\"'\"'")
-    kubectl_cmd = f"kubectl exec -n devpod {pod_name} -- bash -c '{escaped_cmd}'"
-    
     try:
-        # Run the command with real-time output capture
-        process = subprocess.Popen(
-            kubectl_cmd, 
-            shell=True, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True
-        )
-        
-        # Read output line by line
-        for line in iter(process.stdout.readline, ''):
-            if line:
-                line_text = line.rstrip()
-                add_log(task_id, line_text)
-                
-                # Parse Claude status updates
-                parse_claude_output(task_id, line_text)
-        
-        # Wait for process to complete
-        return_code = process.wait()
+        # Output is read on the stream executor's loop and logged in batches;
+        # stream-json events must reach the parser whole, add_logs cuts what is logged
+        process = spawn_in_devpod(pod_name, command)
+        return_code = stream_executor.run(process, lambda lines: add_output_lines(task_id, lines),
+                                          cap_lines=task_id not in claude_parsers, key=task_id)
         
         # Log completion immediately
         logger.info(f"Streaming completed for task {task_id} with return code {return_code}")
@@ -493,37 +784,44 @@ def execute_remote_task(task_id: str, devpod_name: str, github_repo: str,
     # DevPod path will be determined in create_or_get_devpod function
     task_completed = False
     try:
-        with tasks_lock:
+        with tasks_status.lock(task_id):
+            queued_task = tasks_status.get(task_id, {})
             tasks_status[task_id] = {
                 'status': 'initializing',
                 'progress': 0,
                 'logs': [],
-                'created_at': datetime.now().isoformat(),
+                'created_at': queued_task.get('created_at', datetime.now().isoformat()),
+                'started_at': datetime.now().isoformat(),
+                'queue_position': None,
                 'last_updated': datetime.now().isoformat(),
                 'devpod_name': devpod_name,
                 'github_repo': github_repo,
                 'task_description': task_description,
                 # GitHub token is not stored for security reasons - managed by frontend
             }
+            for field in ('devpod_pool', 'devpod_image', 'idempotency_key', 'idempotency_fingerprint'):
+                if queued_task.get(field):
+                    tasks_status[task_id][field] = queued_task[field]
+            publish_task_status(task_id)
         
         save_task_status(task_id)
         
         # Step 1: Create or get devpod
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'creating_devpod'
-            tasks_status[task_id]['progress'] = 10
+        update_task(task_id, status='creating_devpod', progress=10)
         save_task_status(task_id)
-        add_log(task_id, 'Creating/checking devpod...')
         
-        if not create_or_get_devpod(devpod_name):
+        # Warm pool devpods were created and set up ahead of time
+        task = tasks_status.get(task_id, {})
+        pooled = task.get('devpod_pool') == 'hit'
+        add_log(task_id, f'Using warm devpod {devpod_name}' if pooled else 'Creating/checking devpod...')
+        
+        if not pooled and not create_or_get_devpod(devpod_name, task.get('devpod_image', DEVPOD_IMAGE)):
             error_msg = "Failed to create or get devpod. Please ensure DevPod is installed: https://devpod.sh/docs/getting-started/install"
             add_log(task_id, f'Error: {error_msg}')
             raise Exception(error_msg)
         
         # Step 2: Clone or update repository
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'cloning_repository'
-            tasks_status[task_id]['progress'] = 20
+        update_task(task_id, status='cloning_repository', progress=20)
         add_log(task_id, 'Cloning/updating repository...')
         
         # Configure git in devpod
@@ -541,82 +839,70 @@ def execute_remote_task(task_id: str, devpod_name: str, github_repo: str,
             logger.error(f"Failed to get pod name: {e}")
             error_msg = f"Failed to connect to DevPod {devpod_name}. Please ensure the DevPod is running."
             add_log(task_id, f'Error: {error_msg}')
-            with tasks_lock:
-                tasks_status[task_id]['status'] = 'failed'
-                tasks_status[task_id]['error'] = error_msg
+            update_task(task_id, status='failed', error=error_msg)
             save_task_status(task_id)
             return
         
         for cmd in git_config_cmds:
             exec_in_devpod(devpod_name, cmd, pod_name)
         
-        # Clone or pull latest code
+        # Clone or refresh the workspace in one exec (see repo_sync), then
+        # give the task its own worktree of it
         repo_name = github_repo.split('/')[-1]
-        
-        # Check if repository already exists
-        check_repo_cmd = f'cd ~/{repo_name} && git status'
-        check_result = exec_in_devpod(devpod_name, check_repo_cmd, pod_name)
-        
-        if check_result.returncode == 0:
-            # Repository exists, update it
-            add_log(task_id, 'Repository exists, updating...')
-            
-            update_cmds = [
-                f'cd ~/{repo_name} && git fetch origin',
-                f'cd ~/{repo_name} && git checkout main || git checkout master || git checkout -b main',
-                f'cd ~/{repo_name} && git reset --hard origin/$(git symbolic-ref --short HEAD) || true',
-                f'cd ~/{repo_name} && git clean -fd'
-            ]
-            
-            for cmd in update_cmds:
-                result = exec_in_devpod(devpod_name, cmd, pod_name)
-                if "error" in result.stderr.lower() and "fatal" in result.stderr.lower():
-                    logger.warning(f"Git command warning: {result.stderr}")
-        else:
-            # Repository doesn't exist, clone it
-            add_log(task_id, 'Cloning repository...')
-            
-            clone_cmd = f'cd ~ && git clone https://{github_token}@github.com/{github_repo}.git {repo_name}'
-            result = exec_in_devpod(devpod_name, clone_cmd, pod_name)
-            
-            if result.returncode != 0:
-                # If clone fails, try to remove existing directory and clone again
-                remove_cmd = f'rm -rf ~/{repo_name}'
-                exec_in_devpod(devpod_name, remove_cmd, pod_name)
-                
-                result = exec_in_devpod(devpod_name, clone_cmd, pod_name)
-                if result.returncode != 0:
-                    raise Exception(f"Failed to clone repository: {result.stderr}")
+        worktree = worktree_path(repo_name, task_id) if REPO_WORKTREES else None
+        options = sync_options(task_settings.get('repository_sync'), github_repo)
+        # Worktrees of tasks not yet released may still be committed or serve an app
+        in_use = [other_id for other_id, other in tasks_status.items()
+                  if other.get('worktree') and other.get('devpod_name') == devpod_name]
+        script = sync_script(github_repo, f'$HOME/{repo_name}', options, worktree=worktree,
+                             worktree_ttl_hours=WORKTREE_TTL_HOURS, keep_worktrees=in_use)
+        result = exec_in_devpod(devpod_name, script, pod_name, timeout=REPO_SYNC_TIMEOUT)
+        sync = parse_sync_output(result.stdout)
+        if result.returncode != 0 or not sync.branch:
+            raise Exception(f"Failed to sync repository: {result.stderr.strip()}")
+        
+        update_task(task_id, worktree=worktree,
+                    repo_sync={'cloned': sync.cloned, 'cache': options.cache, 'timings': sync.timings})
+        workspace = task_workspace(tasks_status.get(task_id))
+        steps = ', '.join(f'{step} {seconds:.1f}s' for step, seconds in sync.timings.items())
+        add_log(task_id, f"Repository {'cloned' if sync.cloned else 'updated'} ({steps})")
+        if worktree:
+            add_log(task_id, f'Working in worktree {worktree}')
         
         # Step 3: Setup Claude Code
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'setting_up_claude'
-            tasks_status[task_id]['progress'] = 30
+        update_task(task_id, status='setting_up_claude', progress=30)
         add_log(task_id, 'Setting up Claude Code...')
         
-        # Install Node.js if not present
-        node_check = 'which node || echo "not found"'
-        result = exec_in_devpod(devpod_name, node_check, pod_name)
+        # Devpods from the prebaked image (docker/devpod/Dockerfile) need no installs
+        stamp = prebaked_toolchain(exec_in_devpod(devpod_name, STAMP_CHECK_COMMAND, pod_name).stdout)
+        update_task(task_id, toolchain='prebaked' if stamp else 'installed')
         
-        if "not found" in result.stdout:
-            add_log(task_id, 'Installing Node.js...')
-            
-            # Install Node.js
-            node_install_cmds = [
-                'apt-get update',
-                'apt-get install -y nodejs npm'
-            ]
-            for cmd in node_install_cmds:
-                exec_in_devpod(devpod_name, cmd, pod_name)
-        
-        # Install Claude via npm
-        claude_install = 'npm install -g @anthropic-ai/claude-code || echo "Claude installation failed"'
-        result = exec_in_devpod(devpod_name, claude_install, pod_name)
-        
-        if "Claude installation failed" not in result.stdout:
-            add_log(task_id, 'Claude installed (from @anthropic-ai/claude-code package)')
+        if stamp:
+            add_log(task_id, f"Prebaked toolchain found (node {stamp['node']}, claude {stamp['claude']}), skipping installs")
         else:
-            add_log(task_id, 'Claude installation failed, will use fallback')
+            # Install Node.js if not present
+            node_check = 'which node || echo "not found"'
+            result = exec_in_devpod(devpod_name, node_check, pod_name)
+            
+            if "not found" in result.stdout:
+                add_log(task_id, 'Installing Node.js...')
+                
+                # Install Node.js
+                node_install_cmds = [
+                    'apt-get update',
+                    'apt-get install -y nodejs npm'
+                ]
+                for cmd in node_install_cmds:
+                    exec_in_devpod(devpod_name, cmd, pod_name)
+            
+            # Install Claude via npm
+            claude_install = 'npm install -g @anthropic-ai/claude-code || echo "Claude installation failed"'
+            result = exec_in_devpod(devpod_name, claude_install, pod_name)
+            
+            if "Claude installation failed" not in result.stdout:
+                add_log(task_id, 'Claude installed (from @anthropic-ai/claude-code package)')
+            else:
+                add_log(task_id, 'Claude installation failed, will use fallback')
         
         # Create Claude settings file with permissions
         claude_settings = '''mkdir -p ~/.claude && cat > ~/.claude/settings.json << 'EOF'
@@ -646,31 +932,38 @@ EOF'''
         add_log(task_id, f'Claude command location: {check_result.stdout.strip()}')
         
         # Step 4: Stay on main branch (no automatic branch creation)
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'preparing_workspace'
-            tasks_status[task_id]['progress'] = 40
+        update_task(task_id, status='preparing_workspace', progress=40)
         add_log(task_id, 'Preparing workspace on main branch...')
         
-        # Ensure we're on main/master branch
-        checkout_cmd = f'cd ~/{repo_name} && (git checkout main || git checkout master)'
-        exec_in_devpod(devpod_name, checkout_cmd, pod_name)
-        
-        # Get current branch name for reference
-        get_branch_cmd = f'cd ~/{repo_name} && git branch --show-current'
-        branch_result = exec_in_devpod(devpod_name, get_branch_cmd, pod_name)
-        current_branch = branch_result.stdout.strip()
+        # The sync left the workspace on the default branch
+        current_branch = sync.branch
         add_log(task_id, f'Working on branch: {current_branch}')
         
         # Step 5: Execute Claude task
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'executing_task'
-            tasks_status[task_id]['progress'] = 60
-        add_log(task_id, 'Executing Claude task...')
+        # Setup time: from submission (including any wait in the queue) to running Claude
+        with tasks_status.lock(task_id):
+            created_at = tasks_status[task_id].get('created_at')
+        setup_seconds = round((datetime.now() - datetime.fromisoformat(created_at)).total_seconds(), 1)
+        update_task(task_id, status='executing_task', progress=60, setup_seconds=setup_seconds)
+        add_log(task_id, f'Executing Claude task... (setup took {setup_seconds}s)')
+        
+        # Machine-readable events when the installed CLI supports them, free text otherwise
+        claude_text_run = f'    timeout 7200 claude --print "{task_description}" 2>&1 | tee claude_output.txt'
+        if CLAUDE_OUTPUT_FORMAT == 'stream-json':
+            claude_run = f'''    if claude --help 2>&1 | grep -q -- "--output-format"; then
+        timeout 7200 claude --print --output-format stream-json --verbose "{task_description}" 2>&1 | tee claude_output.txt
+    else
+        echo "Claude CLI has no stream-json output, using text output"
+    {claude_text_run}
+    fi'''
+            claude_parsers[task_id] = ClaudeStreamParser()
+        else:
+            claude_run = claude_text_run
         
         # Create a simpler script similar to manual_debug.success.sh
         claude_script = f'''#!/bin/bash
 # Claude execution script
-cd ~/{repo_name}
+cd {workspace}
 
 echo "=== Claude 실행 시작 ==="
 echo "Task: {task_description}"
@@ -681,7 +974,7 @@ if command -v claude &> /dev/null; then
     # Claude execution with extended timeout for long-running tasks
     echo "Executing Claude (timeout: 2 hours)..."
     # 7200 seconds = 2 hours timeout for very long Claude tasks
-    timeout 7200 claude --print "{task_description}" 2>&1 | tee claude_output.txt
+{claude_run}
     
     echo ""
     echo "=== Claude 실행 완료 ==="
@@ -704,19 +997,17 @@ exit 0
         # Use base64 encoding to avoid shell escaping issues
         import base64
         script_encoded = base64.b64encode(claude_script.encode()).decode()
-        script_cmd = f'cd ~/{repo_name} && echo "{script_encoded}" | base64 -d > run_claude.sh && chmod +x run_claude.sh'
+        script_cmd = f'cd {workspace} && echo "{script_encoded}" | base64 -d > run_claude.sh && chmod +x run_claude.sh'
         exec_in_devpod(devpod_name, script_cmd, pod_name)
         
         # Execute Claude with simpler streaming
         add_log(task_id, 'Claude 실행 중...')
         
         # Track Claude execution status
-        with tasks_lock:
-            tasks_status[task_id]['claude_status'] = 'STARTING'
-            tasks_status[task_id]['claude_runtime'] = 0
+        update_task(task_id, claude_status='STARTING', claude_runtime=0)
         
         # Execute Claude script with simpler streaming output
-        execute_cmd = f'cd ~/{repo_name} && bash run_claude.sh 2>&1'
+        execute_cmd = f'cd {workspace} && bash run_claude.sh 2>&1'
         
         # Use simpler streaming execution for better reliability
         add_log(task_id, "Starting Claude execution with streaming...")
@@ -727,16 +1018,14 @@ exit 0
         
         add_log(task_id, f"Claude script execution finished with return code: {returncode}")
         
-        # Check if Claude succeeded
-        claude_failed = returncode != 0
+        # Check if Claude succeeded (stream-json reports the outcome in its result event)
+        claude_parser = claude_parsers.pop(task_id, None)
+        claude_failed = returncode != 0 or bool(claude_parser and claude_parser.is_error)
         
         # Update Claude status based on execution result
-        with tasks_lock:
-            if claude_failed:
-                tasks_status[task_id]['claude_status'] = 'FAILED'
-            else:
-                tasks_status[task_id]['claude_status'] = 'COMPLETED'
-            tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
+        update_task(task_id,
+                    claude_status='FAILED' if claude_failed else 'COMPLETED',
+                    last_updated=datetime.now().isoformat())
         save_task_status(task_id)
         
         # Log the result after releasing the lock
@@ -822,25 +1111,22 @@ ls -la
 '''
                 # Use base64 encoding to avoid shell escaping issues
                 fallback_encoded = base64.b64encode(fallback_script.encode()).decode()
-                fallback_cmd = f'cd ~/{repo_name} && echo "{fallback_encoded}" | base64 -d > fallback.sh && chmod +x fallback.sh && bash fallback.sh'
+                fallback_cmd = f'cd {workspace} && echo "{fallback_encoded}" | base64 -d > fallback.sh && chmod +x fallback.sh && bash fallback.sh'
                 result = exec_in_devpod(devpod_name, fallback_cmd, pod_name)
                 
                 add_log(task_id, "Fallback execution completed")
                 # Update status after fallback
-                with tasks_lock:
-                    tasks_status[task_id]['claude_status'] = 'FALLBACK_COMPLETED'
-                    tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
+                update_task(task_id, claude_status='FALLBACK_COMPLETED',
+                            last_updated=datetime.now().isoformat())
                 save_task_status(task_id)
         
         # Step 7: Show modified files (no automatic commit)
         add_log(task_id, "=== Checking modified files ===")
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'reviewing_changes'
-            tasks_status[task_id]['progress'] = 75
+        update_task(task_id, status='reviewing_changes', progress=75)
         save_task_status(task_id)  # Save status at this important transition
         
         # Show git status
-        status_cmd = f'cd ~/{repo_name} && git status --short'
+        status_cmd = f'cd {workspace} && git status --short'
         status_result = exec_in_devpod(devpod_name, status_cmd, pod_name)
         if status_result.stdout.strip():
             add_log(task_id, 'Modified files:')
@@ -848,19 +1134,17 @@ ls -la
                 add_log(task_id, f'  {line}')
             
             # Store modified files info
-            with tasks_lock:
+            with tasks_status.lock(task_id):
                 tasks_status[task_id]['modified_files'] = status_result.stdout.strip().split('\n')
                 tasks_status[task_id]['has_changes'] = True
         else:
             add_log(task_id, 'No files were modified')
-            with tasks_lock:
+            with tasks_status.lock(task_id):
                 tasks_status[task_id]['has_changes'] = False
         
         # Step 8: Check if a server was created and run it
         add_log(task_id, "=== Moving to server check phase ===")
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'checking_server'
-            tasks_status[task_id]['progress'] = 85
+        update_task(task_id, status='checking_server', progress=85)
         save_task_status(task_id)  # Save status at this important transition
         add_log(task_id, 'Checking for server applications...')
         
@@ -868,14 +1152,14 @@ ls -la
         server_started = False
         
         # Check for Python requirements
-        req_check = exec_in_devpod(devpod_name, f'cd ~/{repo_name} && [ -f requirements.txt ] && echo "FOUND"', pod_name)
+        req_check = exec_in_devpod(devpod_name, f'cd {workspace} && [ -f requirements.txt ] && echo "FOUND"', pod_name)
         if "FOUND" in req_check.stdout:
             add_log(task_id, 'Installing Python dependencies...')
-            install_result = exec_in_devpod(devpod_name, f'cd ~/{repo_name} && pip3 install --break-system-packages -r requirements.txt || true', pod_name)
+            install_result = exec_in_devpod(devpod_name, f'cd {workspace} && pip3 install --break-system-packages -r requirements.txt || true', pod_name)
             add_log(task_id, f'Dependencies installation completed (return code: {install_result.returncode})')
         
         # Check for Streamlit app
-        streamlit_check = exec_in_devpod(devpod_name, f'cd ~/{repo_name} && ([ -f app.py ] || [ -f streamlit_app.py ]) && grep -l "streamlit" *.py 2>/dev/null | head -1', pod_name)
+        streamlit_check = exec_in_devpod(devpod_name, f'cd {workspace} && ([ -f app.py ] || [ -f streamlit_app.py ]) && grep -l "streamlit" *.py 2>/dev/null | head -1', pod_name)
         if streamlit_check.stdout.strip():
             app_file = streamlit_check.stdout.strip()
             add_log(task_id, f'Starting Streamlit app: {app_file}')
@@ -884,7 +1168,7 @@ ls -la
             exec_in_devpod(devpod_name, 'pkill -f streamlit || true', pod_name)
             
             # Start Streamlit in background
-            start_cmd = f'cd ~/{repo_name} && nohup streamlit run {app_file} --server.port 8501 --server.address 0.0.0.0 > streamlit.log 2>&1 &'
+            start_cmd = f'cd {workspace} && nohup streamlit run {app_file} --server.port 8501 --server.address 0.0.0.0 > streamlit.log 2>&1 &'
             exec_in_devpod(devpod_name, start_cmd, pod_name)
             
             # Wait a bit for server to start
@@ -892,16 +1176,19 @@ ls -la
             
             # Set up port forwarding
             add_log(task_id, 'Setting up port forwarding for Streamlit (port 8501)...')
-            forward_thread = threading.Thread(
-                target=lambda: subprocess.run(['kubectl', 'port-forward', '-n', 'devpod', pod_name, '8501:8501'])
-            )
-            forward_thread.daemon = True
-            forward_thread.start()
+            previous_forward = port_forwards.pop(8501, None)
+            if previous_forward is not None:
+                previous_forward.close()
+            try:
+                port_forwards[8501] = exec_backend.port_forward(pod_name, 8501, 8501)
+            except Exception as e:
+                logger.warning(f"Port forwarding for task {task_id} failed: {e}")
+                add_log(task_id, f'⚠️ Port forwarding failed: {e}')
             
             add_log(task_id, '✅ Streamlit app is running!')
             add_log(task_id, '🌐 Access your app at: http://localhost:8501')
             
-            with tasks_lock:
+            with tasks_status.lock(task_id):
                 tasks_status[task_id]['app_url'] = 'http://localhost:8501'
                 tasks_status[task_id]['server_type'] = 'streamlit'
             
@@ -909,13 +1196,11 @@ ls -la
         
         # Complete - even if server is running
         add_log(task_id, "=== COMPLETING TASK ===")
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'completed'
-            tasks_status[task_id]['progress'] = 100
-            tasks_status[task_id]['current_branch'] = current_branch
-            tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
-            if server_started:
-                tasks_status[task_id]['server_running'] = True
+        completion_fields = {'current_branch': current_branch}
+        if server_started:
+            completion_fields['server_running'] = True
+        update_task(task_id, status='completed', progress=100,
+                    last_updated=datetime.now().isoformat(), **completion_fields)
         save_task_status(task_id)
         add_log(task_id, f"Task status saved as 'completed' with progress 100%")
         
@@ -927,16 +1212,19 @@ ls -la
         # Final completion log
         add_log(task_id, f'🎉 All tasks finished! Status: completed')
         task_completed = True
+        
+        # Keep the worktree only while it has changes to commit or serves the app
+        if not server_started and not tasks_status.get(task_id, {}).get('has_changes'):
+            release_worktree(task_id)
             
     except Exception as e:
         logger.error(f"Task {task_id} failed with exception: {e}")
-        with tasks_lock:
-            tasks_status[task_id]['status'] = 'failed'
-            tasks_status[task_id]['error'] = str(e)
-            tasks_status[task_id]['last_updated'] = datetime.now().isoformat()
+        update_task(task_id, status='failed', error=str(e),
+                    last_updated=datetime.now().isoformat())
         save_task_status(task_id)
         add_log(task_id, f'❌ Error: {str(e)}')
         add_log(task_id, f'💥 Task failed! Status: failed')
+        release_worktree(task_id)
     finally:
         # Ensure task status is properly saved
         logger.info(f"Task {task_id} execution completed. Success: {task_completed}")
@@ -944,9 +1232,102 @@ ls -la
             logger.info(f"Final task status: {tasks_status[task_id].get('status', 'unknown')}")
             save_task_status(task_id)
         
+        # Write the final status now rather than on the next flush interval
+        task_persister.flush([task_id])
+        task_persister.forget(task_id)
+        
+        # Drop the stream-json parser if the run ended before its result was checked
+        claude_parsers.pop(task_id, None)
+        
+        # Make sure every log line of this task reaches MongoDB
+        log_pipeline.flush()
+        
+        # A pooled or auto- devpod goes once nothing is left to commit or serve
+        # (otherwise the create-PR endpoint deletes it)
+        final = tasks_status.get(task_id) or {}
+        if not (final.get('status') == 'completed' and (final.get('has_changes') or final.get('server_running'))):
+            release_devpod(task_id)
+        
+        # Subscribers already hold the topic; new ones replay from MongoDB
+        log_broker.discard(task_id)
+        
         # Unregister task from task manager
         task_manager.unregister_task(task_id)
 
+def refresh_queue_positions():
+    """Copy queue positions from the scheduler into queued task records"""
+    positions = task_scheduler.positions()
+    held = set(task_scheduler.held())
+    for task_id, task in tasks_status.items():
+        if task.get('status') != 'queued':
+            continue
+        with tasks_status.lock(task_id):
+            task['awaiting_token'] = task_id in held
+            if task.get('queue_position') != positions.get(task_id):
+                task['queue_position'] = positions.get(task_id)
+                publish_task_status(task_id)
+
+def restore_task_queue():
+    """Reload the pending queue after a restart; stray queued tasks become interrupted"""
+    restored = {job['task_id']: job for job in task_scheduler.restore()}
+    for task_id, job in restored.items():
+        if task_id not in tasks_status:
+            tasks_status[task_id] = {
+                'status': 'queued',
+                'progress': 0,
+                'logs': [],
+                'created_at': job.get('queued_at', datetime.now().isoformat()),
+                'last_updated': datetime.now().isoformat(),
+                **job['params']
+            }
+    stray = [task_id for task_id, task in tasks_status.items()
+             if task.get('status') == 'queued' and task_id not in restored]
+    for task_id in stray:
+        update_task(task_id, status='interrupted', queue_position=None)
+        save_task_status(task_id)
+    refresh_queue_positions()
+
+# Bounded worker pool: tasks queue up instead of each getting a thread at once
+task_scheduler = TaskScheduler(
+    execute_remote_task,
+    max_workers=task_settings.get('task_execution.max_concurrent_tasks', 4),
+    state_file=TASKS_DIR / 'pending_queue.json',
+    on_start=task_manager.register_task,
+    on_queue_change=refresh_queue_positions,
+    daemon_threads=task_settings.get('task_execution.use_daemon_threads', False),
+    # Without worktrees, tasks on one devpod share its workspace and must take turns.
+    # Even with them, the Streamlit port and the git/gh credentials are per devpod,
+    # so raising this lets tasks of different users clash
+    tasks_per_devpod=task_settings.get('task_execution.tasks_per_devpod', 1) if REPO_WORKTREES else 1
+)
+restore_task_queue()
+
+def provision_warm_devpod(devpod_name: str, image: Optional[str]) -> bool:
+    """Create a devpod for the warm pool and install the toolchain (stamped, so tasks skip installs)"""
+    if not create_or_get_devpod(devpod_name, image):
+        return False
+    pod_name = get_pod_name(devpod_name)
+    if prebaked_toolchain(exec_in_devpod(devpod_name, STAMP_CHECK_COMMAND, pod_name).stdout):
+        return True
+    
+    for cmd in INSTALL_COMMANDS:
+        result = exec_in_devpod(devpod_name, cmd, pod_name)
+        if result.returncode != 0:
+            logger.error(f"Toolchain setup failed on warm devpod {devpod_name}: {result.stderr}")
+            return False
+    return prebaked_toolchain(exec_in_devpod(devpod_name, STAMP_WRITE_COMMAND, pod_name).stdout) is not None
+
+# Ready devpods handed to tasks submitted without a devpod name (size 0 disables)
+devpod_pool = DevpodPool(
+    provision_warm_devpod,
+    images=app_config.get('devpod.warm_pool.images') or [DEVPOD_IMAGE],
+    size=app_config.get('devpod.warm_pool.size', 0),
+    name_prefix=app_config.get('devpod.warm_pool.name_prefix', 'warm'),
+    state_file=TASKS_DIR / 'devpod_pool.json',
+    is_alive=lambda name: bool(exec_backend.find_pods(f'devpod.sh/workspace={name}'))
+)
+devpod_pool.start()
+
 @app.route('/')
 def index():
     """Serve the main web interface"""
@@ -960,64 +1341,189 @@ def index():
     with open(template_path, 'r', encoding='utf-8') as f:
         return f.read(), 200, {'Content-Type': 'text/html'}
 
+def request_fingerprint(data: Dict[str, Any]) -> str:
+    """Hash of the task-defining request fields (never the token)"""
+    fields = {field: data.get(field) for field in ('devpod_name', 'github_repo', 'task_description')}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+def claim_idempotency_key(key: str, task_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Reserve key for task_id; returns the owning task if the key was already used"""
+    with idempotency_lock:
+        existing = idempotency_keys.get(key)
+        if existing is None:
+            # MongoDB's unique index arbitrates between API server replicas
+            existing = claim_idempotency_key_in_db(key, task_id, fingerprint)
+        idempotency_keys[key] = existing or {'task_id': task_id, 'fingerprint': fingerprint}
+        return existing
+
+def release_idempotency_key(key: str, task_id: str):
+    """Give up task_id's claim on key because its task was never created"""
+    with idempotency_lock:
+        if idempotency_keys.get(key, {}).get('task_id') == task_id:
+            del idempotency_keys[key]
+    release_idempotency_key_in_db(key, task_id)
+
 @app.route('/api/create-task', methods=['POST'])
 def create_task():
     """Create a new automated PR task"""
     data = request.json
     
-    required_fields = ['devpod_name', 'github_repo', 'github_token', 'task_description']
+    # devpod_name is optional with a warm pool: without one the task gets a pooled
+    # or new devpod, deleted again once the task no longer needs it
+    required_fields = ['github_repo', 'github_token', 'task_description']
+    if not devpod_pool.size:
+        required_fields.insert(0, 'devpod_name')
     for field in required_fields:
-        if field not in data:
+        if not data.get(field):
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    task_id = f"task-{int(time.time())}"
+    task_id = new_task_id()
+    
+    # Retried submissions with the same Idempotency-Key get the original task
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key is not None:
+        if not idempotency_key or len(idempotency_key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be 1-255 characters'}), 400
+        fingerprint = request_fingerprint(data)
+        try:
+            existing = claim_idempotency_key(idempotency_key, task_id, fingerprint)
+        except Exception as e:
+            # Without the claim a retry could start the task twice
+            logger.error(f"Failed to claim Idempotency-Key for {task_id}: {e}")
+            return jsonify({'error': 'Could not reserve Idempotency-Key, please retry'}), 503
+        if existing is not None:
+            if existing.get('fingerprint') and existing['fingerprint'] != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used for a different task'}), 422
+            position = task_scheduler.queue_position(existing['task_id'])
+            response = jsonify({
+                'task_id': existing['task_id'],
+                'status': 'queued' if position else 'started',
+                'queue_position': position
+            })
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+    
+    # Without a devpod name the task takes a ready devpod from the warm pool, or
+    # (on a miss) gets a fresh name and creates its devpod itself
+    pool_result = None
+    image = data.get('devpod_image') or DEVPOD_IMAGE
+    if not data.get('devpod_name'):
+        try:
+            pooled = devpod_pool.acquire(image)
+        except Exception:
+            # No task record yet: let a retry with the same key create it
+            if idempotency_key is not None:
+                release_idempotency_key(idempotency_key, task_id)
+            raise
+        pool_result = 'hit' if pooled else 'miss'
+        data = {**data, 'devpod_name': pooled or f"auto-{task_id[-12:].lower()}"}
+    
+    with tasks_status.lock(task_id):
+        tasks_status[task_id] = {
+            'status': 'queued',
+            'progress': 0,
+            'logs': [],
+            'created_at': datetime.now().isoformat(),
+            'last_updated': datetime.now().isoformat(),
+            'devpod_name': data['devpod_name'],
+            'github_repo': data['github_repo'],
+            'task_description': data['task_description'],
+            'queue_position': None
+        }
+        if pool_result:
+            tasks_status[task_id]['devpod_pool'] = pool_result
+        if image != DEVPOD_IMAGE:
+            tasks_status[task_id]['devpod_image'] = image
+        if idempotency_key is not None:
+            tasks_status[task_id]['idempotency_key'] = idempotency_key
+            tasks_status[task_id]['idempotency_fingerprint'] = fingerprint
+        publish_task_status(task_id)
+    save_task_status(task_id)
+    log_pipeline.seed(task_id)
     
-    # Start task in background thread
-    thread = threading.Thread(
-        target=execute_remote_task,
-        args=(task_id, data['devpod_name'], data['github_repo'], 
-              data['github_token'], data['task_description'])
+    # The scheduler starts the task once a worker slot and its devpod are free;
+    # the GitHub token stays in memory only
+    position = task_scheduler.submit(
+        task_id,
+        data['devpod_name'],
+        params={
+            'devpod_name': data['devpod_name'],
+            'github_repo': data['github_repo'],
+            'task_description': data['task_description']
+        },
+        secrets={'github_token': data['github_token']}
     )
-    thread.daemon = False  # Keep thread running even if main process restarts
-    thread.start()
+    logger.info(f"Submitted task {task_id} (queue position: {position})")
     
-    # Log thread information for monitoring
-    logger.info(f"Started background task {task_id} in thread {thread.name}")
+    return jsonify({'task_id': task_id, 'status': 'queued' if position else 'started', 'queue_position': position})
+
+@app.route('/api/task/<task_id>/resume', methods=['POST'])
+def resume_queued_task(task_id):
+    """Resupply the GitHub token for a queued task restored after a restart"""
+    data = request.json or {}
+    if not data.get('github_token'):
+        return jsonify({'error': 'Missing required field: github_token'}), 400
     
-    # Register task with task manager
-    task_manager.register_task(task_id, thread)
+    if not task_scheduler.resume(task_id, {'github_token': data['github_token']}):
+        return jsonify({'error': 'Task is not waiting to be resumed'}), 400
     
-    return jsonify({'task_id': task_id})
+    return jsonify({'status': 'ok', 'queue_position': task_scheduler.queue_position(task_id)})
+
+@app.route('/api/task-queue')
+def task_queue_stats():
+    """Worker pool and queue counts"""
+    return jsonify(task_scheduler.stats())
+
+@app.route('/api/devpod-pool')
+def devpod_pool_stats():
+    """Warm devpod pool sizes, hits/misses and replenish latency"""
+    return jsonify(devpod_pool.stats())
 
 @app.route('/api/task-status/<task_id>')
 def get_task_status(task_id):
     """Get status of a specific task"""
-    with tasks_lock:
-        if task_id in tasks_status:
-            # Make a copy to ensure all fields are included
-            task_data = dict(tasks_status[task_id])
-            task_data['task_id'] = task_id
-            return jsonify(task_data)
+    # Copy under the task's lock so all fields are consistent
+    task_data = tasks_status.snapshot(task_id)
+    if task_data is None:
+        return jsonify({'error': 'Task not found'}), 404
+    task_data['task_id'] = task_id
+    return jsonify(task_data)
+
+def task_page(github_repo=None, default_limit=100):
+    """Response for one page of a task listing (see task_query for the parameters)"""
+    try:
+        tasks, next_cursor = db.find_tasks(
+            github_repo=github_repo or request.args.get('repo'),
+            statuses=parse_list(request.args.get('status')),
+            created_after=request.args.get('created_after'),
+            created_before=request.args.get('created_before'),
+            fields=parse_list(request.args.get('fields')),
+            cursor=request.args.get('cursor'),
+            limit=parse_page_size(request.args.get('limit'), default_limit)
+        )
+    except InvalidQuery as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Add runtime status
+    for task in tasks:
+        task_id = task.get('task_id')
+        if task_id and task_id in task_manager.active_tasks:
+            thread_info = task_manager.active_tasks[task_id]
+            task['is_running'] = thread_info['thread'].is_alive()
         else:
-            return jsonify({'error': 'Task not found'}), 404
+            task['is_running'] = False
+    
+    # The body stays a plain list; the next page is requested with ?cursor=<X-Next-Cursor>
+    response = jsonify(tasks)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/tasks')
 def list_tasks():
-    """List all tasks from MongoDB"""
+    """List tasks from MongoDB, newest first, one page at a time"""
     try:
-        # Get tasks from MongoDB instead of memory
-        tasks = db.get_all_tasks(limit=100)
-        
-        # Add runtime status
-        for task in tasks:
-            task_id = task.get('task_id')
-            if task_id and task_id in task_manager.active_tasks:
-                thread_info = task_manager.active_tasks[task_id]
-                task['is_running'] = thread_info['thread'].is_alive()
-            else:
-                task['is_running'] = False
-        
-        return jsonify(tasks)
+        return task_page()
     except Exception as e:
         logger.error(f"Failed to list tasks: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1034,20 +1540,9 @@ def list_tasks_by_repo():
 
 @app.route('/api/tasks/repo/<path:github_repo>')
 def list_tasks_for_repo(github_repo):
-    """List tasks for a specific repository"""
+    """List tasks for a specific repository, newest first, one page at a time"""
     try:
-        tasks = db.get_tasks_by_repo(github_repo, limit=50)
-        
-        # Add runtime status
-        for task in tasks:
-            task_id = task.get('task_id')
-            if task_id and task_id in task_manager.active_tasks:
-                thread_info = task_manager.active_tasks[task_id]
-                task['is_running'] = thread_info['thread'].is_alive()
-            else:
-                task['is_running'] = False
-        
-        return jsonify(tasks)
+        return task_page(github_repo, default_limit=50)
     except Exception as e:
         logger.error(f"Failed to get tasks for repo {github_repo}: {e}")
         return jsonify({'error': str(e)}), 500
@@ -1062,45 +1557,44 @@ def get_repository_stats():
         logger.error(f"Failed to get repository stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+def dashboard_summary() -> Dict[str, int]:
+    """Task counts shown at the top of the dashboard"""
+    # Counters are maintained on every status change, so this does not depend
+    # on how many tasks are in memory
+    status_counts = tasks_status.status_counts()
+    total_tasks = sum(status_counts.values())
+    completed_tasks = status_counts.get('completed', 0)
+    failed_tasks = status_counts.get('failed', 0)
+    queued_tasks = status_counts.get('queued', 0)
+    return {
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'failed_tasks': failed_tasks,
+        'running_tasks': total_tasks - completed_tasks - failed_tasks - queued_tasks - status_counts.get('interrupted', 0),
+        'queued_tasks': queued_tasks
+    }
+
+def dashboard_data() -> Dict[str, Any]:
+    """Full dashboard: summary, the 10 most recent tasks and the feed cursor they reflect"""
+    # Read the version first: changes made while building the snapshot are
+    # delivered again by the stream rather than lost
+    version = dashboard_feed.version
+    recent_tasks = []
+    for task_id in tasks_status.recent(10):
+        # Copy the record without its log buffers; only the last 5 lines are shown
+        task_data = tasks_status.snapshot(task_id, exclude=('logs', 'claude_files_modified'))
+        if task_data is None:
+            continue
+        safe_task = dashboard_record(task_id, task_data)
+        safe_task['logs'] = tasks_status.tail(task_id, 'logs', 5)
+        recent_tasks.append(safe_task)
+    return {**dashboard_summary(), 'recent_tasks': recent_tasks, 'version': dashboard_feed.cursor(version)}
+
 @app.route('/api/dashboard')
 def dashboard():
     """Get dashboard data - fast, non-blocking"""
     try:
-        with tasks_lock:
-            # Quick stats calculation
-            total_tasks = len(tasks_status)
-            completed_tasks = sum(1 for t in tasks_status.values() if t.get('status') == 'completed')
-            failed_tasks = sum(1 for t in tasks_status.values() if t.get('status') == 'failed')
-            running_tasks = sum(1 for t in tasks_status.values() if t.get('status') not in ['completed', 'failed', 'interrupted'])
-            
-            # Get recent tasks with their IDs (limit sensitive data)
-            recent_tasks = []
-            for task_id, task_data in sorted(tasks_status.items(), key=lambda x: x[1].get('created_at', ''), reverse=True)[:10]:
-                # Create a safe copy without sensitive data
-                safe_task = {
-                    'task_id': task_id,
-                    'status': task_data.get('status', 'unknown'),
-                    'progress': task_data.get('progress', 0),
-                    'created_at': task_data.get('created_at', ''),
-                    'last_updated': task_data.get('last_updated', ''),
-                    'devpod_name': task_data.get('devpod_name', ''),
-                    'task_description': task_data.get('task_description', ''),
-                    'github_repo': task_data.get('github_repo', ''),
-                    'claude_status': task_data.get('claude_status', ''),
-                    'app_url': task_data.get('app_url', ''),
-                    'server_running': task_data.get('server_running', False),
-                    'branch_name': task_data.get('branch_name', ''),
-                    'logs': task_data.get('logs', [])[-5:]  # Only last 5 logs for dashboard
-                }
-                recent_tasks.append(safe_task)
-            
-            return jsonify({
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'failed_tasks': failed_tasks,
-                'running_tasks': running_tasks,
-                'recent_tasks': recent_tasks
-            })
+        return jsonify(dashboard_data())
     except Exception as e:
         logger.error(f"Dashboard error: {e}")
         return jsonify({
@@ -1108,19 +1602,51 @@ def dashboard():
             'completed_tasks': 0,
             'failed_tasks': 0,
             'running_tasks': 0,
+            'queued_tasks': 0,
             'recent_tasks': [],
             'error': str(e)
         })
 
+@app.route('/api/dashboard/stream')
+def stream_dashboard():
+    """Stream dashboard changes using Server-Sent Events
+    
+    The client loads /api/dashboard once and passes its `version` cursor
+    (or reconnects with Last-Event-ID). Each event carries the changed fields
+    of every task updated since then plus the current summary, with the feed
+    cursor as the SSE id. A client too far behind, or holding a cursor from
+    before a server restart, gets the full dashboard again in a `reset` event.
+    """
+    epoch, version = parse_cursor(request.headers.get('Last-Event-ID') or request.args.get('version'))
+    heartbeat_interval = task_settings.get('connection.sse_heartbeat_interval', 30)
+    
+    def generate():
+        since = version
+        delivery = dashboard_feed.poll(since, timeout=heartbeat_interval, epoch=epoch)
+        while True:
+            if delivery.reset:
+                data = dashboard_data()
+                since = parse_cursor(data['version'])[1]
+                yield format_event({**data, 'reset': True}, data['version'])
+            elif delivery.changes:
+                since = delivery.version
+                yield format_event({'tasks': delivery.changes, 'summary': dashboard_summary()},
+                                   dashboard_feed.cursor(since))
+            else:
+                yield HEARTBEAT_EVENT
+            delivery = dashboard_feed.poll(since, timeout=heartbeat_interval)
+    
+    return Response(generate(), mimetype="text/event-stream")
+
 @app.route('/api/task/<task_id>/continue', methods=['POST'])
 def continue_task(task_id):
     """Continue a task that requires authentication"""
-    with tasks_lock:
-        if task_id not in tasks_status:
+    with tasks_status.locked(task_id) as task:
+        if task is None:
             return jsonify({'error': 'Task not found'}), 404
         
-        if tasks_status[task_id].get('requires_authentication', False):
-            tasks_status[task_id]['authentication_confirmed'] = True
+        if task.get('requires_authentication', False):
+            task['authentication_confirmed'] = True
             return jsonify({'status': 'ok', 'message': 'Task will continue'})
         else:
             return jsonify({'error': 'Task does not require authentication'}), 400
@@ -1142,9 +1668,9 @@ def check_task_alive(task_id):
     
     # Get task status
     task_status = None
-    with tasks_lock:
-        if task_id in tasks_status:
-            task_status = tasks_status[task_id].get('status')
+    task = tasks_status.get(task_id)
+    if task is not None:
+        task_status = task.get('status')
     
     return jsonify({
         'task_id': task_id,
@@ -1159,17 +1685,15 @@ def commit_task_changes(task_id):
     data = request.json
     commit_message = data.get('commit_message', '')
     
-    with tasks_lock:
-        if task_id not in tasks_status:
+    with tasks_status.locked(task_id) as task_data:
+        if task_data is None:
             return jsonify({'error': 'Task not found'}), 404
         
-        task_data = tasks_status[task_id]
         if not task_data.get('has_changes', False):
             return jsonify({'error': 'No changes to commit'}), 400
     
     devpod_name = task_data['devpod_name']
-    github_repo = task_data['github_repo']
-    repo_name = github_repo.split('/')[-1]
+    workspace = task_workspace(task_data)
     
     try:
         pod_name = get_pod_name(devpod_name)
@@ -1182,8 +1706,8 @@ def commit_task_changes(task_id):
         add_log(task_id, f"Committing changes with message: {commit_message}")
         
         commit_cmds = [
-            f'cd ~/{repo_name} && git add -A',
-            f'cd ~/{repo_name} && git commit -m "{commit_message}"'
+            f'cd {workspace} && git add -A',
+            f'cd {workspace} && git commit -m "{commit_message}"'
         ]
         
         for cmd in commit_cmds:
@@ -1194,26 +1718,25 @@ def commit_task_changes(task_id):
         add_log(task_id, "✅ Changes committed successfully")
         
         # Update task status
-        with tasks_lock:
-            tasks_status[task_id]['is_committed'] = True
-            tasks_status[task_id]['commit_message'] = commit_message
+        update_task(task_id, is_committed=True, commit_message=commit_message)
         save_task_status(task_id)
         
         return jsonify({'status': 'success', 'message': 'Changes committed'})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        discard_log_topic(task_id)
 
 @app.route('/api/task/<task_id>/create-pr', methods=['POST'])
 def create_pr_from_task(task_id):
     """Create a PR from task changes"""
     data = request.json
     
-    with tasks_lock:
-        if task_id not in tasks_status:
+    with tasks_status.locked(task_id) as task_data:
+        if task_data is None:
             return jsonify({'error': 'Task not found'}), 404
         
-        task_data = tasks_status[task_id]
         if not task_data.get('is_committed', False) and task_data.get('has_changes', False):
             return jsonify({'error': 'Please commit changes first'}), 400
     
@@ -1224,7 +1747,7 @@ def create_pr_from_task(task_id):
         return jsonify({'error': 'GitHub token is required for PR creation'}), 400
     pr_title = data.get('pr_title', f"Task: {task_data['task_description'][:50]}...")
     pr_body = data.get('pr_body', f"Automated task execution:\n\n{task_data['task_description']}")
-    repo_name = github_repo.split('/')[-1]
+    workspace = task_workspace(task_data)
     
     try:
         pod_name = get_pod_name(devpod_name)
@@ -1234,8 +1757,8 @@ def create_pr_from_task(task_id):
         add_log(task_id, f"Creating new branch: {branch_name}")
         
         branch_cmds = [
-            f'cd ~/{repo_name} && git checkout -b {branch_name}',
-            f'cd ~/{repo_name} && git push origin {branch_name}'
+            f'cd {workspace} && git checkout -b {branch_name}',
+            f'cd {workspace} && git push origin {branch_name}'
         ]
         
         for cmd in branch_cmds:
@@ -1246,29 +1769,36 @@ def create_pr_from_task(task_id):
         add_log(task_id, "Branch created and pushed")
         
         # Create PR using the existing create_pr logic
-        return create_pr_with_details(devpod_name, github_repo, github_token, 
-                                     pr_title, pr_body, branch_name, pod_name)
+        response = create_pr_with_details(devpod_name, github_repo, github_token, 
+                                          pr_title, pr_body, branch_name, pod_name, workspace)
+        if not isinstance(response, tuple):
+            # The branch is pushed and the PR open: the worktree has served its purpose
+            release_worktree(task_id)
+            release_devpod(task_id)
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        discard_log_topic(task_id)
 
-def create_pr_with_details(devpod_name, github_repo, github_token, pr_title, pr_body, branch_name, pod_name):
+def create_pr_with_details(devpod_name, github_repo, github_token, pr_title, pr_body, branch_name, pod_name,
+                          workspace=None):
     """Helper function to create PR with given details"""
-    repo_name = github_repo.split('/')[-1]
+    workspace = workspace or f"~/{github_repo.split('/')[-1]}"
     
     try:
         # Install gh CLI if needed
         gh_check = exec_in_devpod(devpod_name, 'which gh', pod_name)
         if not gh_check.stdout.strip():
-            gh_install = 'curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg && echo "deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main" | tee /etc/apt/sources.list.d/github-cli.list > /dev/null && apt update && apt install gh -y'
-            exec_in_devpod(devpod_name, gh_install, pod_name)
+            exec_in_devpod(devpod_name, GH_INSTALL_COMMAND, pod_name)
         
         # Authenticate gh with token
         auth_cmd = f'echo {github_token} | gh auth login --with-token'
         exec_in_devpod(devpod_name, auth_cmd, pod_name)
         
         # Create PR
-        pr_cmd = f'cd ~/{repo_name} && gh pr create --title "{pr_title}" --body "{pr_body}" --base main --head {branch_name}'
+        pr_cmd = f'cd {workspace} && gh pr create --title "{pr_title}" --body "{pr_body}" --base main --head {branch_name}'
         pr_result = exec_in_devpod(devpod_name, pr_cmd, pod_name)
         
         if pr_result.returncode == 0:
@@ -1318,8 +1848,7 @@ def create_pr():
         # Install gh CLI if needed
         gh_check = exec_in_devpod(devpod_name, 'which gh', pod_name)
         if not gh_check.stdout.strip():
-            gh_install = 'curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg | dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg && echo "deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg] https://cli.github.com/packages stable main" | tee /etc/apt/sources.list.d/github-cli.list > /dev/null && apt update && apt install gh -y'
-            exec_in_devpod(devpod_name, gh_install, pod_name)
+            exec_in_devpod(devpod_name, GH_INSTALL_COMMAND, pod_name)
         
         # Authenticate gh with token
         auth_cmd = f'echo {github_token} | gh auth login --with-token'
@@ -1342,6 +1871,8 @@ def create_pr():
 def get_task_logs(task_id):
     """Get all logs for a task from MongoDB"""
     try:
+        # Include lines still waiting in the write-behind buffer
+        log_pipeline.flush()
         logs = db.get_logs(task_id, limit=1000)
         return jsonify({
             'task_id': task_id,
@@ -1352,59 +1883,172 @@ def get_task_logs(task_id):
         logger.error(f"Failed to get logs for task {task_id}: {e}")
         return jsonify({'error': str(e)}), 500
 
+def replay_logs(task_id: str, after_seq: int, before_seq: Optional[int] = None, page_size: int = 1000):
+    """Yield (seq, message) for stored logs after after_seq, stopping at before_seq"""
+    # Lines still in the write-behind buffer come from memory rather than a flush per
+    # (re)connect. Taken first: a line written meanwhile is then in MongoDB as well and
+    # skipped there; MongoDB lines newer than the buffer are left to the live stream.
+    unwritten = [(entry['seq'], entry['message']) for entry in log_pipeline.unwritten(task_id, after_seq)
+                 if before_seq is None or entry['seq'] < before_seq]
+    if unwritten:
+        before_seq = unwritten[0][0]
+    yield from stored_logs(task_id, after_seq, before_seq, page_size)
+    yield from unwritten
+
+def stored_logs(task_id: str, after_seq: int, before_seq: Optional[int] = None, page_size: int = 1000):
+    """Yield (seq, message) for logs in MongoDB after after_seq, stopping at before_seq"""
+    if after_seq == 0:
+        # Full history, including lines written before sequence numbers existed
+        logs = db.get_logs(task_id, limit=page_size)
+    else:
+        logs = db.get_logs_after(task_id, after_seq, limit=page_size)
+    
+    while logs:
+        for log in logs:
+            seq = log.get('seq')
+            if seq is not None:
+                if before_seq is not None and seq >= before_seq:
+                    return
+                after_seq = max(after_seq, seq)
+            yield seq, log['message']
+        if len(logs) < page_size:
+            break
+        logs = db.get_logs_after(task_id, after_seq, limit=page_size)
+
+def get_stream_status(task_id: str) -> Optional[Dict[str, Any]]:
+    """Current status fields sent to stream subscribers"""
+    with tasks_status.locked(task_id) as task:
+        if task is None:
+            return None
+        status = {
+            'status': task.get('status'),
+            'claude_status': task.get('claude_status', ''),
+            'progress': task.get('progress', 0)
+        }
+        if task.get('claude_activity'):
+            status['claude'] = task['claude_activity']
+        return status
+
 @app.route('/api/task-logs/<task_id>/stream')
 def stream_task_logs(task_id):
-    """Stream task logs using Server-Sent Events"""
+    """Stream task logs using Server-Sent Events
+    
+    Each log event carries its per-task sequence number as the SSE id, so a
+    reconnecting EventSource (Last-Event-ID header) or a client passing
+    ?last_event_id=N resumes right after the last line it received.
+    """
+    after_seq = parse_last_event_id(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    heartbeat_interval = task_settings.get('connection.sse_heartbeat_interval', 30)
+    
     def generate():
-        # Create a queue for this client
-        client_queue = queue.Queue()
-        
-        # Register this client for the task
-        with log_streams_lock:
-            if task_id not in log_streams:
-                log_streams[task_id] = []
-            log_streams[task_id].append(client_queue)
+        stream = TaskLogStream(after_seq)
+        # Subscribe before replaying so nothing published in between is lost
+        subscription = log_broker.subscribe(task_id)
         
         try:
-            # Send existing logs from MongoDB first
-            existing_logs = db.get_logs(task_id, limit=100)
-            for log in existing_logs:
-                yield f"data: {json.dumps({'log': log['message']})}\n\n"
+            # Replay missed logs from MongoDB first, then the current status
+            yield from stream.replay(replay_logs(task_id, after_seq))
+            yield from stream.status(get_stream_status(task_id))
             
-            # Stream new logs
+            while not stream.finished:
+                # Wait for new logs or a status change
+                delivery = subscription.poll(timeout=heartbeat_interval)
+                backfill = []
+                if delivery.dropped:
+                    # Fell behind the broker's ring buffer: backfill the gap from MongoDB
+                    after, before = stream.gap(delivery)
+                    backfill = replay_logs(task_id, after, before_seq=before)
+                yield from stream.deliver(delivery, backfill)
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype="text/event-stream")
+
+# Multiplexed log streams by stream_id, served by Flask and the asyncio server alike
+multiplex_streams = MultiplexRegistry(log_broker, replay_logs, get_stream_status)
+
+@app.route('/api/task-logs/stream')
+def stream_many_task_logs():
+    """Stream the logs of several tasks over one connection using Server-Sent Events
+    
+    Watches the comma-separated ?tasks= list. The first event carries a
+    stream_id; POST /api/task-logs/stream/<stream_id> adds or removes tasks.
+    Events are tagged with task_id and seq, and every batch ends with an
+    id-only event mapping each watched task to its last seq, so a
+    reconnecting EventSource (Last-Event-ID) resumes every task where it
+    left off.
+    """
+    cursors = dict.fromkeys(parse_task_ids(request.args.get('tasks')), 0)
+    cursors.update(parse_cursors(request.headers.get('Last-Event-ID') or request.args.get('last_event_id')))
+    heartbeat_interval = task_settings.get('connection.sse_heartbeat_interval', 30)
+    
+    def generate():
+        stream = multiplex_streams.open(cursors)
+        try:
+            yield stream.hello()
             while True:
-                try:
-                    # Wait for new log with timeout
-                    log = client_queue.get(timeout=30)
-                    yield f"data: {json.dumps({'log': log})}\n\n"
-                except queue.Empty:
-                    # Send heartbeat to keep connection alive
-                    yield f"data: {json.dumps({'heartbeat': True})}\n\n"
-                    
-                # Check if task is completed
-                with tasks_lock:
-                    if task_id in tasks_status:
-                        status = tasks_status[task_id]['status']
-                        claude_status = tasks_status[task_id].get('claude_status', '')
-                        progress = tasks_status[task_id].get('progress', 0)
-                        
-                        # Send status update
-                        yield f"data: {json.dumps({'status': status, 'claude_status': claude_status, 'progress': progress})}\n\n"
-                        
-                        if status in ['completed', 'failed']:
-                            yield f"data: {json.dumps({'status': status, 'complete': True, 'final': True})}\n\n"
-                            break
-                            
+                events = stream.collect()
+                if events:
+                    yield events
+                elif not stream.wait(heartbeat_interval):
+                    yield HEARTBEAT_EVENT
         finally:
-            # Unregister this client
-            with log_streams_lock:
-                if task_id in log_streams and client_queue in log_streams[task_id]:
-                    log_streams[task_id].remove(client_queue)
-                    if not log_streams[task_id]:
-                        del log_streams[task_id]
+            multiplex_streams.close(stream)
     
     return Response(generate(), mimetype="text/event-stream")
 
+@app.route('/api/task-logs/stream/<stream_id>', methods=['POST'])
+def update_task_log_stream(stream_id):
+    """Add tasks to or remove tasks from an open multiplexed stream
+    
+    Body: {"add": [task_id, ...] or {task_id: last_seq, ...}, "remove": [task_id, ...]}
+    """
+    stream = multiplex_streams.get(stream_id)
+    if stream is None:
+        return jsonify({'error': 'Stream not found'}), 404
+    
+    data = request.json or {}
+    add = data.get('add') or []
+    cursors = add if isinstance(add, dict) else dict.fromkeys(add, 0)
+    for task_id, after_seq in cursors.items():
+        stream.add(task_id, parse_last_event_id(str(after_seq)))
+    for task_id in data.get('remove') or []:
+        stream.remove(task_id)
+    
+    return jsonify({'stream_id': stream_id, 'tasks': stream.tasks()})
+
+# Asyncio server for SSE log streams, started by start_async_stream_server()
+async_stream_server = None
+
+def start_async_stream_server():
+    """Serve log streams from an asyncio loop alongside Flask, if a port is configured"""
+    global async_stream_server
+    port = task_settings.get('connection.async_stream_port')
+    if not port or async_stream_server is not None:
+        return async_stream_server
+    
+    async_stream_server = AsyncStreamServer(
+        broker=log_broker,
+        replay_logs=replay_logs,
+        get_status=get_stream_status,
+        heartbeat_interval=task_settings.get('connection.sse_heartbeat_interval', 30),
+        multiplex=multiplex_streams
+    )
+    async_stream_server.start(host='0.0.0.0', port=int(port))
+    return async_stream_server
+
+@app.route('/api/stream-config')
+def stream_config():
+    """Tell the web UI where to open log streams"""
+    return jsonify({
+        'async_stream_port': task_settings.get('connection.async_stream_port') if async_stream_server else None
+    })
+
+@app.route('/api/pod-cache/stats')
+def pod_cache_stats():
+    """Hit/miss counters of the devpod -> pod name cache"""
+    return jsonify(pod_resolver.get_stats())
+
 if __name__ == '__main__':
     # Check for orphaned tasks from previous runs
     orphaned_tasks = task_manager.check_orphaned_tasks()
@@ -1414,12 +2058,14 @@ if __name__ == '__main__':
             logger.warning(f"  - {task['task_id']}: {task['status']} (last updated: {task['last_updated']})")
             # Mark orphaned tasks as interrupted
             if task['task_id'] in tasks_status:
-                tasks_status[task['task_id']]['status'] = 'interrupted'
-                tasks_status[task['task_id']]['error'] = 'Server was restarted while task was running'
+                update_task(task['task_id'], status='interrupted',
+                            error='Server was restarted while task was running')
                 save_task_status(task['task_id'])
     
     # Start task monitor in background
     monitor_thread = threading.Thread(target=task_manager.monitor_tasks, daemon=True)
     monitor_thread.start()
     
+    start_async_stream_server()
+    
     app.run(host='0.0.0.0', port=15001, debug=False, threaded=True)
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Asyncio SSE server for task log streams
+
+Serves /api/task-logs/<task_id>/stream (and the multiplexed
+/api/task-logs/stream) from one aiohttp event loop, so an idle browser tab
+costs a coroutine instead of pinning a WSGI worker thread. It runs in the
+same process as the Flask app, reads from the same LogBroker and emits the
+same events as the Flask endpoints. Multiplexed streams are registered in
+the registry shared with Flask, which handles their add/remove requests.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from aiohttp import web
+
+try:
+    from .log_broker import LogBroker, Topic
+    from .multiplex_stream import MultiplexRegistry
+    from .sse import TaskLogStream, parse_last_event_id, parse_cursors, parse_task_ids, HEARTBEAT_EVENT
+except ImportError:
+    from log_broker import LogBroker, Topic
+    from multiplex_stream import MultiplexRegistry
+    from sse import TaskLogStream, parse_last_event_id, parse_cursors, parse_task_ids, HEARTBEAT_EVENT
+
+logger = logging.getLogger(__name__)
+
+# The UI is served by Flask on another port
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Last-Event-ID, Cache-Control',
+    'Access-Control-Allow-Methods': 'GET, OPTIONS',
+}
+
+
+class TopicWaker:
+    """Wakes coroutines waiting on a broker topic when another thread publishes"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, topic: Topic):
+        self.loop = loop
+        self.topic = topic
+        self.event = asyncio.Event()
+        self.users = 0
+        self._scheduled = False
+        topic.add_listener(self.notify)
+
+    def notify(self):
+        """Publisher-side hook; coalesces bursts into a single loop wakeup"""
+        if not self._scheduled:
+            self._scheduled = True
+            self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        self._scheduled = False
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    def close(self):
+        self.topic.remove_listener(self.notify)
+
+
+class AsyncStreamServer:
+    """aiohttp application serving task log streams from a LogBroker"""
+
+    def __init__(self, broker: LogBroker,
+                 replay_logs: Callable[..., Iterable[Tuple[Optional[int], str]]],
+                 get_status: Callable[[str], Optional[Dict[str, Any]]],
+                 heartbeat_interval: float = 30,
+                 multiplex: Optional[MultiplexRegistry] = None):
+        """
+        Initialize stream server
+
+        Args:
+            broker: Broker that add_log publishes to
+            replay_logs: replay_logs(task_id, after_seq, before_seq=None) reading stored logs
+            get_status: Returns the current status fields of a task
+            heartbeat_interval: Seconds between heartbeats on idle streams
+            multiplex: Registry of multiplexed streams shared with the Flask app
+        """
+        self.broker = broker
+        self.multiplex = multiplex or MultiplexRegistry(broker, replay_logs, get_status)
+        self.replay_logs = replay_logs
+        self.get_status = get_status
+        self.heartbeat_interval = heartbeat_interval
+        self.connections = 0
+        self._wakers = {}
+        self._thread = None
+
+    def create_app(self) -> web.Application:
+        """Build the aiohttp application"""
+        app = web.Application()
+        app.router.add_get('/api/task-logs/stream', self.stream_many_task_logs)
+        app.router.add_route('OPTIONS', '/api/task-logs/stream', self.preflight)
+        app.router.add_get('/api/task-logs/{task_id}/stream', self.stream_task_logs)
+        app.router.add_route('OPTIONS', '/api/task-logs/{task_id}/stream', self.preflight)
+        app.router.add_get('/api/stream-stats', self.stream_stats)
+        return app
+
+    def start(self, host: str = '0.0.0.0', port: int = 15002) -> threading.Thread:
+        """Run the server on its own event loop in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, args=(host, port),
+                                        name='async-stream-server', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run(self, host: str, port: int):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(self.create_app())
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, host, port).start())
+        logger.info(f"Async log stream server listening on {host}:{port}")
+        loop.run_forever()
+
+    def _acquire_waker(self, topic: Topic) -> TopicWaker:
+        # Only touched from the event loop thread
+        waker = self._wakers.get(id(topic))
+        if waker is None:
+            waker = TopicWaker(asyncio.get_running_loop(), topic)
+            self._wakers[id(topic)] = waker
+        waker.users += 1
+        return waker
+
+    def _release_waker(self, waker: TopicWaker):
+        waker.users -= 1
+        if waker.users == 0:
+            waker.close()
+            self._wakers.pop(id(waker.topic), None)
+
+    async def preflight(self, request: web.Request) -> web.Response:
+        return web.Response(headers=CORS_HEADERS)
+
+    async def stream_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({'connections': self.connections, 'multiplexed_streams': len(self.multiplex),
+                                  **self.broker.stats()}, headers=CORS_HEADERS)
+
+    async def stream_task_logs(self, request: web.Request) -> web.StreamResponse:
+        """Stream task logs using Server-Sent Events (same events as the Flask route)"""
+        task_id = request.match_info['task_id']
+        after_seq = parse_last_event_id(request.headers.get('Last-Event-ID') or request.query.get('last_event_id'))
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            **CORS_HEADERS
+        })
+        await response.prepare(request)
+
+        loop = asyncio.get_running_loop()
+        stream = TaskLogStream(after_seq)
+        # Subscribe before replaying so nothing published in between is lost
+        subscription = self.broker.subscribe(task_id)
+        waker = self._acquire_waker(subscription.topic)
+        self.connections += 1
+
+        try:
+            # MongoDB reads are blocking, keep them off the event loop
+            replayed = await loop.run_in_executor(None, lambda: list(self.replay_logs(task_id, after_seq)))
+            status = await loop.run_in_executor(None, self.get_status, task_id)
+            await response.write(''.join([*stream.replay(replayed), *stream.status(status)]).encode())
+
+            while not stream.finished:
+                event = waker.event
+                delivery = subscription.poll(timeout=0)
+                if not delivery.logs and not delivery.dropped and delivery.status is None:
+                    try:
+                        await asyncio.wait_for(event.wait(), self.heartbeat_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    delivery = subscription.poll(timeout=0)
+
+                backfill = []
+                if delivery.dropped:
+                    # Fell behind the broker's ring buffer: backfill the gap from MongoDB
+                    after, before = stream.gap(delivery)
+                    backfill = await loop.run_in_executor(
+                        None, lambda: list(self.replay_logs(task_id, after, before_seq=before)))
+
+                await response.write(''.join(stream.deliver(delivery, backfill)).encode())
+        except ConnectionResetError:
+            # Client went away
+            pass
+        finally:
+            subscription.close()
+            self._release_waker(waker)
+            self.connections -= 1
+
+        return response
+
+    async def stream_many_task_logs(self, request: web.Request) -> web.StreamResponse:
+        """Stream several tasks over one connection (same events as the Flask route)"""
+        cursors = dict.fromkeys(parse_task_ids(request.query.get('tasks')), 0)
+        cursors.update(parse_cursors(request.headers.get('Last-Event-ID') or request.query.get('last_event_id')))
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            **CORS_HEADERS
+        })
+        await response.prepare(request)
+
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        stream = self.multiplex.open(cursors, on_wake=lambda: loop.call_soon_threadsafe(wakeup.set))
+        self.connections += 1
+
+        try:
+            await response.write(stream.hello().encode())
+            while True:
+                wakeup.clear()
+                # Replays and backfills read MongoDB, keep them off the event loop
+                events = await loop.run_in_executor(None, stream.collect)
+                if events:
+                    await response.write(events.encode())
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    await response.write(HEARTBEAT_EVENT.encode())
+        except ConnectionResetError:
+            # Client went away
+            pass
+        finally:
+            self.multiplex.close(stream)
+            self.connections -= 1
+
+        return response
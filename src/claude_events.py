@@ -0,0 +1,175 @@
+"""
+Structured ingestion of Claude's stream-json output
+
+With `claude --print --output-format stream-json --verbose` Claude writes one
+JSON object per line instead of free text: a system init event, assistant
+messages whose content blocks are text or tool_use calls, user messages
+carrying tool_result blocks, and a final result event with the outcome, cost
+and turn count. ClaudeStreamParser consumes those lines as they arrive and
+turns them into typed ClaudeEvents (with a readable line for the task log)
+while keeping a running summary of the session. Lines that are not
+stream-json events (the run script's own echo lines, or a Claude CLI too old
+for stream-json) return None, and the caller falls back to keyword parsing.
+"""
+
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Tools whose input names a file the tool creates or changes
+FILE_EDIT_TOOLS = {'Write': 'file_path', 'Edit': 'file_path', 'MultiEdit': 'file_path',
+                   'NotebookEdit': 'notebook_path'}
+
+# Longest text / tool result excerpt put in a log line
+MAX_LOG_TEXT = 500
+
+
+class ClaudeEvent(NamedTuple):
+    """One structured event from Claude's output"""
+    type: str                        # 'init', 'text', 'tool_use', 'tool_result' or 'result'
+    log: str                         # Readable line for the task log ('' for none)
+    tool: Optional[str] = None       # tool_use / tool_result: tool name
+    file_path: Optional[str] = None  # tool_use: file created or changed, if any
+    is_error: bool = False           # tool_result / result: whether it failed
+
+
+def _excerpt(text: Any) -> str:
+    if not isinstance(text, str):
+        text = json.dumps(text, ensure_ascii=False)
+    text = text.strip()
+    return text if len(text) <= MAX_LOG_TEXT else text[:MAX_LOG_TEXT] + '…'
+
+
+def _tool_target(name: str, tool_input: Dict[str, Any]) -> str:
+    """Short description of a tool call's argument for the log"""
+    for key in ('file_path', 'notebook_path', 'path', 'command', 'pattern', 'url', 'description'):
+        value = tool_input.get(key)
+        if isinstance(value, str) and value:
+            return _excerpt(value.splitlines()[0])
+    return ''
+
+
+class ClaudeStreamParser:
+    """Incremental parser for one Claude run's stream-json output"""
+
+    def __init__(self):
+        self.structured = False      # Whether any stream-json event has been seen
+        self.session_id: Optional[str] = None
+        self.model: Optional[str] = None
+        self.tool_calls = 0
+        self.tool_errors = 0
+        self.last_tool: Optional[str] = None
+        self.files_modified: Dict[str, None] = {}  # Ordered set of edited paths
+        self.result: Optional[Dict[str, Any]] = None
+        self._tool_names: Dict[str, str] = {}  # tool_use id -> tool name
+
+    @property
+    def finished(self) -> bool:
+        return self.result is not None
+
+    @property
+    def is_error(self) -> bool:
+        return bool(self.result and (self.result.get('is_error') or self.result.get('subtype') != 'success'))
+
+    def feed(self, line: str) -> Optional[List[ClaudeEvent]]:
+        """Events for one output line, or None if it is not a stream-json event"""
+        if not line.startswith('{'):
+            return None
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(message, dict) or not isinstance(message.get('type'), str):
+            return None
+        self.structured = True
+
+        kind = message['type']
+        if kind == 'system':
+            return self._system(message)
+        if kind == 'assistant':
+            return self._assistant(message)
+        if kind == 'user':
+            return self._user(message)
+        if kind == 'result':
+            return self._result(message)
+        return []
+
+    def summary(self) -> Dict[str, Any]:
+        """Structured state of the run so far (the task's claude_activity field)"""
+        summary = {
+            'session_id': self.session_id,
+            'model': self.model,
+            'tool_calls': self.tool_calls,
+            'tool_errors': self.tool_errors,
+            'last_tool': self.last_tool,
+            'files_modified': len(self.files_modified),
+        }
+        if self.result is not None:
+            summary.update({
+                'is_error': self.is_error,
+                'num_turns': self.result.get('num_turns'),
+                'duration_ms': self.result.get('duration_ms'),
+                'cost_usd': self.result.get('total_cost_usd', self.result.get('cost_usd')),
+            })
+        return summary
+
+    def _system(self, message: Dict[str, Any]) -> List[ClaudeEvent]:
+        if message.get('subtype') != 'init':
+            return []
+        self.session_id = message.get('session_id', self.session_id)
+        self.model = message.get('model', self.model)
+        return [ClaudeEvent('init', f"🤖 Claude session started ({self.model or 'default model'})")]
+
+    def _content(self, message: Dict[str, Any]) -> List[Dict[str, Any]]:
+        content = (message.get('message') or {}).get('content')
+        if isinstance(content, str):
+            return [{'type': 'text', 'text': content}]
+        return [block for block in content or [] if isinstance(block, dict)]
+
+    def _assistant(self, message: Dict[str, Any]) -> List[ClaudeEvent]:
+        events = []
+        for block in self._content(message):
+            if block.get('type') == 'text' and block.get('text', '').strip():
+                events.append(ClaudeEvent('text', f"Claude: {_excerpt(block['text'])}"))
+            elif block.get('type') == 'tool_use':
+                name = block.get('name') or 'tool'
+                tool_input = block.get('input') if isinstance(block.get('input'), dict) else {}
+                self._tool_names[block.get('id')] = name
+                self.tool_calls += 1
+                target = _tool_target(name, tool_input)
+                self.last_tool = f"{name} {target}".strip()
+                file_path = tool_input.get(FILE_EDIT_TOOLS[name]) if name in FILE_EDIT_TOOLS else None
+                if isinstance(file_path, str) and file_path:
+                    self.files_modified[file_path] = None
+                else:
+                    file_path = None
+                events.append(ClaudeEvent('tool_use', f"🔧 {self.last_tool}", tool=name, file_path=file_path))
+        return events
+
+    def _user(self, message: Dict[str, Any]) -> List[ClaudeEvent]:
+        events = []
+        for block in self._content(message):
+            if block.get('type') != 'tool_result':
+                continue
+            name = self._tool_names.pop(block.get('tool_use_id'), None)
+            if block.get('is_error'):
+                self.tool_errors += 1
+                content = block.get('content')
+                if isinstance(content, list):
+                    content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+                events.append(ClaudeEvent('tool_result', f"⚠️ {name or 'Tool'} failed: {_excerpt(content or '')}",
+                                          tool=name, is_error=True))
+            else:
+                events.append(ClaudeEvent('tool_result', '', tool=name))
+        return events
+
+    def _result(self, message: Dict[str, Any]) -> List[ClaudeEvent]:
+        self.result = message
+        self.session_id = message.get('session_id', self.session_id)
+        if self.is_error:
+            log = f"❌ Claude finished with an error ({message.get('subtype', 'error')})"
+        else:
+            log = f"✅ Claude finished in {message.get('num_turns', '?')} turns"
+        text = message.get('result')
+        if isinstance(text, str) and text.strip():
+            log += f": {_excerpt(text)}"
+        return [ClaudeEvent('result', log, is_error=self.is_error)]
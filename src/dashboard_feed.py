@@ -0,0 +1,115 @@
+"""
+Versioned change feed of dashboard task records
+
+Every status transition publishes the task's dashboard view here. The feed
+keeps the last published record per task and the feed-wide version at which
+each of its fields last changed. A dashboard client remembers the version
+it has seen and receives exactly the fields that changed since then, so
+open dashboards are kept current without polling or re-reading MongoDB.
+Changes to the same task are coalesced, and only the most recent `capacity`
+changed tasks are kept, records included; a client that falls further
+behind is told to reload the full dashboard.
+
+Versions restart at 0 with the process, so clients hold a cursor that also
+names the feed's epoch (random per process); a cursor from another epoch
+always gets a full reload.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+
+class FeedDelivery(NamedTuple):
+    """What a dashboard client receives from one poll"""
+    version: int                          # Feed version the client is now up to date with
+    changes: Dict[str, Dict[str, Any]]    # task_id -> changed fields
+    reset: bool                           # Client fell behind; reload the full dashboard
+
+
+def parse_cursor(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """Parse a dashboard cursor (epoch.version) into its epoch and version"""
+    epoch, _, version = (value or '').rpartition('.')
+    try:
+        return (epoch or None), max(int(version), 0)
+    except ValueError:
+        return None, 0
+
+
+class DashboardFeed:
+    """Diffs task records on publish and hands out changes since a version"""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize dashboard feed
+
+        Args:
+            capacity: Number of changed tasks (and their records) kept for clients that are behind
+        """
+        self.capacity = capacity
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self._floor = 0  # Changes up to this version have been evicted
+        self._records = {}  # task_id -> last published record
+        self._field_versions = {}  # task_id -> {field: version it last changed at}
+        self._changes = OrderedDict()  # task_id -> version of its latest change, oldest first
+        self._cond = threading.Condition()
+
+    def publish(self, task_id: str, record: Dict[str, Any]) -> bool:
+        """Record a task's current dashboard view; False if nothing changed"""
+        with self._cond:
+            previous = self._records.get(task_id, {})
+            changed = [key for key, value in record.items() if key not in previous or previous[key] != value]
+            if not changed:
+                return False
+            self._records[task_id] = dict(record)
+
+            self.version += 1
+            field_versions = self._field_versions.setdefault(task_id, {})
+            for key in changed:
+                field_versions[key] = self.version
+            self._changes.pop(task_id, None)
+            self._changes[task_id] = self.version
+            while len(self._changes) > self.capacity:
+                # No client can be sent this task's change any more; a later
+                # publish of it sends the full record again
+                evicted, self._floor = self._changes.popitem(last=False)
+                del self._records[evicted]
+                del self._field_versions[evicted]
+            self._cond.notify_all()
+            return True
+
+    def cursor(self, version: int) -> str:
+        """Cursor handed to clients for a version of this feed"""
+        return f'{self.epoch}.{version}'
+
+    def poll(self, since: int, timeout: Optional[float] = None, epoch: Optional[str] = None) -> FeedDelivery:
+        """
+        Wait up to timeout for changes after version `since`
+
+        Args:
+            since: Version the client is up to date with
+            timeout: Seconds to wait for a change (0 returns at once, None waits indefinitely)
+            epoch: Epoch of the client's cursor; defaults to this feed's
+        """
+        stale = epoch is not None and epoch != self.epoch
+        with self._cond:
+            if self.version == since and timeout != 0 and not stale:
+                self._cond.wait_for(lambda: self.version > since, timeout)
+            if stale or since < self._floor or since > self.version:
+                # From another process, or behind the retained window
+                return FeedDelivery(self.version, {}, True)
+            changes = {}
+            for task_id, version in reversed(self._changes.items()):
+                if version <= since:
+                    break
+                record = self._records[task_id]
+                changes[task_id] = {key: record[key] for key, field_version in self._field_versions[task_id].items()
+                                    if field_version > since}
+            return FeedDelivery(self.version, changes, False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Version and buffer sizes for monitoring"""
+        with self._cond:
+            return {'version': self.version, 'tasks': len(self._records), 'pending_changes': len(self._changes)}
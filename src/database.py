@@ -4,19 +4,36 @@ MongoDB database connection and models
 
 import os
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import ConnectionFailure, OperationFailure, ServerSelectionTimeoutError
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import (ConnectionFailure, DuplicateKeyError, OperationFailure, PyMongoError,
+                            ServerSelectionTimeoutError)
 from dotenv import load_dotenv
 import json
 from bson import ObjectId
 
+try:
+    from .repo_summary import (RECENT_TASKS, RECENT_TASK_FIELDS, SUMMARY_PROJECTION, grouped_tasks,
+                               removal_updates, repository_stats, status_key, summary_update)
+    from .task_query import TASK_SORT, build_filter, build_projection, split_page
+except ImportError:
+    from repo_summary import (RECENT_TASKS, RECENT_TASK_FIELDS, SUMMARY_PROJECTION, grouped_tasks,
+                              removal_updates, repository_stats, status_key, summary_update)
+    from task_query import TASK_SORT, build_filter, build_projection, split_page
+
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Idempotency-Key claims expire (via a TTL index) once retries are no longer expected
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# Attempts to claim a key that keeps being released between insert and lookup
+IDEMPOTENCY_CLAIM_ATTEMPTS = 3
+
 
 class JSONEncoder(json.JSONEncoder):
     """Custom JSON encoder for MongoDB ObjectId"""
@@ -36,6 +53,10 @@ class MongoDB:
         self.db = None
         self.tasks_collection = None
         self.logs_collection = None
+        self.repo_summaries_collection = None
+        # Repositories whose summaries changed while rebuild_repo_summaries() runs
+        self._summary_lock = threading.Lock()
+        self._rebuild_touched = None
         self._connected = False
         self._use_fallback = False
         
@@ -83,10 +104,16 @@ class MongoDB:
             # Get collections
             self.tasks_collection = self.db['tasks']
             self.logs_collection = self.db['task_logs']
+            self.repo_summaries_collection = self.db['repo_summaries']
+            # Idempotency-Key claims, keyed by _id, apart from the task records
+            self.idempotency_collection = self.db['idempotency_keys']
             
             # Create indexes
             self._create_indexes()
             
+            # Backfill repository summaries the first time this version connects
+            self._ensure_repo_summaries()
+            
             self._connected = True
             logger.info(f"Connected to MongoDB database: {mongodb_database}")
             
@@ -107,13 +134,23 @@ class MongoDB:
             self.tasks_collection.create_index([('task_id', ASCENDING)], unique=True)
             self.tasks_collection.create_index([('github_repo', ASCENDING)])
             self.tasks_collection.create_index([('status', ASCENDING)])
-            self.tasks_collection.create_index([('created_at', DESCENDING)])
+            self.tasks_collection.create_index([('created_at', DESCENDING), ('task_id', DESCENDING)])
             self.tasks_collection.create_index([('devpod_name', ASCENDING)])
             
-            # Compound index for repository grouping
+            # One task per Idempotency-Key, across all API server replicas
+            self.tasks_collection.create_index([('idempotency_key', ASCENDING)], unique=True, sparse=True)
+            
+            # Compound indexes for paged listings by repository and by status
+            # (task_id breaks created_at ties in the page cursor)
             self.tasks_collection.create_index([
                 ('github_repo', ASCENDING),
-                ('created_at', DESCENDING)
+                ('created_at', DESCENDING),
+                ('task_id', DESCENDING)
+            ])
+            self.tasks_collection.create_index([
+                ('status', ASCENDING),
+                ('created_at', DESCENDING),
+                ('task_id', DESCENDING)
             ])
             
             # Log indexes
@@ -126,6 +163,18 @@ class MongoDB:
                 ('timestamp', ASCENDING)
             ])
             
+            # Per-task sequence numbers for SSE resume (Last-Event-ID)
+            self.logs_collection.create_index([
+                ('task_id', ASCENDING),
+                ('seq', ASCENDING)
+            ])
+            
+            # MongoDB's TTL monitor deletes old Idempotency-Key claims
+            self.idempotency_collection.create_index(
+                [('created_at', ASCENDING)],
+                expireAfterSeconds=IDEMPOTENCY_KEY_TTL_HOURS * 3600
+            )
+            
             logger.info("MongoDB indexes created successfully")
             
         except OperationFailure as e:
@@ -138,25 +187,196 @@ class MongoDB:
             self._connected = False
             logger.info("Disconnected from MongoDB")
     
-    def save_task(self, task_id: str, task_data: Dict[str, Any]) -> bool:
-        """Save or update a task"""
+    def save_task(self, task_id: str, task_data: Dict[str, Any], unset: Iterable[str] = ()) -> bool:
+        """Save or update a task, removing the fields in unset"""
         try:
             task_data['task_id'] = task_id
             task_data['last_updated'] = datetime.now()
+            update = {'$set': task_data}
+            removed = {key: '' for key in unset if key not in task_data}
+            if removed:
+                update['$unset'] = removed
             
-            # Use upsert to insert or update
-            result = self.tasks_collection.update_one(
+            # Use upsert to insert or update; the previous values drive the repository summary
+            before = self.tasks_collection.find_one_and_update(
                 {'task_id': task_id},
-                {'$set': task_data},
-                upsert=True
+                update,
+                projection=SUMMARY_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
             )
+            self._update_repo_summary(before, task_data)
             
-            return result.acknowledged
+            return True
             
         except Exception as e:
             logger.error(f"Failed to save task {task_id}: {e}")
             return False
     
+    def _update_repo_summary(self, before: Optional[Dict[str, Any]], task_data: Dict[str, Any]):
+        """Apply a task save to its repository's summary"""
+        try:
+            change = summary_update(before, task_data)
+            if change is None:
+                return
+            self._touch_repo_summary(change.repo)
+            self.repo_summaries_collection.update_one(
+                {'_id': change.repo},
+                change.update,
+                upsert=change.upsert,
+                array_filters=change.array_filters
+            )
+        except Exception as e:
+            # The task itself was saved; rebuild_repo_summaries() repairs the summary
+            logger.error(f"Failed to update repository summary for {task_data.get('task_id')}: {e}")
+    
+    def _touch_repo_summary(self, repo: Optional[str]):
+        """Keep a running rebuild from overwriting an incremental change to `repo`"""
+        with self._summary_lock:
+            if self._rebuild_touched is not None:
+                self._rebuild_touched.add(repo)
+    
+    def _remove_from_repo_summaries(self, tasks: List[Dict[str, Any]]):
+        """Take deleted tasks out of their repositories' summaries"""
+        for change in removal_updates(tasks):
+            try:
+                self._touch_repo_summary(change.repo)
+                # Cleanup deletes every task older than the cutoff, so the tasks
+                # left in recent_tasks are still the repository's newest ones
+                self.repo_summaries_collection.update_one({'_id': change.repo}, change.update)
+                first = self.tasks_collection.find_one(
+                    {'github_repo': change.repo, 'status': {'$exists': True}},
+                    {'created_at': 1},
+                    sort=[('created_at', ASCENDING)]
+                )
+                if first is None:
+                    self.repo_summaries_collection.delete_one({'_id': change.repo, 'total_tasks': {'$lte': 0}})
+                elif first.get('created_at'):
+                    self.repo_summaries_collection.update_one(
+                        {'_id': change.repo}, {'$set': {'first_activity': first['created_at']}}
+                    )
+            except Exception as e:
+                logger.error(f"Failed to update repository summary for {change.repo}: {e}")
+    
+    def _ensure_repo_summaries(self):
+        """Build repository summaries if there are tasks but no summaries yet"""
+        try:
+            if (self.repo_summaries_collection.estimated_document_count() == 0
+                    and self.tasks_collection.estimated_document_count() > 0):
+                logger.info("Building repository summaries from existing tasks")
+                self.rebuild_repo_summaries()
+        except Exception as e:
+            logger.error(f"Failed to build repository summaries: {e}")
+    
+    def rebuild_repo_summaries(self) -> int:
+        """
+        Recompute every repository summary from the tasks collection
+        
+        Used to backfill summaries for existing tasks and to repair them.
+        Summaries are replaced one repository at a time; repositories that
+        task saves changed while the recount ran keep their incrementally
+        maintained summary rather than a recount that may predate the save.
+        
+        Returns:
+            Number of repositories summarized
+        """
+        with self._summary_lock:
+            self._rebuild_touched = set()
+        try:
+            summaries = self._recount_repo_summaries()
+            # Each write checks the repositories touched so far under the lock,
+            # so an incremental change is either kept or applied on top
+            for repo, summary in summaries.items():
+                with self._summary_lock:
+                    if repo not in self._rebuild_touched:
+                        self.repo_summaries_collection.replace_one({'_id': repo}, summary, upsert=True)
+            with self._summary_lock:
+                self.repo_summaries_collection.delete_many(
+                    {'_id': {'$nin': list(summaries) + list(self._rebuild_touched)}}
+                )
+        finally:
+            with self._summary_lock:
+                self._rebuild_touched = None
+        
+        logger.info(f"Rebuilt repository summaries for {len(summaries)} repositories")
+        return len(summaries)
+    
+    def _recount_repo_summaries(self) -> Dict[str, Dict[str, Any]]:
+        """Repository summaries recounted from the tasks collection, by repository"""
+        counted = {'github_repo': {'$exists': True}, 'status': {'$exists': True}}
+        summaries = {}
+        for item in self.tasks_collection.aggregate([
+            {'$match': counted},
+            {
+                '$group': {
+                    '_id': '$github_repo',
+                    'total_tasks': {'$sum': 1},
+                    'total_commits': {
+                        '$sum': {'$cond': [{'$eq': ['$is_committed', True]}, 1, 0]}
+                    },
+                    'first_activity': {'$min': '$created_at'},
+                    'last_activity': {'$max': '$last_updated'}
+                }
+            }
+        ], allowDiskUse=True):
+            summaries[item['_id']] = {**item, 'status_counts': {}}
+        
+        for item in self.tasks_collection.aggregate([
+            {'$match': counted},
+            {'$group': {'_id': {'repo': '$github_repo', 'status': '$status'}, 'count': {'$sum': 1}}}
+        ], allowDiskUse=True):
+            status_counts = summaries[item['_id']['repo']]['status_counts']
+            key = status_key(item['_id']['status'])
+            status_counts[key] = status_counts.get(key, 0) + item['count']
+        
+        # The (github_repo, created_at) index serves each repository's latest tasks
+        projection = {'_id': 0, **{field: 1 for field in RECENT_TASK_FIELDS}}
+        for repo, summary in summaries.items():
+            summary['recent_tasks'] = list(self.tasks_collection.find(
+                {'github_repo': repo, 'status': {'$exists': True}}, projection
+            ).sort('created_at', DESCENDING).limit(RECENT_TASKS))
+        
+        return summaries
+    
+    def claim_idempotency_key(self, key: str, task_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically reserve an Idempotency-Key for a new task
+        
+        Claims live in their own collection (the key is the _id), so a claim
+        never shows up as a task, with or without the task it was made for.
+        
+        Returns:
+            None if the key was claimed for task_id, otherwise the task_id and
+            request fingerprint of the task that already owns the key
+        
+        Raises:
+            PyMongoError: If the claim could not be recorded or looked up
+        """
+        for _ in range(IDEMPOTENCY_CLAIM_ATTEMPTS):
+            try:
+                self.idempotency_collection.insert_one({
+                    '_id': key,
+                    'task_id': task_id,
+                    'fingerprint': fingerprint,
+                    'created_at': datetime.now()
+                })
+                return None
+            except DuplicateKeyError:
+                existing = self.idempotency_collection.find_one({'_id': key})
+                if existing is not None:
+                    return {'task_id': existing['task_id'], 'fingerprint': existing.get('fingerprint')}
+                # Released (or expired) in the meantime; try to claim it again
+        raise PyMongoError(f"Idempotency-Key was released {IDEMPOTENCY_CLAIM_ATTEMPTS} times while being claimed")
+    
+    def release_idempotency_key(self, key: str, task_id: str) -> bool:
+        """Drop task_id's claim on key (its task was never created)"""
+        try:
+            result = self.idempotency_collection.delete_one({'_id': key, 'task_id': task_id})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key of {task_id}: {e}")
+            return False
+    
     def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get a task by ID"""
         try:
@@ -196,73 +416,47 @@ class MongoDB:
             logger.error(f"Failed to get tasks for repo {github_repo}: {e}")
             return []
     
-    def get_tasks_grouped_by_repo(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Get all tasks grouped by repository"""
+    def find_tasks(self, github_repo: Optional[str] = None, statuses: Optional[List[str]] = None,
+                   created_after: Optional[str] = None, created_before: Optional[str] = None,
+                   fields: Optional[List[str]] = None, cursor: Optional[str] = None,
+                   limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of tasks, newest first
+
+        Args:
+            github_repo: Only tasks of this repository
+            statuses: Only tasks in one of these statuses
+            created_after: Only tasks created at or after this ISO timestamp
+            created_before: Only tasks created before this ISO timestamp
+            fields: Fields to return (default: everything but embedded logs)
+            cursor: next_cursor of the previous page
+            limit: Page size
+
+        Returns:
+            (tasks, next_cursor), next_cursor None on the last page
+
+        Raises:
+            InvalidQuery: If the cursor or a field name is malformed
+        """
+        query = build_filter(github_repo, statuses, created_after, created_before, cursor)
+        projection = build_projection(fields)
         try:
-            pipeline = [
-                {
-                    '$sort': {'created_at': -1}
-                },
-                {
-                    '$group': {
-                        '_id': '$github_repo',
-                        'tasks': {
-                            '$push': {
-                                'task_id': '$task_id',
-                                'status': '$status',
-                                'created_at': '$created_at',
-                                'task_description': '$task_description',
-                                'devpod_name': '$devpod_name',
-                                'progress': '$progress',
-                                'has_changes': '$has_changes',
-                                'is_committed': '$is_committed'
-                            }
-                        },
-                        'total_tasks': {'$sum': 1},
-                        'completed_tasks': {
-                            '$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}
-                        },
-                        'failed_tasks': {
-                            '$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}
-                        },
-                        'running_tasks': {
-                            '$sum': {
-                                '$cond': [
-                                    {'$not': {'$in': ['$status', ['completed', 'failed', 'interrupted']]}},
-                                    1, 0
-                                ]
-                            }
-                        }
-                    }
-                },
-                {
-                    '$project': {
-                        'repo': '$_id',
-                        'tasks': {'$slice': ['$tasks', 10]},  # Limit to 10 most recent tasks per repo
-                        'stats': {
-                            'total': '$total_tasks',
-                            'completed': '$completed_tasks',
-                            'failed': '$failed_tasks',
-                            'running': '$running_tasks'
-                        }
-                    }
-                },
-                {
-                    '$sort': {'stats.total': -1}  # Sort by most active repos
-                }
-            ]
-            
-            result = list(self.tasks_collection.aggregate(pipeline))
-            
-            # Convert to dictionary format
-            grouped = {}
-            for item in result:
-                grouped[item['repo']] = {
-                    'tasks': item['tasks'],
-                    'stats': item['stats']
-                }
+            tasks = list(self.tasks_collection.find(query, projection).sort(TASK_SORT).limit(limit + 1))
+            for task in tasks:
+                if '_id' in task:
+                    task['_id'] = str(task['_id'])
+            return split_page(tasks, limit)
             
-            return grouped
+        except Exception as e:
+            logger.error(f"Failed to list tasks: {e}")
+            return [], None
+    
+    def get_tasks_grouped_by_repo(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get all tasks grouped by repository (10 most recent per repository)"""
+        try:
+            # Most active repositories first
+            summaries = self.repo_summaries_collection.find().sort('total_tasks', DESCENDING)
+            return grouped_tasks(list(summaries))
             
         except Exception as e:
             logger.error(f"Failed to get grouped tasks: {e}")
@@ -284,12 +478,28 @@ class MongoDB:
             logger.error(f"Failed to add log for task {task_id}: {e}")
             return False
     
+    def add_logs(self, log_entries: List[Dict[str, Any]]) -> bool:
+        """Add a batch of log entries in a single round trip"""
+        if not log_entries:
+            return True
+        try:
+            # insert_many adds _id to the documents it is given, so pass copies
+            result = self.logs_collection.insert_many(
+                [dict(entry) for entry in log_entries],
+                ordered=False
+            )
+            return result.acknowledged
+            
+        except Exception as e:
+            logger.error(f"Failed to add {len(log_entries)} logs: {e}")
+            return False
+    
     def get_logs(self, task_id: str, limit: int = 1000) -> List[Dict[str, Any]]:
         """Get logs for a specific task"""
         try:
             logs = list(self.logs_collection.find(
                 {'task_id': task_id}
-            ).sort('timestamp', ASCENDING).limit(limit))
+            ).sort([('seq', ASCENDING), ('timestamp', ASCENDING)]).limit(limit))
             
             for log in logs:
                 log['_id'] = str(log['_id'])
@@ -299,6 +509,37 @@ class MongoDB:
             logger.error(f"Failed to get logs for task {task_id}: {e}")
             return []
     
+    def get_logs_after(self, task_id: str, after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get logs with a sequence number greater than after_seq"""
+        try:
+            logs = list(self.logs_collection.find({
+                'task_id': task_id,
+                'seq': {'$gt': after_seq}
+            }).sort('seq', ASCENDING).limit(limit))
+            
+            for log in logs:
+                log['_id'] = str(log['_id'])
+            return logs
+            
+        except Exception as e:
+            logger.error(f"Failed to get logs after {after_seq} for task {task_id}: {e}")
+            return []
+    
+    def get_last_log_seq(self, task_id: str) -> int:
+        """Get the highest log sequence number stored for a task"""
+        if not self._connected:
+            return 0
+        try:
+            log = self.logs_collection.find_one(
+                {'task_id': task_id, 'seq': {'$exists': True}},
+                sort=[('seq', DESCENDING)]
+            )
+            return log['seq'] if log else 0
+            
+        except Exception as e:
+            logger.error(f"Failed to get last log sequence for task {task_id}: {e}")
+            return 0
+    
     def get_recent_logs(self, task_id: str, after_timestamp: datetime, limit: int = 100) -> List[Dict[str, Any]]:
         """Get logs after a specific timestamp"""
         try:
@@ -321,10 +562,10 @@ class MongoDB:
             cutoff_date = datetime.now() - timedelta(days=days)
             
             # Find old tasks
-            old_tasks = self.tasks_collection.find(
+            old_tasks = list(self.tasks_collection.find(
                 {'created_at': {'$lt': cutoff_date}},
-                {'task_id': 1}
-            )
+                {'task_id': 1, **SUMMARY_PROJECTION}
+            ))
             
             task_ids = [task['task_id'] for task in old_tasks]
             
@@ -339,6 +580,9 @@ class MongoDB:
             })
             
             logger.info(f"Deleted {tasks_result.deleted_count} old tasks and {logs_result.deleted_count} log entries")
+            if tasks_result.deleted_count:
+                # Summaries count every stored task
+                self._remove_from_repo_summaries(old_tasks)
             return tasks_result.deleted_count
             
         except Exception as e:
@@ -348,52 +592,8 @@ class MongoDB:
     def get_repository_stats(self) -> List[Dict[str, Any]]:
         """Get statistics for all repositories"""
         try:
-            pipeline = [
-                {
-                    '$group': {
-                        '_id': '$github_repo',
-                        'total_tasks': {'$sum': 1},
-                        'completed_tasks': {
-                            '$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}
-                        },
-                        'failed_tasks': {
-                            '$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}
-                        },
-                        'total_commits': {
-                            '$sum': {'$cond': [{'$eq': ['$is_committed', True]}, 1, 0]}
-                        },
-                        'last_activity': {'$max': '$last_updated'},
-                        'first_activity': {'$min': '$created_at'}
-                    }
-                },
-                {
-                    '$project': {
-                        'repository': '$_id',
-                        'total_tasks': 1,
-                        'completed_tasks': 1,
-                        'failed_tasks': 1,
-                        'total_commits': 1,
-                        'success_rate': {
-                            '$cond': [
-                                {'$gt': ['$total_tasks', 0]},
-                                {'$multiply': [
-                                    {'$divide': ['$completed_tasks', '$total_tasks']},
-                                    100
-                                ]},
-                                0
-                            ]
-                        },
-                        'last_activity': 1,
-                        'first_activity': 1
-                    }
-                },
-                {
-                    '$sort': {'last_activity': -1}
-                }
-            ]
-            
-            stats = list(self.tasks_collection.aggregate(pipeline))
-            return stats
+            summaries = self.repo_summaries_collection.find().sort('last_activity', DESCENDING)
+            return repository_stats(list(summaries))
             
         except Exception as e:
             logger.error(f"Failed to get repository stats: {e}")
@@ -405,15 +605,31 @@ db = MongoDB()
 
 
 # Helper functions for backward compatibility
-def save_task_to_db(task_id: str, task_data: Dict[str, Any]) -> bool:
+def save_task_to_db(task_id: str, task_data: Dict[str, Any], unset: Iterable[str] = ()) -> bool:
     """Save task to MongoDB"""
     if not db._connected and not db._use_fallback:
         db.connect()
     if db._connected:
-        return db.save_task(task_id, task_data)
+        return db.save_task(task_id, task_data, unset)
     return True  # Return True if using fallback (local storage)
 
 
+def claim_idempotency_key_in_db(key: str, task_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Reserve an Idempotency-Key in MongoDB (raises if MongoDB could not record the claim)"""
+    if not db._connected and not db._use_fallback:
+        db.connect()
+    if db._connected:
+        return db.claim_idempotency_key(key, task_id, fingerprint)
+    return None  # Using fallback: only this server's in-memory keys apply
+
+
+def release_idempotency_key_in_db(key: str, task_id: str) -> bool:
+    """Drop an Idempotency-Key claim from MongoDB"""
+    if db._connected:
+        return db.release_idempotency_key(key, task_id)
+    return True
+
+
 def get_task_from_db(task_id: str) -> Optional[Dict[str, Any]]:
     """Get task from MongoDB"""
     if not db._connected and not db._use_fallback:
@@ -429,4 +645,13 @@ def add_log_to_db(task_id: str, log_message: str) -> bool:
         db.connect()
     if db._connected:
         return db.add_log(task_id, log_message)
-    return True  # Return True if using fallback (local storage)
\ No newline at end of file
+    return True  # Return True if using fallback (local storage)
+
+
+def add_logs_to_db(log_entries: List[Dict[str, Any]]) -> bool:
+    """Add a batch of logs to MongoDB"""
+    if not db._connected and not db._use_fallback:
+        db.connect()
+    if db._connected:
+        return db.add_logs(log_entries)
+    return True  # Return True if using fallback (local storage)
@@ -0,0 +1,218 @@
+"""
+Warm pool of pre-provisioned devpods
+
+Creating a devpod (devpod up) and installing the task toolchain take
+minutes, and used to happen inside the first task for a new devpod name.
+DevpodPool keeps `size` ready devpods per image, created and set up by a
+background thread. A task submitted without a devpod name takes one
+(acquire()), and the pool replenishes behind it; when the pool is empty the
+task falls back to creating its own devpod. Ready devpods are persisted to a
+state file so a restart does not forget (and leak) them; since they may have
+been deleted while the server was down, restored devpods are checked with
+is_alive before they are handed out. A devpod handed out belongs to its task
+and is never returned to the pool.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between retries after failed provisioning (seconds)
+MAX_RETRY_DELAY = 300
+
+
+def image_slug(image: Optional[str]) -> str:
+    """Short name-safe label of an image (devpod names allow lowercase letters, digits and dashes)"""
+    if not image:
+        return 'default'
+    return hashlib.sha1(image.encode()).hexdigest()[:8]
+
+
+class DevpodPool:
+    """Ready devpods per image, handed out on task submission and replenished in the background"""
+
+    def __init__(self, provision: Callable[[str, Optional[str]], bool], images: List[Optional[str]],
+                 size: int = 1, name_prefix: str = 'warm', state_file: Optional[Path] = None,
+                 is_alive: Optional[Callable[[str], bool]] = None):
+        """
+        Initialize devpod pool
+
+        Args:
+            provision: Creates devpod `name` from `image` and installs the toolchain; False on failure
+            images: Images to keep warm devpods of (None: DevPod's default image)
+            size: Ready devpods kept per image
+            name_prefix: Prefix of pooled devpod names
+            state_file: JSON file ready devpods are persisted to
+            is_alive: Whether a restored devpod still exists (restored devpods are trusted without it)
+        """
+        self.provision = provision
+        self.images = list(dict.fromkeys(images or [None]))
+        self.size = max(0, size)
+        self.name_prefix = name_prefix
+        self.state_file = state_file
+        self.is_alive = is_alive
+        self._unverified = set()  # Restored devpods not yet checked with is_alive
+        self._ready: Dict[Optional[str], Deque[str]] = {image: deque() for image in self.images}
+        self._provisioning: Dict[Optional[str], int] = {image: 0 for image in self.images}
+        self._metrics = {'hits': 0, 'misses': 0, 'provisioned': 0, 'failures': 0, 'stale': 0}
+        self._latencies: Deque[float] = deque(maxlen=100)  # Recent replenish latencies (seconds)
+        self._wakeup = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Restore persisted devpods and start replenishing"""
+        self.restore()
+        if self.size and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='devpod-pool', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify_all()
+
+    def acquire(self, image: Optional[str] = None) -> Optional[str]:
+        """Take a ready devpod of `image`; None (a miss) if there is none"""
+        while True:
+            with self._wakeup:
+                ready = self._ready.get(image)
+                name = ready.popleft() if ready else None
+                unverified = name in self._unverified
+                self._unverified.discard(name)
+                if name:
+                    self._save()
+                # Replenish what was taken (or start filling a pool that ran dry)
+                self._wakeup.notify_all()
+            if not unverified or self.is_alive is None or self._check_alive(name):
+                break
+            logger.warning(f"Restored warm devpod {name} is gone, dropping it")
+            with self._wakeup:
+                self._metrics['stale'] += 1
+        with self._wakeup:
+            self._metrics['hits' if name else 'misses'] += 1
+        if name:
+            logger.info(f"Warm pool hit: {name} ({image or 'default image'})")
+        else:
+            logger.info(f"Warm pool miss ({image or 'default image'})")
+        return name
+
+    def _check_alive(self, name: str) -> bool:
+        try:
+            return bool(self.is_alive(name))
+        except Exception as e:
+            logger.warning(f"Failed to check warm devpod {name}: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool sizes, hits/misses and replenish latency for monitoring"""
+        with self._wakeup:
+            latencies = sorted(self._latencies)
+            requests = self._metrics['hits'] + self._metrics['misses']
+            return {
+                'size': self.size,
+                'ready': {image or 'default': len(ready) for image, ready in self._ready.items()},
+                'provisioning': sum(self._provisioning.values()),
+                **self._metrics,
+                'hit_rate': self._metrics['hits'] / requests if requests else None,
+                'replenish_seconds': {
+                    'last': self._latencies[-1] if latencies else None,
+                    'median': latencies[len(latencies) // 2] if latencies else None,
+                    'max': latencies[-1] if latencies else None
+                }
+            }
+
+    def _deficit(self) -> Optional[str]:
+        """An image below its target size (caller holds the lock); raises LookupError if none"""
+        for image in self.images:
+            if len(self._ready[image]) + self._provisioning[image] < self.size:
+                return image
+        raise LookupError
+
+    def _run(self):
+        retry_delay = 5
+        while True:
+            with self._wakeup:
+                while True:
+                    if self._closed:
+                        return
+                    try:
+                        image = self._deficit()
+                        break
+                    except LookupError:
+                        self._wakeup.wait()
+                self._provisioning[image] += 1
+
+            name = f"{self.name_prefix}-{image_slug(image)}-{secrets.token_hex(4)}"
+            started = time.monotonic()
+            try:
+                ok = self.provision(name, image)
+            except Exception as e:
+                logger.error(f"Failed to provision warm devpod {name}: {e}")
+                ok = False
+            elapsed = time.monotonic() - started
+
+            with self._wakeup:
+                self._provisioning[image] -= 1
+                if ok:
+                    self._ready[image].append(name)
+                    self._metrics['provisioned'] += 1
+                    self._latencies.append(elapsed)
+                    self._save()
+                else:
+                    self._metrics['failures'] += 1
+            if ok:
+                logger.info(f"Warm devpod {name} ready in {elapsed:.1f}s")
+                retry_delay = 5
+            else:
+                # Back off instead of hammering a cluster that cannot create devpods
+                with self._wakeup:
+                    self._wakeup.wait_for(lambda: self._closed, timeout=retry_delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+
+    def _save(self):
+        """Persist ready devpods (caller holds the lock)"""
+        if self.state_file is None:
+            return
+        state = [{'name': name, 'image': image} for image, ready in self._ready.items() for name in ready]
+        try:
+            tmp_file = self.state_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            logger.error(f"Failed to save devpod pool: {e}")
+
+    def restore(self) -> List[str]:
+        """Take back ready devpods persisted by a previous run (of images still configured)"""
+        if self.state_file is None or not self.state_file.exists():
+            return []
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load devpod pool: {e}")
+            return []
+
+        restored = []
+        with self._wakeup:
+            known = {name for ready in self._ready.values() for name in ready}
+            for entry in state:
+                if not isinstance(entry, dict) or entry.get('image') not in self._ready:
+                    continue
+                if entry.get('name') and entry['name'] not in known:
+                    self._ready[entry['image']].append(entry['name'])
+                    self._unverified.add(entry['name'])
+                    restored.append(entry['name'])
+        if restored:
+            logger.info(f"Restored {len(restored)} warm devpods")
+        return restored
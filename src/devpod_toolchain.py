@@ -0,0 +1,70 @@
+"""
+Prebaked devpod toolchain detection
+
+Setting up a task used to install Node.js (apt-get), the Claude CLI (npm)
+and, for pull requests, gh into every devpod, which costs minutes per task.
+The image built from docker/devpod/Dockerfile has all of them preinstalled
+and records that in a version stamp file. One `cat` of the stamp tells the
+task flow whether it can skip every install step; the stamp version is
+bumped whenever the image's toolchain changes in a way the server relies on.
+"""
+
+from typing import Dict, Optional
+
+# Written by docker/devpod/Dockerfile (keep both in step)
+STAMP_PATH = '/etc/remote-developer/toolchain'
+TOOLCHAIN_VERSION = '1'
+
+# Tools a prebaked image must provide
+REQUIRED_TOOLS = ('node', 'claude', 'gh', 'git')
+
+# Prints the stamp, or nothing on images without one
+STAMP_CHECK_COMMAND = f'cat {STAMP_PATH} 2>/dev/null || true'
+
+GH_INSTALL_COMMAND = (
+    'curl -fsSL https://cli.github.com/packages/githubcli-archive-keyring.gpg'
+    ' | dd of=/usr/share/keyrings/githubcli-archive-keyring.gpg'
+    ' && echo "deb [arch=$(dpkg --print-architecture) signed-by=/usr/share/keyrings/githubcli-archive-keyring.gpg]'
+    ' https://cli.github.com/packages stable main" | tee /etc/apt/sources.list.d/github-cli.list > /dev/null'
+    ' && apt update && apt install gh -y'
+)
+
+# Installs the toolchain into a running devpod (what the Dockerfile bakes in);
+# used to set up warm pool devpods created from images without it
+INSTALL_COMMANDS = (
+    'which node || (apt-get update && apt-get install -y nodejs npm)',
+    'which claude || npm install -g @anthropic-ai/claude-code',
+    f'which gh || ({GH_INSTALL_COMMAND})',
+)
+
+# Writes (and prints) the stamp once INSTALL_COMMANDS succeeded, so later
+# tasks on the devpod take the prebaked fast path
+STAMP_WRITE_COMMAND = (
+    f'mkdir -p {STAMP_PATH.rsplit("/", 1)[0]}'
+    f' && {{ echo "toolchain_version={TOOLCHAIN_VERSION}";'
+    ' echo "node=$(node --version)";'
+    ' echo "claude=$(claude --version | head -n1)";'
+    ' echo "gh=$(gh --version | head -n1)";'
+    f' echo "git=$(git --version)"; }} > {STAMP_PATH}'
+    f' && cat {STAMP_PATH}'
+)
+
+
+def parse_stamp(output: str) -> Dict[str, str]:
+    """key=value lines of a stamp file"""
+    stamp = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition('=')
+        if sep and key.strip():
+            stamp[key.strip()] = value.strip()
+    return stamp
+
+
+def prebaked_toolchain(output: str) -> Optional[Dict[str, str]]:
+    """The stamp if STAMP_CHECK_COMMAND's output shows a current prebaked toolchain, else None"""
+    stamp = parse_stamp(output)
+    if stamp.get('toolchain_version') != TOOLCHAIN_VERSION:
+        return None
+    if any(not stamp.get(tool) for tool in REQUIRED_TOOLS):
+        return None
+    return stamp
@@ -0,0 +1,268 @@
+"""
+Persistent shell sessions for running commands in devpods
+
+Instead of paying for a `kubectl exec` (API server auth, SPDY stream setup)
+per command, an ExecSession keeps one `kubectl exec -i <pod> -- bash` open
+and multiplexes commands over its stdin. Each command runs in its own
+`bash -c` (so cd, exit and syntax errors stay contained, exactly like the
+one-shot path) and is followed by sentinel lines on stdout and stderr that
+carry its exit code.
+
+The shell is started through a kube_backend backend, so a session runs
+over a kubectl process or a Kubernetes API websocket alike.
+"""
+
+import base64
+import logging
+import queue
+import subprocess
+import threading
+import time
+import uuid
+from typing import Dict, List
+
+try:
+    from .kube_backend import BackendError, KubectlBackend
+except ImportError:
+    from kube_backend import BackendError, KubectlBackend
+
+logger = logging.getLogger(__name__)
+
+
+class ExecSessionError(Exception):
+    """Raised when a command could not be sent over a session"""
+
+
+class ExecSessionBusy(ExecSessionError):
+    """Raised when every session of a pod stayed busy too long"""
+
+
+class ExecSession:
+    """One long-lived `kubectl exec -i` shell in a pod"""
+
+    def __init__(self, pod_name: str, namespace: str = 'devpod', kubectl: str = 'kubectl', backend=None):
+        self.pod_name = pod_name
+        self.namespace = namespace
+        self.kubectl = kubectl
+        self.backend = backend or KubectlBackend(namespace, kubectl)
+        self.process = None
+        self.lock = threading.Lock()
+        self.commands_run = 0
+        self._stdout = queue.Queue()
+        self._stderr = queue.Queue()
+
+    def start(self):
+        """Open the remote shell"""
+        try:
+            self.process = self.backend.spawn(self.pod_name, ['bash', '--noprofile', '--norc'], stdin=True)
+        except BackendError as e:
+            raise ExecSessionError(f"Failed to start exec session in {self.pod_name}: {e}")
+
+        self._stdout = queue.Queue()
+        self._stderr = queue.Queue()
+        for stream, lines in ((self.process.stdout, self._stdout), (self.process.stderr, self._stderr)):
+            threading.Thread(target=self._pump, args=(stream, lines), daemon=True,
+                             name=f'exec-session-{self.pod_name}').start()
+        logger.info(f"Opened exec session in pod {self.pod_name}")
+
+    @staticmethod
+    def _pump(stream, lines: queue.Queue):
+        """Move output lines from a pipe into a queue; None marks EOF"""
+        for line in iter(stream.readline, b''):
+            lines.put(line)
+        lines.put(None)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def close(self):
+        """Terminate the remote shell"""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.terminate()
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+        self.process = None
+
+    def run(self, command: str, timeout: float = 120) -> subprocess.CompletedProcess:
+        """
+        Run a command in the session (caller holds self.lock)
+
+        Returns a CompletedProcess like subprocess.run(..., text=True); a timeout
+        kills the session and returns exit code 124, as `timeout` would.
+
+        Raises:
+            ExecSessionError: If the command could not be sent (safe to retry elsewhere)
+        """
+        if not self.is_alive():
+            raise ExecSessionError(f"Exec session in {self.pod_name} is not running")
+
+        marker = f"__RD_EXIT_{uuid.uuid4().hex}__"
+        encoded = base64.b64encode(command.encode()).decode()
+        script = (
+            f'bash -c "$(echo \'{encoded}\' | base64 -d)" < /dev/null\n'
+            f'echo "{marker} $?"\n'
+            f'echo "{marker}" >&2\n'
+        )
+        try:
+            self.process.stdin.write(script.encode())
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self.close()
+            raise ExecSessionError(f"Exec session in {self.pod_name} closed: {e}")
+
+        deadline = time.monotonic() + timeout
+        stdout, returncode = self._read_until(self._stdout, marker, deadline)
+        stderr, stderr_done = self._read_until(self._stderr, marker, deadline)
+        self.commands_run += 1
+
+        if returncode is None:
+            # Timed out or the shell died mid-command; never reuse this session
+            reason = 'timed out' if self.is_alive() else 'exec session terminated'
+            self.close()
+            return subprocess.CompletedProcess(command, 124 if reason == 'timed out' else 1,
+                                               stdout, stderr + f"\n{reason}")
+        if stderr_done is None:
+            # The command finished, but the rest of its stderr would be read
+            # as the next command's
+            logger.warning(f"Exec session in {self.pod_name} timed out reading stderr; closing it")
+            self.close()
+        return subprocess.CompletedProcess(command, returncode, stdout, stderr)
+
+    @staticmethod
+    def _read_until(lines: queue.Queue, marker: str, deadline: float):
+        """Collect output up to the sentinel; returns (text, exit code or None)"""
+        chunks = []
+        returncode = None
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                line = lines.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if line is None:
+                break
+            text = line.decode('utf-8', errors='replace')
+            index = text.find(marker)
+            if index == -1:
+                chunks.append(text)
+                continue
+            # Output without a trailing newline shares the line with the sentinel
+            chunks.append(text[:index])
+            status = text[index + len(marker):].strip()
+            returncode = int(status) if status.lstrip('-').isdigit() else 0
+            break
+        return ''.join(chunks), returncode
+
+
+class ExecSessionPool:
+    """Reusable exec sessions per pod, shared across task steps and tasks"""
+
+    def __init__(self, namespace: str = 'devpod', kubectl: str = 'kubectl', max_sessions_per_pod: int = 2,
+                 backend=None):
+        """
+        Initialize session pool
+
+        Args:
+            namespace: Kubernetes namespace of the devpods
+            kubectl: kubectl binary
+            max_sessions_per_pod: Concurrent sessions per pod before callers wait (up to
+                their command's timeout, then ExecSessionBusy)
+            backend: kube_backend backend that starts the shells (default: kubectl)
+        """
+        self.namespace = namespace
+        self.kubectl = kubectl
+        self.backend = backend or KubectlBackend(namespace, kubectl)
+        self.max_sessions_per_pod = max(1, max_sessions_per_pod)
+        self._sessions: Dict[str, List[ExecSession]] = {}
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self.stats = {'sessions_opened': 0, 'commands': 0, 'busy_timeouts': 0}
+
+    def _acquire(self, pod_name: str, timeout: float) -> ExecSession:
+        """
+        Get an idle session for the pod, opening one if allowed
+
+        When every session is busy, waits up to timeout seconds for any of
+        them to be released.
+
+        Raises:
+            ExecSessionBusy: If no session became free in time
+            ExecSessionError: If a new session could not be started
+        """
+        deadline = time.monotonic() + timeout
+        with self._released:
+            while True:
+                sessions = self._sessions.setdefault(pod_name, [])
+                # Forget sessions whose shell has exited
+                sessions[:] = [s for s in sessions if s.is_alive() or s.lock.locked()]
+                for session in sessions:
+                    if session.lock.acquire(blocking=False):
+                        if session.is_alive():
+                            return session
+                        session.lock.release()
+                if len(sessions) < self.max_sessions_per_pod:
+                    session = ExecSession(pod_name, self.namespace, self.kubectl, self.backend)
+                    session.lock.acquire()
+                    sessions.append(session)
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['busy_timeouts'] += 1
+                    raise ExecSessionBusy(f"All {len(sessions)} exec sessions in {pod_name} stayed busy "
+                                          f"for {timeout:.0f}s")
+                self._released.wait(remaining)
+
+        try:
+            session.start()
+            self.stats['sessions_opened'] += 1
+        except ExecSessionError:
+            with self._released:
+                if session in self._sessions.get(pod_name, []):
+                    self._sessions[pod_name].remove(session)
+            self._release(session)
+            raise
+        return session
+
+    def _release(self, session: ExecSession):
+        """Hand a session back and wake the callers waiting for one (of any pod)"""
+        session.lock.release()
+        with self._released:
+            self._released.notify_all()
+
+    def run(self, pod_name: str, command: str, timeout: float = 120) -> subprocess.CompletedProcess:
+        """
+        Run a command in the pod over a pooled session
+
+        Raises:
+            ExecSessionBusy: If every session stayed busy for timeout seconds
+            ExecSessionError: If no session could be started or used
+        """
+        session = self._acquire(pod_name, timeout)
+        try:
+            self.stats['commands'] += 1
+            return session.run(command, timeout)
+        finally:
+            self._release(session)
+
+    def close_pod(self, pod_name: str):
+        """Close all sessions for a pod (e.g. after it was recreated)"""
+        with self._lock:
+            sessions = self._sessions.pop(pod_name, [])
+        for session in sessions:
+            session.close()
+
+    def close_all(self):
+        """Close every session"""
+        with self._lock:
+            pods = list(self._sessions)
+        for pod_name in pods:
+            self.close_pod(pod_name)
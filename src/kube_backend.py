@@ -0,0 +1,428 @@
+"""
+Backends for running commands in devpod pods
+
+Every command, output stream, pod lookup and port-forward used to start a
+`kubectl` process through the shell, which parses the kubeconfig and opens
+a new TLS connection to the API server each time. A backend hides how that
+is done:
+
+- KubectlBackend keeps the kubectl path (argument lists, no shell).
+- KubernetesApiBackend uses the `kubernetes` client package: one ApiClient
+  with a keep-alive connection pool for pod lists and watches, and
+  websocket streams for exec and port-forward.
+
+spawn() returns a subprocess.Popen or, for the API backend, an ApiProcess
+that looks like one (pipes for stdin/stdout/stderr, poll/wait/terminate),
+so exec sessions and output streaming work the same over either backend.
+create_backend picks one from configuration and falls back to kubectl when
+the client package or cluster credentials are missing.
+"""
+
+import json
+import logging
+import os
+import socket
+import subprocess
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Websocket exec channels (k8s.io/apimachinery remotecommand)
+STDOUT_CHANNEL = 1
+STDERR_CHANNEL = 2
+ERROR_CHANNEL = 3
+
+
+class BackendError(Exception):
+    """Raised when a backend could not reach the pod or the API server"""
+
+
+class KubectlPodWatch:
+    """Names of pods as they change, from `kubectl get pods --watch-only`"""
+
+    def __init__(self, kubectl: str, namespace: str):
+        cmd = [kubectl, 'get', 'pods', '-n', namespace, '--watch-only', '-o', 'name']
+        self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for line in self.process.stdout:
+                # Lines look like "pod/<name>", one per added/modified/deleted pod
+                pod_name = line.strip().split('/', 1)[-1]
+                if pod_name:
+                    yield pod_name
+        finally:
+            self.process.stdout.close()
+            self.process.wait()
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+
+
+class KubectlPortForward:
+    """A running `kubectl port-forward`"""
+
+    def __init__(self, kubectl: str, namespace: str, pod_name: str, local_port: int, remote_port: int):
+        self.process = subprocess.Popen([kubectl, 'port-forward', '-n', namespace, pod_name,
+                                         f'{local_port}:{remote_port}'],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+
+
+class KubectlBackend:
+    """Runs everything through the kubectl binary"""
+
+    name = 'kubectl'
+
+    def __init__(self, namespace: str = 'devpod', kubectl: str = 'kubectl', request_timeout: float = 10):
+        """
+        Initialize kubectl backend
+
+        Args:
+            namespace: Namespace of the devpod pods
+            kubectl: kubectl binary
+            request_timeout: Seconds before a pod lookup is abandoned
+        """
+        self.namespace = namespace
+        self.kubectl = kubectl
+        self.request_timeout = request_timeout
+
+    def spawn(self, pod_name: str, argv: Sequence[str], stdin: bool = False, merge_stderr: bool = False):
+        """Start argv in the pod; returns a Popen with binary pipes"""
+        cmd = [self.kubectl, 'exec', *(['-i'] if stdin else []), '-n', self.namespace, pod_name, '--', *argv]
+        try:
+            return subprocess.Popen(cmd, stdin=subprocess.PIPE if stdin else subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE, bufsize=0)
+        except OSError as e:
+            raise BackendError(f"Failed to run kubectl exec in {pod_name}: {e}")
+
+    def run(self, pod_name: str, command: str, timeout: float = 120) -> subprocess.CompletedProcess:
+        """Run a shell command in the pod; exit code 124 on timeout, as `timeout` would"""
+        cmd = ['timeout', str(timeout), self.kubectl, 'exec', '-n', self.namespace, pod_name,
+               '--', 'bash', '-c', command]
+        return subprocess.run(cmd, capture_output=True, text=True)
+
+    def find_pods(self, label_selector: Optional[str] = None) -> List[str]:
+        """Names of the namespace's pods (matching label_selector, if given)"""
+        cmd = [self.kubectl, 'get', 'pods', '-n', self.namespace, '-o', 'jsonpath={.items[*].metadata.name}']
+        if label_selector:
+            cmd[3:3] = ['-l', label_selector]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.request_timeout)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            raise BackendError(f"Failed to list pods: {e}")
+        if result.returncode != 0:
+            raise BackendError(f"Failed to list pods: {result.stderr.strip()}")
+        return result.stdout.split()
+
+    def watch_pods(self) -> KubectlPodWatch:
+        return KubectlPodWatch(self.kubectl, self.namespace)
+
+    def port_forward(self, pod_name: str, local_port: int, remote_port: int) -> KubectlPortForward:
+        return KubectlPortForward(self.kubectl, self.namespace, pod_name, local_port, remote_port)
+
+    def close(self):
+        pass
+
+
+class ApiProcess:
+    """
+    A websocket exec stream dressed as a subprocess.Popen
+
+    A pump thread moves stdout/stderr frames into OS pipes, so callers can
+    select(), readline() or hand the pipe to asyncio exactly as with a
+    kubectl process; writes to stdin become stdin frames.
+    """
+
+    def __init__(self, ws, merge_stderr: bool = False):
+        self._ws = ws
+        self._terminated = False
+        self.returncode: Optional[int] = None
+        stdout_read, self._stdout_write = os.pipe()
+        self.stdout = os.fdopen(stdout_read, 'rb', buffering=0)
+        if merge_stderr:
+            self.stderr, self._stderr_write = None, self._stdout_write
+        else:
+            stderr_read, self._stderr_write = os.pipe()
+            self.stderr = os.fdopen(stderr_read, 'rb', buffering=0)
+        self.stdin = _ApiStdin(ws)
+        self._pump_thread = threading.Thread(target=self._pump, daemon=True, name='api-exec-pump')
+        self._pump_thread.start()
+
+    def _pump(self):
+        try:
+            while self._ws.is_open():
+                self._ws.update(timeout=1)
+                self._forward()
+            self._forward()
+        except Exception as e:
+            if not self._terminated:
+                logger.warning(f"Exec stream closed: {e}")
+        finally:
+            self.returncode = _exit_code(self._ws)
+            os.close(self._stdout_write)
+            if self._stderr_write != self._stdout_write:
+                os.close(self._stderr_write)
+
+    def _forward(self):
+        for channel, fd in ((STDOUT_CHANNEL, self._stdout_write), (STDERR_CHANNEL, self._stderr_write)):
+            data = self._ws.read_channel(channel, timeout=0)
+            if data:
+                _write_all(fd, data if isinstance(data, bytes) else data.encode())
+        # The client also copies all output into a read_all() buffer; drop it
+        # or a long-running stream keeps everything it printed in memory
+        captured = getattr(self._ws, '_all', None)
+        if hasattr(captured, 'truncate'):
+            captured.seek(0)
+            captured.truncate()
+
+    def poll(self) -> Optional[int]:
+        return None if self._pump_thread.is_alive() else self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        self._pump_thread.join(timeout)
+        if self._pump_thread.is_alive():
+            raise subprocess.TimeoutExpired('exec', timeout)
+        return self.returncode
+
+    def terminate(self):
+        self._terminated = True
+        self._ws.close()
+
+    kill = terminate
+
+
+class _ApiStdin:
+    """File-like stdin of an ApiProcess"""
+
+    def __init__(self, ws):
+        self._ws = ws
+
+    def write(self, data: bytes) -> int:
+        try:
+            self._ws.write_stdin(data)
+        except Exception as e:
+            raise BrokenPipeError(str(e))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        try:
+            view = view[os.write(fd, view):]
+        except BrokenPipeError:
+            return  # Reader went away; drop the output
+
+
+def _exit_code(ws) -> int:
+    """Exit code from the exec's status channel (1 if there is none)"""
+    try:
+        return ws.returncode
+    except Exception:
+        return 1
+
+
+class PortForwarder:
+    """Local TCP listener relaying each connection over its own port-forward websocket"""
+
+    def __init__(self, backend: 'KubernetesApiBackend', pod_name: str, local_port: int, remote_port: int):
+        self.backend = backend
+        self.pod_name = pod_name
+        self.remote_port = remote_port
+        self._server = socket.create_server(('127.0.0.1', local_port))
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True, name=f'port-forward-{local_port}').start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._relay, args=(conn,), daemon=True).start()
+
+    def _relay(self, conn: socket.socket):
+        from kubernetes.stream import portforward
+        try:
+            forward = portforward(self.backend.core.connect_get_namespaced_pod_portforward, self.pod_name,
+                                  self.backend.namespace, ports=str(self.remote_port))
+            remote = forward.socket(self.remote_port)
+        except Exception as e:
+            logger.warning(f"Port-forward to {self.pod_name}:{self.remote_port} failed: {e}")
+            conn.close()
+            return
+        threading.Thread(target=_copy, args=(remote, conn), daemon=True).start()
+        _copy(conn, remote)
+
+    def close(self):
+        self._closed = True
+        self._server.close()
+
+
+def _copy(source, target):
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, target):
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+
+class ApiPodWatch:
+    """Names of pods as they change, from a Kubernetes API watch"""
+
+    def __init__(self, backend: 'KubernetesApiBackend'):
+        from kubernetes import watch
+        self.backend = backend
+        self._watch = watch.Watch()
+        self._alive = True
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            # Start from the current list so only changes are reported
+            pods = self.backend.core.list_namespaced_pod(self.backend.namespace,
+                                                         _request_timeout=self.backend.request_timeout)
+            for event in self._watch.stream(self.backend.core.list_namespaced_pod, self.backend.namespace,
+                                            resource_version=pods.metadata.resource_version):
+                yield event['object'].metadata.name
+        finally:
+            self._alive = False
+
+    def is_alive(self) -> bool:
+        return self._alive
+
+    def close(self):
+        self._watch.stop()
+
+
+class KubernetesApiBackend:
+    """Talks to the Kubernetes API directly with one pooled, keep-alive client"""
+
+    name = 'api'
+
+    def __init__(self, namespace: str = 'devpod', pool_size: int = 16, request_timeout: float = 10):
+        """
+        Initialize API backend
+
+        Args:
+            namespace: Namespace of the devpod pods
+            pool_size: Keep-alive connections to the API server
+            request_timeout: Seconds before a pod lookup is abandoned
+
+        Raises:
+            ImportError: If the kubernetes package is not installed
+            Exception: If neither in-cluster nor kubeconfig credentials load
+        """
+        from kubernetes import client, config
+
+        configuration = client.Configuration()
+        try:
+            config.load_incluster_config(client_configuration=configuration)
+        except config.ConfigException:
+            config.load_kube_config(client_configuration=configuration)
+        configuration.connection_pool_maxsize = pool_size
+        self.namespace = namespace
+        self.request_timeout = request_timeout
+        self.core = client.CoreV1Api(client.ApiClient(configuration))
+
+    def _exec(self, pod_name: str, argv: Sequence[str], stdin: bool):
+        from kubernetes.stream import stream
+        try:
+            return stream(self.core.connect_get_namespaced_pod_exec, pod_name, self.namespace,
+                          command=list(argv), stdin=stdin, stdout=True, stderr=True, tty=False,
+                          _preload_content=False, binary=True)
+        except Exception as e:
+            raise BackendError(f"Failed to exec in {pod_name}: {e}")
+
+    def spawn(self, pod_name: str, argv: Sequence[str], stdin: bool = False, merge_stderr: bool = False) -> ApiProcess:
+        """Start argv in the pod over a websocket; returns a Popen-like ApiProcess"""
+        return ApiProcess(self._exec(pod_name, argv, stdin), merge_stderr=merge_stderr)
+
+    def run(self, pod_name: str, command: str, timeout: float = 120) -> subprocess.CompletedProcess:
+        """Run a shell command in the pod; exit code 124 on timeout, as `timeout` would"""
+        argv = ['bash', '-c', command]
+        ws = self._exec(pod_name, argv, stdin=False)
+        stdout, stderr = [], []
+        deadline = time.monotonic() + timeout
+        try:
+            while ws.is_open():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return subprocess.CompletedProcess(argv, 124, _text(stdout), _text(stderr) + '\ntimed out')
+                ws.update(timeout=min(remaining, 1))
+                stdout.append(ws.read_channel(STDOUT_CHANNEL, timeout=0))
+                stderr.append(ws.read_channel(STDERR_CHANNEL, timeout=0))
+            stdout.append(ws.read_channel(STDOUT_CHANNEL, timeout=0))
+            stderr.append(ws.read_channel(STDERR_CHANNEL, timeout=0))
+            return subprocess.CompletedProcess(argv, _exit_code(ws), _text(stdout), _text(stderr))
+        except BackendError:
+            raise
+        except Exception as e:
+            raise BackendError(f"Exec in {pod_name} failed: {e}")
+        finally:
+            ws.close()
+
+    def find_pods(self, label_selector: Optional[str] = None) -> List[str]:
+        """Names of the namespace's pods (matching label_selector, if given)"""
+        try:
+            pods = self.core.list_namespaced_pod(self.namespace, label_selector=label_selector or '',
+                                                 _request_timeout=self.request_timeout)
+        except Exception as e:
+            raise BackendError(f"Failed to list pods: {e}")
+        return [pod.metadata.name for pod in pods.items]
+
+    def watch_pods(self) -> ApiPodWatch:
+        return ApiPodWatch(self)
+
+    def port_forward(self, pod_name: str, local_port: int, remote_port: int) -> PortForwarder:
+        return PortForwarder(self, pod_name, local_port, remote_port)
+
+    def close(self):
+        self.core.api_client.close()
+
+
+def _text(chunks: List) -> str:
+    return b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in chunks if chunk).decode(
+        'utf-8', errors='replace')
+
+
+def create_backend(name: str = 'kubectl', namespace: str = 'devpod', kubectl: str = 'kubectl',
+                   pool_size: int = 16, request_timeout: float = 10):
+    """The configured backend; 'api' falls back to kubectl if the client cannot be set up"""
+    if name == 'api':
+        try:
+            backend = KubernetesApiBackend(namespace, pool_size=pool_size, request_timeout=request_timeout)
+            logger.info("Using the Kubernetes API backend for devpod commands")
+            return backend
+        except ImportError:
+            logger.warning("kubernetes package not installed, using kubectl for devpod commands")
+        except Exception as e:
+            logger.warning(f"Kubernetes API client unavailable ({e}), using kubectl for devpod commands")
+    elif name != 'kubectl':
+        logger.warning(f"Unknown exec backend {name!r}, using kubectl")
+    return KubectlBackend(namespace, kubectl, request_timeout=request_timeout)
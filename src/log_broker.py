@@ -0,0 +1,216 @@
+"""
+In-process pub/sub broker for task logs and status updates
+
+Each task has a topic holding a bounded ring of recent log lines and the
+latest status snapshot. Publishers append once; subscribers keep their own
+cursor into the ring instead of owning a copied queue. A subscriber that
+falls further behind than the ring capacity is told how many lines it
+missed (so it can backfill from MongoDB), and status updates are coalesced
+to the most recent one.
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class Delivery(NamedTuple):
+    """What a subscriber receives from one poll"""
+    logs: List[Tuple[Optional[int], str]]  # (seq, message) in publish order
+    dropped: int                           # Lines that fell out of the ring before delivery
+    status: Optional[Dict[str, Any]]       # Latest status, if it changed since the last poll
+
+
+class Topic:
+    """Ring-buffered log stream and latest status for one task"""
+
+    def __init__(self, capacity: int):
+        self.events = deque(maxlen=capacity)
+        self.published = 0  # Total events ever published (offset of the next event)
+        self.status = None
+        self.status_version = 0
+        self.subscribers = 0
+        self.retired = False  # Dropped from the broker; publishers and subscribers take a new one
+        self.cond = threading.Condition()
+        # Callbacks run after every publish, e.g. to wake an asyncio loop
+        self.listeners = ()
+
+    def first_offset(self) -> int:
+        """Offset of the oldest event still held in the ring"""
+        return self.published - len(self.events)
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call callback (from the publishing thread) after each publish"""
+        with self.cond:
+            self.listeners = self.listeners + (callback,)
+
+    def remove_listener(self, callback: Callable[[], None]):
+        with self.cond:
+            # Equality, not identity: each access to a bound method creates a new object
+            self.listeners = tuple(listener for listener in self.listeners if listener != callback)
+
+    def _notify(self):
+        """Wake waiting threads and listeners (caller holds the lock)"""
+        self.cond.notify_all()
+        return self.listeners
+
+
+class Subscription:
+    """A subscriber's cursor into a task topic"""
+
+    def __init__(self, broker: 'LogBroker', task_id: str, topic: Topic):
+        self.broker = broker
+        self.task_id = task_id
+        self.topic = topic
+        with topic.cond:
+            # Start at the live edge; history and current status come from the caller
+            self.cursor = topic.published
+            self.status_version = topic.status_version
+        self.closed = False
+
+    def _ready(self) -> bool:
+        return (self.cursor < self.topic.published
+                or self.status_version != self.topic.status_version)
+
+    def poll(self, timeout: Optional[float] = None) -> Delivery:
+        """Wait up to timeout for new lines or a status change"""
+        topic = self.topic
+        with topic.cond:
+            if not self._ready() and timeout != 0:
+                topic.cond.wait_for(self._ready, timeout)
+            return self._collect()
+
+    def _collect(self) -> Delivery:
+        """Take everything after the cursor (caller holds the topic lock)"""
+        topic = self.topic
+        first = topic.first_offset()
+        dropped = 0
+        if self.cursor < first:
+            # Slow consumer: lines were overwritten before we read them
+            dropped = first - self.cursor
+            self.cursor = first
+
+        start = self.cursor - first
+        logs = list(islice(topic.events, start, None))
+        self.cursor = topic.published
+
+        status = None
+        if self.status_version != topic.status_version:
+            status = topic.status
+            self.status_version = topic.status_version
+
+        return Delivery(logs, dropped, status)
+
+    def close(self):
+        """Stop receiving events"""
+        if not self.closed:
+            self.closed = True
+            self.broker._unsubscribe(self)
+
+
+class LogBroker:
+    """Topic-per-task broker that add_log publishes to once per line"""
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize log broker
+
+        Args:
+            capacity: Number of recent log lines kept per task topic
+        """
+        self.capacity = capacity
+        self._topics = {}
+        self._lock = threading.Lock()
+
+    def _topic(self, task_id: str) -> Topic:
+        topic = self._topics.get(task_id)
+        if topic is None:
+            with self._lock:
+                topic = self._topics.get(task_id)
+                if topic is None:
+                    topic = Topic(self.capacity)
+                    self._topics[task_id] = topic
+        return topic
+
+    def _locked_topic(self, task_id: str) -> Topic:
+        """The task's current topic with its lock held (caller releases topic.cond)"""
+        while True:
+            topic = self._topic(task_id)
+            topic.cond.acquire()
+            if not topic.retired:
+                return topic
+            topic.cond.release()
+
+    def publish(self, task_id: str, message: str, seq: Optional[int] = None):
+        """Append a log line to the task topic and wake its subscribers"""
+        self.publish_many(task_id, [(seq, message)])
+
+    def publish_many(self, task_id: str, lines: List[Tuple[Optional[int], str]]):
+        """Append (seq, message) log lines to the task topic and wake its subscribers once"""
+        topic = self._locked_topic(task_id)
+        try:
+            topic.events.extend(lines)
+            topic.published += len(lines)
+            listeners = topic._notify()
+        finally:
+            topic.cond.release()
+        for listener in listeners:
+            listener()
+
+    def publish_status(self, task_id: str, status: Dict[str, Any]):
+        """Replace the task's latest status; subscribers only see the newest one"""
+        topic = self._locked_topic(task_id)
+        try:
+            topic.status = dict(status)
+            topic.status_version += 1
+            listeners = topic._notify()
+        finally:
+            topic.cond.release()
+        for listener in listeners:
+            listener()
+
+    def subscribe(self, task_id: str) -> Subscription:
+        """Subscribe to new log lines and status changes of a task"""
+        topic = self._locked_topic(task_id)
+        try:
+            topic.subscribers += 1
+        finally:
+            topic.cond.release()
+        return Subscription(self, task_id, topic)
+
+    def _unsubscribe(self, subscription: Subscription):
+        topic = subscription.topic
+        with self._lock, topic.cond:
+            topic.subscribers -= 1
+            # A topic only its subscribers created (an unknown or finished task,
+            # nothing ever published) goes with the last of them
+            if (not topic.subscribers and not topic.published and not topic.status_version
+                    and self._topics.get(subscription.task_id) is topic):
+                topic.retired = True
+                del self._topics[subscription.task_id]
+
+    def discard(self, task_id: str):
+        """
+        Drop a finished task's topic
+
+        Existing subscribers keep their reference and still see the final
+        status; the ring memory is released once they disconnect.
+        """
+        with self._lock:
+            self._topics.pop(task_id, None)
+
+    def subscriber_count(self, task_id: str) -> int:
+        """Number of active subscribers for a task"""
+        topic = self._topics.get(task_id)
+        return topic.subscribers if topic else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Topic and subscriber counts for monitoring"""
+        with self._lock:
+            topics = list(self._topics.values())
+        return {
+            'topics': len(topics),
+            'subscribers': sum(topic.subscribers for topic in topics),
+            'buffered_lines': sum(len(topic.events) for topic in topics),
+        }
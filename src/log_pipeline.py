@@ -0,0 +1,262 @@
+"""
+Write-behind log ingestion pipeline
+
+Log lines are buffered in memory and persisted in batches by a background
+flusher thread, so streaming task output is not throttled by database
+round trips. A batch the writer fails (raises or returns a falsy result)
+is retried with backoff before it is counted as failed.
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LogPipeline:
+    """Bounded in-process buffer with a background batch flusher"""
+
+    def __init__(self, writer: Callable[[List[Dict[str, Any]]], Any],
+                 batch_size: int = 200, flush_interval: float = 0.5,
+                 max_buffer: int = 10000,
+                 seq_loader: Optional[Callable[[str], int]] = None,
+                 max_retries: int = 3, retry_delay: float = 0.5):
+        """
+        Initialize log pipeline
+
+        Args:
+            writer: Callable that persists a list of log entries (e.g. insert_many);
+                a falsy result or an exception means the batch was not written
+            batch_size: Flush as soon as this many entries are pending
+            flush_interval: Flush pending entries at least this often (seconds)
+            max_buffer: Maximum pending entries before producers block
+            seq_loader: Returns the last persisted sequence number of a task,
+                used to continue numbering after a restart
+            max_retries: Further attempts at a failed batch before it is dropped
+            retry_delay: Seconds before the first retry, doubled for each further one
+        """
+        self.writer = writer
+        self.seq_loader = seq_loader
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_buffer = max(self.batch_size, int(max_buffer))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_delay = float(retry_delay)
+
+        self._buffer = deque()
+        self._in_flight: List[Dict[str, Any]] = []  # Batch the flusher is writing right now
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        self._flush_requested = False
+
+        # Last sequence number handed out per task
+        self._seqs = {}
+        self._seq_lock = threading.Lock()
+
+        # Number of entries accepted / handed to the writer (written or failed)
+        self._submitted = 0
+        self._completed = 0
+
+        self.stats = {
+            'submitted': 0,
+            'written': 0,
+            'failed': 0,
+            'retries': 0,
+            'batches': 0,
+        }
+
+    def start(self):
+        """Start the background flusher if it is not running yet"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._closed = False
+            self._thread = threading.Thread(target=self._run, name='log-pipeline-flusher', daemon=True)
+            self._thread.start()
+
+    def submit(self, task_id: str, message: str) -> Dict[str, Any]:
+        """Queue a log line for persistence and return the log entry"""
+        return self.submit_many(task_id, [message])[0]
+
+    def prepare(self, task_id: str):
+        """
+        Do the blocking part of a submit ahead of time
+
+        Seeds the task's sequence from storage if needed and waits while the
+        buffer is full, so a following submit_many(..., block=False) can run
+        under a lock without I/O or backpressure waits.
+        """
+        if self._thread is None:
+            self.start()
+        self.seed(task_id)
+        with self._cond:
+            while len(self._buffer) >= self.max_buffer and not self._closed:
+                self._cond.notify_all()
+                self._cond.wait(self.flush_interval)
+
+    def seed(self, task_id: str):
+        """Load the task's last persisted sequence number unless already known (e.g. on registration)"""
+        if task_id not in self._seqs:
+            self._load_seq(task_id)
+
+    def submit_many(self, task_id: str, messages: List[str], block: bool = True) -> List[Dict[str, Any]]:
+        """
+        Queue a task's log lines for persistence in one hand-off and return their entries
+
+        With block=False the buffer may briefly exceed max_buffer instead of
+        waiting; call prepare() first so seeding and backpressure happen
+        outside the caller's lock.
+        """
+        timestamp = datetime.now()
+        entries = [{
+            'task_id': task_id,
+            'seq': None,
+            'message': message,
+            'timestamp': timestamp
+        } for message in messages]
+
+        if self._thread is None:
+            self.start()
+        self.seed(task_id)
+
+        write_through = []
+        with self._cond:
+            for entry in entries:
+                # Apply backpressure instead of growing without bound
+                while block and len(self._buffer) >= self.max_buffer and not self._closed:
+                    self._cond.notify_all()
+                    self._cond.wait(self.flush_interval)
+
+                # Numbered under the buffer lock so seq order matches write order
+                entry['seq'] = self.next_seq(task_id)
+                self._submitted += 1
+                self.stats['submitted'] += 1
+                if self._closed:
+                    write_through.append(entry)
+                else:
+                    self._buffer.append(entry)
+            # Wake the flusher to start its interval, or to write a full batch
+            if self._buffer:
+                self._cond.notify_all()
+
+        if write_through:
+            # Pipeline is shut down, write through directly
+            self._write(write_through)
+            with self._cond:
+                self._completed += len(write_through)
+                self._cond.notify_all()
+        return entries
+
+    def next_seq(self, task_id: str) -> int:
+        """Allocate the next monotonically increasing sequence number for a task"""
+        with self._seq_lock:
+            self._seqs[task_id] = self._seqs.get(task_id, 0) + 1
+            return self._seqs[task_id]
+
+    def _load_seq(self, task_id: str):
+        """Seed a task's counter from the last persisted sequence number"""
+        last_seq = 0
+        if self.seq_loader:
+            try:
+                last_seq = self.seq_loader(task_id) or 0
+            except Exception as e:
+                logger.warning(f"Failed to load last log sequence for {task_id}: {e}")
+        with self._seq_lock:
+            self._seqs.setdefault(task_id, last_seq)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Block until every entry submitted so far has been handed to the writer
+
+        Returns:
+            bool: True if everything was flushed within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            if self._completed >= target:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._completed < target:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None or not self._thread.is_alive():
+                    logger.warning(f"Log pipeline flush incomplete ({target - self._completed} entries pending)")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Flush all pending entries and stop the flusher"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Log pipeline flusher did not stop in time")
+
+    def unwritten(self, task_id: str, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """A task's entries after after_seq that may not be in storage yet (queued or being written), by seq"""
+        with self._cond:
+            return [entry for entry in (*self._in_flight, *self._buffer)
+                    if entry['task_id'] == task_id and entry['seq'] > after_seq]
+
+    def pending(self) -> int:
+        """Number of entries waiting to be written"""
+        with self._cond:
+            return len(self._buffer)
+
+    def _run(self):
+        """Flusher loop: write batches on size, time or explicit flush"""
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+
+                deadline = time.monotonic() + self.flush_interval
+                while (len(self._buffer) < self.batch_size
+                       and not self._flush_requested and not self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.batch_size))]
+                self._in_flight = batch
+                if not self._buffer:
+                    self._flush_requested = False
+
+                if not batch and self._closed:
+                    return
+
+            if batch:
+                self._write(batch)
+                with self._cond:
+                    self._in_flight = []
+                    self._completed += len(batch)
+                    self._cond.notify_all()
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        """Hand a batch to the writer, retrying failures; never lets errors kill the flusher"""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                time.sleep(min(self.retry_delay * 2 ** (attempt - 1), 30))
+            try:
+                if self.writer(batch):
+                    self.stats['written'] += len(batch)
+                    self.stats['batches'] += 1
+                    return
+                error = 'writer reported failure'
+            except Exception as e:
+                error = e
+            logger.warning(f"Failed to write {len(batch)} log entries (attempt {attempt + 1}): {error}")
+        self.stats['failed'] += len(batch)
+        logger.error(f"Dropped {len(batch)} log entries after {self.max_retries + 1} attempts")
@@ -0,0 +1,195 @@
+"""
+Multiplexed log streams: many tasks over one SSE connection
+
+Browsers cap concurrent connections per origin, so one EventSource per
+running task card stalls once a handful of tasks are running. A
+MultiplexStream holds a LogBroker subscription per watched task and turns
+them into task-tagged events on one connection. Tasks are added and removed
+while the stream is open (the control request reaches the stream through
+the MultiplexRegistry by its stream_id); finished tasks drop out on their
+own. After each batch the stream sends a cursor event whose id records the
+last seq of every watched task, so a reconnecting EventSource resumes all
+of them from Last-Event-ID.
+"""
+
+import secrets
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .log_broker import LogBroker, Subscription
+    from .sse import TaskLogStream, format_cursor_event, format_event
+except ImportError:
+    from log_broker import LogBroker, Subscription
+    from sse import TaskLogStream, format_cursor_event, format_event
+
+
+class MultiplexStream:
+    """The set of tasks one client watches, and their unsent events"""
+
+    def __init__(self, stream_id: str, broker: LogBroker,
+                 replay_logs: Callable[..., Iterable[Tuple[Optional[int], str]]],
+                 get_status: Callable[[str], Optional[Dict[str, Any]]],
+                 on_wake: Optional[Callable[[], None]] = None):
+        """
+        Initialize multiplexed stream
+
+        Args:
+            stream_id: Identifier the client uses to add and remove tasks
+            broker: Broker that add_log publishes to
+            replay_logs: replay_logs(task_id, after_seq, before_seq=None) reading stored logs
+            get_status: Returns the current status fields of a task
+            on_wake: Called (from the publishing thread) when there is something to collect
+        """
+        self.stream_id = stream_id
+        self.broker = broker
+        self.replay_logs = replay_logs
+        self.get_status = get_status
+        self.on_wake = on_wake
+        self.wakeup = threading.Event()
+        # Only touched by collect() (one call at a time, from whichever thread serves the connection)
+        self._streams: Dict[str, Tuple[TaskLogStream, Subscription]] = {}
+        # Add/remove requests from other threads, applied on the next collect()
+        self._pending: List[Tuple[str, str, int]] = []
+        self._lock = threading.Lock()
+
+    def add(self, task_id: str, after_seq: int = 0):
+        """Start watching a task, replaying its logs after after_seq"""
+        with self._lock:
+            self._pending.append(('add', task_id, after_seq))
+        self._wake()
+
+    def remove(self, task_id: str):
+        """Stop watching a task"""
+        with self._lock:
+            self._pending.append(('remove', task_id, 0))
+        self._wake()
+
+    def tasks(self) -> List[str]:
+        """Tasks watched once pending requests are applied"""
+        with self._lock:
+            watched = dict.fromkeys(list(self._streams))
+            for action, task_id, _ in self._pending:
+                if action == 'add':
+                    watched[task_id] = None
+                else:
+                    watched.pop(task_id, None)
+        return list(watched)
+
+    def hello(self) -> str:
+        """First event of the connection: the stream_id to send add/remove requests to"""
+        return format_event({'stream_id': self.stream_id, 'tasks': self.tasks()})
+
+    def _wake(self):
+        # Called from publishing threads through topic listeners
+        self.wakeup.set()
+        if self.on_wake:
+            self.on_wake()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until there may be events to collect; False on timeout"""
+        return self.wakeup.wait(timeout)
+
+    def collect(self) -> str:
+        """Events for everything that happened since the last call ('' if nothing)"""
+        # Clear first: a publish racing with this collect wakes the next wait()
+        self.wakeup.clear()
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        events = []
+        changed = False
+        for action, task_id, after_seq in pending:
+            if action == 'remove':
+                changed |= self._close_task(task_id)
+            elif task_id not in self._streams:
+                changed = True
+                events.extend(self._open_task(task_id, after_seq))
+
+        for task_id, (stream, subscription) in list(self._streams.items()):
+            delivery = subscription.poll(timeout=0)
+            if not delivery.logs and not delivery.dropped and delivery.status is None:
+                continue
+            backfill = []
+            if delivery.dropped:
+                # Fell behind the broker's ring buffer: backfill the gap from MongoDB
+                after, before = stream.gap(delivery)
+                backfill = self.replay_logs(task_id, after, before_seq=before)
+            events.extend(stream.deliver(delivery, backfill))
+            if stream.finished:
+                self._close_task(task_id)
+
+        if events or changed:
+            events.append(format_cursor_event(
+                {task_id: stream.last_seq for task_id, (stream, _) in self._streams.items()}))
+        return ''.join(events)
+
+    def _open_task(self, task_id: str, after_seq: int) -> List[str]:
+        stream = TaskLogStream(after_seq, task_id=task_id)
+        # Subscribe before replaying so nothing published in between is lost
+        subscription = self.broker.subscribe(task_id)
+        subscription.topic.add_listener(self._wake)
+        self._streams[task_id] = (stream, subscription)
+        events = list(stream.replay(self.replay_logs(task_id, after_seq)))
+        events.extend(stream.status(self.get_status(task_id)))
+        if stream.finished:
+            self._close_task(task_id)
+        return events
+
+    def _close_task(self, task_id: str) -> bool:
+        entry = self._streams.pop(task_id, None)
+        if entry is None:
+            return False
+        _, subscription = entry
+        subscription.topic.remove_listener(self._wake)
+        subscription.close()
+        return True
+
+    def close(self):
+        """Drop every subscription (the connection is gone)"""
+        for task_id in list(self._streams):
+            self._close_task(task_id)
+
+
+class MultiplexRegistry:
+    """Open multiplexed streams by stream_id, shared by the Flask and asyncio servers"""
+
+    def __init__(self, broker: LogBroker,
+                 replay_logs: Callable[..., Iterable[Tuple[Optional[int], str]]],
+                 get_status: Callable[[str], Optional[Dict[str, Any]]]):
+        """
+        Initialize multiplexed stream registry
+
+        Args:
+            broker: Broker that add_log publishes to
+            replay_logs: replay_logs(task_id, after_seq, before_seq=None) reading stored logs
+            get_status: Returns the current status fields of a task
+        """
+        self.broker = broker
+        self.replay_logs = replay_logs
+        self.get_status = get_status
+        self._streams: Dict[str, MultiplexStream] = {}
+        self._lock = threading.Lock()
+
+    def open(self, cursors: Dict[str, int], on_wake: Optional[Callable[[], None]] = None) -> MultiplexStream:
+        """Register a new stream for a connection, watching the tasks in cursors (task_id -> after_seq)"""
+        # The stream_id is all a client needs to change the watched set, so make it unguessable
+        stream = MultiplexStream(secrets.token_urlsafe(16), self.broker, self.replay_logs,
+                                 self.get_status, on_wake)
+        for task_id, after_seq in cursors.items():
+            stream.add(task_id, after_seq)
+        with self._lock:
+            self._streams[stream.stream_id] = stream
+        return stream
+
+    def get(self, stream_id: str) -> Optional[MultiplexStream]:
+        return self._streams.get(stream_id)
+
+    def close(self, stream: MultiplexStream):
+        """Unregister a stream and drop its subscriptions"""
+        with self._lock:
+            self._streams.pop(stream.stream_id, None)
+        stream.close()
+
+    def __len__(self) -> int:
+        return len(self._streams)
@@ -0,0 +1,97 @@
+"""
+Single-pass classification of Claude output lines
+
+parse_claude_output and add_log used to lowercase every output line several
+times and scan it once per keyword. OutputClassifier compiles the keywords of
+all rules into one regular expression (an alternation of literals, longest
+first, which the regex engine scans with a literal-prefix fast path), lowers
+the line once, finds every keyword in one scan and turns the rules they
+belong to into OutputEvents, ordered by priority. Classification needs no
+task state, so callers run it before taking the task's lock and skip the lock
+entirely for lines that produce no event.
+
+Rules are pluggable: pass extra OutputRules (or a whole list) to add keywords
+or kinds.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class OutputRule(NamedTuple):
+    """Keywords whose presence in a line emits events of the given kinds"""
+    kinds: Tuple[str, ...]        # Event kinds emitted
+    keywords: Tuple[str, ...]     # Literal substrings
+    case_sensitive: bool = False
+
+
+class OutputEvent(NamedTuple):
+    """What a line says about the task"""
+    kind: str
+    line: str
+    status: Optional[str] = None   # claude_status: the reported status
+    runtime: Optional[int] = None  # claude_status: reported runtime in seconds
+
+
+# Event kinds in priority order: parse_claude_output acts on the first one
+# (as the if/elif chain it replaces did), add_log looks for task_finished
+EVENT_KINDS = ('claude_status', 'progress_bar', 'file_operation', 'thinking', 'completed', 'task_finished')
+
+DEFAULT_RULES = [
+    OutputRule(('claude_status',), ('CLAUDE_STATUS:',), case_sensitive=True),
+    OutputRule(('progress_bar',), ('█', '▓')),
+    OutputRule(('file_operation',), ('creating', 'writing', 'updating', 'modifying')),
+    OutputRule(('thinking',), ('thinking', 'planning', 'analyzing')),
+    OutputRule(('completed',), ('completed', 'finished', 'done', '완료')),
+    # Longer keywords win over their prefixes ("finished!" over "finished"), so they emit both kinds
+    OutputRule(('completed', 'task_finished'), ('completed!', 'finished!', 'all tasks finished')),
+]
+
+STATUS_PATTERN = re.compile(r'CLAUDE_STATUS:\s*(\S+)')
+RUNTIME_PATTERN = re.compile(r'\((\d+) ')
+
+
+class OutputClassifier:
+    """Classifies output lines against a set of rules in one scan per line"""
+
+    def __init__(self, rules: Optional[Iterable[OutputRule]] = None):
+        """
+        Initialize output classifier
+
+        Args:
+            rules: Rules to compile (default: DEFAULT_RULES)
+        """
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        # Lowered keyword -> [(exact keyword if case-sensitive, kinds)]
+        self._keywords: Dict[str, List[Tuple[Optional[str], Tuple[str, ...]]]] = {}
+        for rule in self.rules:
+            for keyword in rule.keywords:
+                self._keywords.setdefault(keyword.lower(), []).append(
+                    (keyword if rule.case_sensitive else None, rule.kinds))
+        order = {kind: index for index, kind in enumerate(EVENT_KINDS)}
+        self._priority = lambda kind: order.get(kind, len(order))
+        self._pattern = re.compile('|'.join(
+            re.escape(keyword) for keyword in sorted(self._keywords, key=len, reverse=True)))
+
+    def classify(self, line: str) -> List[OutputEvent]:
+        """Events for one output line, highest priority first ([] for most lines)"""
+        found = self._pattern.findall(line.lower())
+        if not found:
+            return []
+        kinds = set()
+        for keyword in found:
+            for exact, rule_kinds in self._keywords[keyword]:
+                if exact is None or exact in line:
+                    kinds.update(rule_kinds)
+        return [self._event(kind, line) for kind in sorted(kinds, key=self._priority)]
+
+    def _event(self, kind: str, line: str) -> OutputEvent:
+        if kind != 'claude_status':
+            return OutputEvent(kind, line)
+        status = STATUS_PATTERN.search(line)
+        runtime = None
+        if 'RUNNING' in line and 'minutes' in line:
+            minutes = RUNTIME_PATTERN.search(line)
+            if minutes:
+                runtime = int(minutes.group(1)) * 60
+        return OutputEvent(kind, line, status.group(1) if status else None, runtime)
@@ -0,0 +1,163 @@
+"""
+Cached devpod -> pod name resolution
+
+Looking up a devpod's pod takes up to four `kubectl get pods` calls. The
+resolver keeps the answer in memory with a TTL, and a background
+`kubectl get pods --watch-only` drops any entry whose pod changes (deleted,
+restarted, rescheduled), so repeat lookups are dictionary hits without
+handing out stale pod names. The watch can also come from the Kubernetes
+API (see kube_backend) instead of kubectl.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from .kube_backend import KubectlPodWatch
+except ImportError:
+    from kube_backend import KubectlPodWatch
+
+logger = logging.getLogger(__name__)
+
+
+class PodResolver:
+    """TTL cache in front of a devpod -> pod lookup, invalidated by a pod watch"""
+
+    def __init__(self, lookup: Callable[[str], str], ttl: float = 300, namespace: str = 'devpod',
+                 kubectl: str = 'kubectl', watch: bool = True, watch_source: Optional[Callable] = None):
+        """
+        Initialize pod resolver
+
+        Args:
+            lookup: Uncached lookup, returns the pod name or raises
+            ttl: Seconds a cached pod name is trusted without a watch event
+            namespace: Namespace to watch
+            kubectl: kubectl binary
+            watch: Run the background watch that invalidates changed pods
+            watch_source: Starts a pod watch (iterable of changed pod names with
+                close() and is_alive()); default: `kubectl get pods --watch-only`
+        """
+        self.lookup = lookup
+        self.ttl = ttl
+        self.namespace = namespace
+        self.kubectl = kubectl
+        self.watch_enabled = watch
+        self.watch_source = watch_source or (lambda: KubectlPodWatch(self.kubectl, self.namespace))
+        self._cache = {}  # devpod_name -> (pod_name, expires_at)
+        self._lock = threading.Lock()
+        self._lookup_locks = {}
+        self._watch_thread = None
+        self._watch = None
+        self._stopped = threading.Event()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'invalidations': 0,
+            'watch_events': 0,
+            'watch_restarts': 0,
+        }
+
+    def resolve(self, devpod_name: str) -> str:
+        """Return the pod name for a devpod, from cache when possible"""
+        self._ensure_watch()
+        pod_name = self._cached(devpod_name)
+        if pod_name:
+            return pod_name
+
+        # One lookup per devpod at a time; concurrent callers reuse its result
+        with self._lock:
+            lookup_lock = self._lookup_locks.setdefault(devpod_name, threading.Lock())
+        with lookup_lock:
+            pod_name = self._cached(devpod_name, count=False)
+            if pod_name:
+                return pod_name
+            with self._lock:
+                self.stats['misses'] += 1
+            pod_name = self.lookup(devpod_name)
+            with self._lock:
+                self._cache[devpod_name] = (pod_name, time.monotonic() + self.ttl)
+            return pod_name
+
+    def _cached(self, devpod_name: str, count: bool = True) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(devpod_name)
+            if entry is None:
+                return None
+            pod_name, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._cache[devpod_name]
+                self.stats['expired'] += 1
+                return None
+            if count:
+                self.stats['hits'] += 1
+            return pod_name
+
+    def invalidate(self, devpod_name: Optional[str] = None):
+        """Forget one devpod's pod, or everything"""
+        with self._lock:
+            if devpod_name is None:
+                self.stats['invalidations'] += len(self._cache)
+                self._cache.clear()
+            elif self._cache.pop(devpod_name, None) is not None:
+                self.stats['invalidations'] += 1
+
+    def invalidate_pod(self, pod_name: str):
+        """Forget every devpod that resolved to this pod"""
+        with self._lock:
+            stale = [devpod for devpod, (cached_pod, _) in self._cache.items() if cached_pod == pod_name]
+            for devpod in stale:
+                del self._cache[devpod]
+            self.stats['invalidations'] += len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring cache effectiveness"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._cache)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['watching'] = self._watch is not None and self._watch.is_alive()
+        return stats
+
+    def _ensure_watch(self):
+        if not self.watch_enabled or self._watch_thread is not None:
+            return
+        with self._lock:
+            if self._watch_thread is None:
+                self._watch_thread = threading.Thread(target=self._watch_loop, name='pod-resolver-watch',
+                                                      daemon=True)
+                self._watch_thread.start()
+
+    def _watch_loop(self):
+        """Keep a pod watch running; restart it with backoff when it ends"""
+        backoff = 1
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            try:
+                self._watch_once()
+            except Exception as e:
+                logger.warning(f"Pod watch failed: {e}")
+            if self._stopped.is_set():
+                break
+            # Events may have been missed while the watch was down
+            self.invalidate()
+            self.stats['watch_restarts'] += 1
+            backoff = 1 if time.monotonic() - started > 60 else min(backoff * 2, 60)
+            self._stopped.wait(backoff)
+
+    def _watch_once(self):
+        self._watch = self.watch_source()
+        # Anything cached before the watch started may already be stale
+        self.invalidate()
+        for pod_name in self._watch:
+            self.stats['watch_events'] += 1
+            self.invalidate_pod(pod_name)
+
+    def close(self):
+        """Stop the background watch"""
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.close()
@@ -0,0 +1,179 @@
+"""
+Materialized per-repository task summaries
+
+/api/tasks/by-repo and /api/repository-stats used to run $group pipelines
+over the whole tasks collection on every request. Instead, one summary
+document per repository (status counts, commits, first/last activity and
+the 10 most recent tasks) is kept up to date as tasks are saved: MongoDB
+returns the task document as it was before each save, and summary_update()
+turns the before/after pair into an update of that repository's summary;
+removal_updates() does the same for tasks deleted by cleanup.
+The functions below build those updates and shape summaries into the
+responses the endpoints have always returned.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Tasks listed per repository
+RECENT_TASKS = 10
+
+# Task fields shown in a repository's recent task list
+RECENT_TASK_FIELDS = ('task_id', 'status', 'created_at', 'task_description', 'devpod_name',
+                      'progress', 'has_changes', 'is_committed')
+
+# Fields of the previous task document needed to compute a summary update
+SUMMARY_PROJECTION = {field: 1 for field in ('github_repo', 'is_committed', *RECENT_TASK_FIELDS)}
+
+# Statuses not counted as running (as in the original aggregation)
+NOT_RUNNING_STATUSES = ('completed', 'failed', 'interrupted')
+
+
+class SummaryUpdate(NamedTuple):
+    """Update of one repository summary after a task save"""
+    repo: Optional[str]                            # Summary _id (the task's github_repo)
+    update: Dict[str, Any]                         # update_one() document
+    array_filters: Optional[List[Dict[str, Any]]]  # Selects the task's entry in recent_tasks
+    upsert: bool                                   # First save of the task: create the summary if needed
+
+
+def status_key(status: Any) -> str:
+    """Key of a status in status_counts (field names cannot contain dots or start with $)"""
+    return str(status if status is not None else 'unknown').replace('.', '_').lstrip('$') or 'unknown'
+
+
+def recent_entry(task: Dict[str, Any]) -> Dict[str, Any]:
+    """A task's entry in its repository's recent task list"""
+    return {field: task[field] for field in RECENT_TASK_FIELDS if field in task}
+
+
+def summary_update(before: Optional[Dict[str, Any]], fields: Dict[str, Any]) -> Optional[SummaryUpdate]:
+    """
+    Summary changes for saving `fields` over the task document `before`
+
+    Args:
+        before: Task document before the save (SUMMARY_PROJECTION fields), None if it did not exist
+        fields: Fields written by the save
+
+    Returns:
+        SummaryUpdate, or None if the summary is unaffected
+    """
+    before = before or {}
+    after = {**before, **fields}
+    # A task is counted from its first save with a repository; an earlier
+    # Idempotency-Key claim inserts a document without one
+    if 'github_repo' not in after or 'status' not in after:
+        return None
+    is_new = 'github_repo' not in before
+
+    inc = {}
+    if is_new:
+        inc['total_tasks'] = 1
+        inc[f"status_counts.{status_key(after['status'])}"] = 1
+    elif status_key(after['status']) != status_key(before['status']):
+        inc[f"status_counts.{status_key(before['status'])}"] = -1
+        inc[f"status_counts.{status_key(after['status'])}"] = 1
+    committed = bool(after.get('is_committed')) - (0 if is_new else bool(before.get('is_committed')))
+    if committed:
+        inc['total_commits'] = committed
+
+    update = {}
+    if inc:
+        update['$inc'] = inc
+    if after.get('created_at'):
+        update['$min'] = {'first_activity': after['created_at']}
+    if fields.get('last_updated'):
+        update['$max'] = {'last_activity': fields['last_updated']}
+    if is_new:
+        update['$push'] = {'recent_tasks': {
+            '$each': [recent_entry(after)],
+            '$sort': {'created_at': -1},
+            '$slice': RECENT_TASKS
+        }}
+
+    array_filters = None
+    if not is_new:
+        # Keep the task's entry in the recent list (if it is still listed) current
+        recent_fields = {
+            f'recent_tasks.$[task].{field}': fields[field] for field in RECENT_TASK_FIELDS
+            if field in fields and field != 'task_id' and fields[field] != before.get(field)
+        }
+        if recent_fields:
+            update['$set'] = recent_fields
+            array_filters = [{'task.task_id': after.get('task_id')}]
+    if not update:
+        return None
+    return SummaryUpdate(after.get('github_repo'), update, array_filters, is_new)
+
+
+def removal_updates(tasks: List[Dict[str, Any]]) -> List[SummaryUpdate]:
+    """
+    Summary changes for deleting `tasks`
+
+    Only the counts and recent task list are corrected; first_activity is
+    recomputed by the caller from the remaining tasks.
+
+    Args:
+        tasks: Deleted task documents (SUMMARY_PROJECTION fields)
+
+    Returns:
+        One SummaryUpdate per affected repository
+    """
+    incs, removed = {}, {}
+    for task in tasks:
+        # Tasks without a repository or status were never counted
+        if 'github_repo' not in task or 'status' not in task:
+            continue
+        repo = task['github_repo']
+        inc = incs.setdefault(repo, {'total_tasks': 0})
+        inc['total_tasks'] -= 1
+        key = f"status_counts.{status_key(task['status'])}"
+        inc[key] = inc.get(key, 0) - 1
+        if task.get('is_committed'):
+            inc['total_commits'] = inc.get('total_commits', 0) - 1
+        removed.setdefault(repo, []).append(task.get('task_id'))
+    return [
+        SummaryUpdate(repo, {
+            '$inc': inc,
+            '$pull': {'recent_tasks': {'task_id': {'$in': removed[repo]}}}
+        }, None, False)
+        for repo, inc in incs.items()
+    ]
+
+
+def summary_counts(summary: Dict[str, Any]) -> Dict[str, int]:
+    """Total/completed/failed/running counts of a repository summary"""
+    status_counts = summary.get('status_counts', {})
+    total = summary.get('total_tasks', 0)
+    return {
+        'total': total,
+        'completed': status_counts.get('completed', 0),
+        'failed': status_counts.get('failed', 0),
+        'running': total - sum(status_counts.get(status, 0) for status in NOT_RUNNING_STATUSES)
+    }
+
+
+def grouped_tasks(summaries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Response of /api/tasks/by-repo: recent tasks and counts per repository, in the given order"""
+    return {
+        summary['_id']: {'tasks': summary.get('recent_tasks', []), 'stats': summary_counts(summary)}
+        for summary in summaries
+    }
+
+
+def repository_stats(summaries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Response of /api/repository-stats, in the given order"""
+    stats = []
+    for summary in summaries:
+        counts = summary_counts(summary)
+        stats.append({
+            '_id': summary['_id'],
+            'repository': summary['_id'],
+            'total_tasks': counts['total'],
+            'completed_tasks': counts['completed'],
+            'failed_tasks': counts['failed'],
+            'total_commits': summary.get('total_commits', 0),
+            'success_rate': counts['completed'] / counts['total'] * 100 if counts['total'] > 0 else 0,
+            'last_activity': summary.get('last_activity'),
+            'first_activity': summary.get('first_activity')
+        })
+    return stats
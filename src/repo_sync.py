@@ -0,0 +1,215 @@
+"""
+Repository sync stage for task checkouts
+
+Tasks used to check the workspace with `git status`, then either run a full
+`git clone` (and after a failure `rm -rf` and a second full clone) or a
+fetch, checkout, reset and clean as four separate execs. The sync stage is
+one shell script run with a single exec:
+
+- A bare mirror per repository under cache_dir (mount a volume there to
+  share it between devpods) is fetched first; new workspaces are cloned
+  with `--reference` to it, so only objects the mirror lacks cross the
+  network.
+- An existing workspace is refreshed with one fetch and a forced checkout
+  of the default branch (`checkout -f -B`, then `clean`), falling back to
+  a fresh clone if that fails.
+- Repositories too large for a full mirror can use a partial (`filter`) or
+  shallow (`depth`) clone instead of the cache.
+
+With a worktree path the shared workspace is only synced, under a lock,
+and the task gets its own detached `git worktree` of the default branch,
+so several tasks on one devpod can work on the same repository without
+resetting each other's files. Worktrees left behind for longer than
+worktree_ttl_hours are removed by the next sync, unless their task is
+still known (keep_worktrees) or they hold changes that are not committed
+and pushed.
+
+The script prints a marker line after each sub-step; parse_sync_output
+turns them into per-step timings and the checked-out branch.
+"""
+
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+# Prefix of the script's marker lines: "<MARKER> <step> <epoch ns>",
+# "<MARKER>-cloned" and "<MARKER>-branch <name>"
+MARKER = '::repo-sync'
+
+DEFAULT_CACHE_DIR = '$HOME/.cache/remote-developer/git'
+
+# Per-task worktrees live in WORKTREES_DIR/<repo name>/<task id>
+WORKTREES_DIR = '$HOME/.worktrees'
+
+GITHUB_REPO_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$')
+TASK_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+
+class SyncOptions(NamedTuple):
+    """How one repository is synced"""
+    cache: bool = True                # Clone with --reference to a shared mirror
+    cache_dir: str = DEFAULT_CACHE_DIR
+    filter: Optional[str] = None      # Partial clone filter (e.g. blob:none); disables the cache
+    depth: Optional[int] = None       # Shallow clone depth; disables the cache
+
+
+class SyncResult(NamedTuple):
+    """What the sync script reported"""
+    branch: Optional[str]
+    cloned: bool                      # Whether the workspace was (re)cloned rather than refreshed
+    timings: Dict[str, float]         # Sub-step -> seconds
+
+
+def sync_options(settings: Optional[Dict[str, Any]], github_repo: str) -> SyncOptions:
+    """Options for github_repo: repository_sync settings with its per-repository overrides"""
+    settings = dict(settings or {})
+    overrides = (settings.pop('repositories', None) or {}).get(github_repo) or {}
+    merged = {**settings, **overrides}
+    options = SyncOptions(
+        cache=bool(merged.get('cache', True)),
+        cache_dir=merged.get('cache_dir') or DEFAULT_CACHE_DIR,
+        filter=merged.get('filter') or None,
+        depth=int(merged['depth']) if merged.get('depth') else None
+    )
+    if options.filter or options.depth:
+        # A partial or shallow workspace cannot borrow objects from a mirror
+        options = options._replace(cache=False)
+    return options
+
+
+def worktree_path(repo_name: str, task_id: str) -> str:
+    """Where a task's worktree of repo_name is checked out"""
+    return f'{WORKTREES_DIR}/{repo_name}/{task_id}'
+
+
+def worktree_remove_command(workdir: str, worktree: str) -> str:
+    """Removes a task's worktree (and its administrative files in workdir)"""
+    return (f'git -C "{workdir}" worktree remove --force "{worktree}" 2>/dev/null || rm -rf "{worktree}";'
+            f' git -C "{workdir}" worktree prune')
+
+
+def sync_script(github_repo: str, workdir: str, options: SyncOptions = SyncOptions(),
+                worktree: Optional[str] = None, worktree_ttl_hours: float = 24,
+                keep_worktrees: Iterable[str] = ()) -> str:
+    """
+    Shell script that brings workdir to the tip of github_repo's default branch
+
+    Credentials come from git's credential helper; the token is never part
+    of the script or of the remote URL stored in the workspace. With a
+    worktree path, workdir is the shared clone and the task's worktree is
+    added there, detached at the default branch. Stale worktrees named in
+    keep_worktrees (task ids whose worktree is still in use) are kept.
+
+    Raises:
+        ValueError: If github_repo is not owner/name
+    """
+    if not GITHUB_REPO_PATTERN.match(github_repo):
+        raise ValueError(f"Invalid GitHub repository: {github_repo}")
+    keep = [task_id for task_id in keep_worktrees if TASK_ID_PATTERN.match(task_id)]
+
+    clone_args = ['--quiet', '--no-tags']
+    fetch_args = ['--quiet', '--prune', '--no-tags']
+    if options.filter:
+        clone_args.append(f'--filter={options.filter}')
+    if options.depth:
+        clone_args.append(f'--depth={options.depth}')
+        fetch_args.append(f'--depth={options.depth}')
+
+    lines = [
+        f'url="https://github.com/{github_repo}.git"',
+        f'work="{workdir}"',
+        f'mark() {{ echo "{MARKER} $1 $(date +%s%N)"; }}',
+        'default_branch() {',
+        '  b=$(git symbolic-ref --quiet --short refs/remotes/origin/HEAD 2>/dev/null); b=${b#origin/}',
+        '  [ -n "$b" ] || for c in main master; do git show-ref --verify --quiet "refs/remotes/origin/$c" && b=$c && break; done',
+        '  echo "${b:-main}"',
+        '}',
+        'mark start',
+    ]
+    if worktree:
+        # Concurrent tasks on this devpod sync the shared clone one at a time
+        lines += [
+            'mkdir -p "$(dirname "$work")"',
+            'if command -v flock >/dev/null; then exec 9>"$work.lock" && flock 9; fi',
+            'mark lock',
+        ]
+    if options.cache:
+        # gc.auto=0: pruning the mirror could drop objects the workspaces borrow
+        lines += [
+            f'cache="{options.cache_dir}/{github_repo}.git"',
+            'if [ -d "$cache" ]; then',
+            '  git -C "$cache" fetch --quiet --prune || echo "Mirror fetch failed, continuing without it" >&2',
+            'else',
+            '  mkdir -p "$(dirname "$cache")" && git clone --quiet --mirror "$url" "$cache"'
+            ' && git -C "$cache" config gc.auto 0 || { rm -rf "$cache"; echo "Mirror clone failed" >&2; }',
+            'fi',
+            'mark cache',
+        ]
+        clone_args.append('--reference-if-able "$cache"')
+    lines += [
+        'refresh() {',
+        f'  cd "$work" && git remote set-url origin "$url" && git fetch {" ".join(fetch_args)} origin && mark fetch'
+        ' && branch=$(default_branch) && git checkout --quiet -f -B "$branch" "origin/$branch"'
+        ' && git clean -fdq && mark checkout',
+        '}',
+        'clone() {',
+        f'  cd "$HOME" && rm -rf "$work" && git clone {" ".join(clone_args)} "$url" "$work" && mark clone'
+        ' && cd "$work" && branch=$(default_branch) && echo "' + MARKER + '-cloned"',
+        '}',
+    ]
+    if worktree:
+        # Re-cloning would orphan other tasks' worktrees: only a clone git cannot open is replaced
+        lines += [
+            'if [ -d "$work/.git" ] && git -C "$work" rev-parse --git-dir >/dev/null 2>&1; then',
+            '  refresh',
+            'else',
+            '  clone',
+            'fi || exit 1',
+            f'stale={int(worktree_ttl_hours * 60)}',
+            f'worktree="{worktree}"',
+            'mkdir -p "$(dirname "$worktree")"',
+            f'keep=" {" ".join(keep)} "',
+            'find "$(dirname "$worktree")" -mindepth 1 -maxdepth 1 -type d -mmin +$stale | while read -r old; do',
+            '  case "$keep" in *" $(basename "$old") "*) continue ;; esac',
+            '  # Uncommitted changes, or commits no remote branch has, are still needed',
+            '  [ -n "$(git -C "$old" status --porcelain 2>/dev/null)" ] && continue',
+            '  git -C "$old" rev-parse --verify --quiet HEAD >/dev/null'
+            ' && [ -z "$(git -C "$old" branch -r --contains HEAD 2>/dev/null)" ] && continue',
+            '  git -C "$work" worktree remove --force "$old" 2>/dev/null || rm -rf "$old"',
+            'done',
+            'git -C "$work" worktree prune',
+            'rm -rf "$worktree"',
+            'git -C "$work" worktree add --quiet --detach "$worktree" "origin/$branch" && touch "$worktree" || exit 1',
+            'mark worktree',
+        ]
+    else:
+        lines += [
+            'if [ -d "$work/.git" ]; then',
+            '  refresh || { echo "Workspace refresh failed, cloning again" >&2; clone; }',
+            'else',
+            '  clone',
+            'fi || exit 1',
+        ]
+    lines.append(f'echo "{MARKER}-branch $branch"')
+    return '\n'.join(lines)
+
+
+def parse_sync_output(output: str) -> SyncResult:
+    """Branch, clone flag and per-step timings from the sync script's output"""
+    branch = None
+    cloned = False
+    timings: Dict[str, float] = {}
+    previous = None
+    for line in output.splitlines():
+        if not line.startswith(MARKER):
+            continue
+        parts = line.split()
+        if parts[0] == f'{MARKER}-branch' and len(parts) > 1:
+            branch = parts[1]
+        elif parts[0] == f'{MARKER}-cloned':
+            cloned = True
+        elif parts[0] == MARKER and len(parts) == 3 and parts[2].isdigit():
+            stamp = int(parts[2])
+            if previous is not None:
+                timings[parts[1]] = round(timings.get(parts[1], 0) + (stamp - previous) / 1e9, 3)
+            previous = stamp
+    return SyncResult(branch, cloned, timings)
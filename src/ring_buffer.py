@@ -0,0 +1,88 @@
+"""
+Bounded ring buffer for per-task recent logs and file events
+
+Task records keep the most recent log lines and file operations in memory.
+Appending to a list and re-slicing it to the last N items copies the whole
+list on every line once it is full; RingBuffer overwrites the oldest slot in
+place instead, so an append allocates nothing once capacity is reached.
+TaskStore.snapshot() turns buffers into plain lists (oldest first), which is
+what JSON files, MongoDB and API responses receive.
+"""
+
+from typing import Any, Iterable, Iterator, List, Optional
+
+
+class RingBuffer:
+    """The last `capacity` items appended, oldest first"""
+
+    __slots__ = ('capacity', 'total', '_items', '_start')
+
+    def __init__(self, capacity: int, items: Optional[Iterable[Any]] = None):
+        """
+        Initialize ring buffer
+
+        Args:
+            capacity: Maximum number of items kept
+            items: Initial items (e.g. a list loaded from MongoDB); only the last `capacity` are kept
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.total = 0      # Items ever appended, including overwritten ones
+        self._items: List[Any] = []
+        self._start = 0     # Index of the oldest item once the buffer is full
+        if items is not None:
+            self.extend(items)
+
+    def append(self, item: Any):
+        if len(self._items) < self.capacity:
+            self._items.append(item)
+        else:
+            self._items[self._start] = item
+            self._start = (self._start + 1) % self.capacity
+        self.total += 1
+
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.append(item)
+
+    def to_list(self) -> List[Any]:
+        """Contents as a new list, oldest first"""
+        if not self._start:
+            return self._items[:]
+        return self._items[self._start:] + self._items[:self._start]
+
+    def tail(self, limit: int) -> List[Any]:
+        """The last `limit` items as a new list, oldest first"""
+        count = min(max(limit, 0), len(self._items))
+        return [self[index] for index in range(len(self._items) - count, len(self._items))]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError("ring buffer index out of range")
+        return self._items[(self._start + index) % len(self._items)]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, RingBuffer):
+            other = other.to_list()
+        return isinstance(other, list) and self.to_list() == other
+
+    def __repr__(self) -> str:
+        return f"RingBuffer({self.capacity}, {self.to_list()!r})"
+
+
+def bounded(value: Any, capacity: int) -> RingBuffer:
+    """`value` as a RingBuffer of `capacity` (lists loaded from storage are converted once)"""
+    if isinstance(value, RingBuffer) and value.capacity == capacity:
+        return value
+    return RingBuffer(capacity, value or [])
@@ -0,0 +1,130 @@
+"""
+Server-Sent Events formatting for task log streams
+
+Shared by the Flask endpoint and the asyncio stream server so both emit
+exactly the event format the web UI consumes. Streams that carry several
+tasks over one connection tag every event with its task_id and seq, and
+resume from a cursor event whose id maps each task to its last seq.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+FINAL_STATUSES = ('completed', 'failed')
+
+
+def format_event(data: Dict[str, Any], event_id: Optional[Union[int, str]] = None) -> str:
+    """Format a JSON payload as an SSE event"""
+    event = f"data: {json.dumps(data)}\n\n"
+    if event_id is not None:
+        event = f"id: {event_id}\n{event}"
+    return event
+
+
+def format_log_event(seq: Optional[int], message: str, task_id: Optional[str] = None) -> str:
+    """Format a log line as an SSE event, using its sequence number as the event id
+
+    Tagged with task_id (and without an id of its own) on multiplexed streams.
+    """
+    if task_id is not None:
+        return format_event({'task_id': task_id, 'seq': seq, 'log': message})
+    return format_event({'log': message}, seq)
+
+
+def format_cursor_event(cursors: Dict[str, int]) -> str:
+    """An id-only SSE event: updates the client's Last-Event-ID without dispatching a message"""
+    return f"id: {','.join(f'{task_id}:{seq}' for task_id, seq in cursors.items())}\n\n"
+
+
+HEARTBEAT_EVENT = format_event({'heartbeat': True})
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Parse a Last-Event-ID header / query value into a sequence number"""
+    try:
+        return max(int(value), 0) if value else 0
+    except ValueError:
+        return 0
+
+
+def parse_task_ids(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated ?tasks= value"""
+    return [task_id for task_id in (value or '').split(',') if task_id]
+
+
+def parse_cursors(value: Optional[str]) -> Dict[str, int]:
+    """Parse a multiplexed stream's Last-Event-ID (task_id:seq,...) into per-task sequence numbers"""
+    cursors = {}
+    for part in (value or '').split(','):
+        task_id, _, seq = part.rpartition(':')
+        if task_id:
+            cursors[task_id] = parse_last_event_id(seq)
+    return cursors
+
+
+class TaskLogStream:
+    """Turns replayed logs and broker deliveries into SSE events for one client"""
+
+    def __init__(self, after_seq: int = 0, task_id: Optional[str] = None):
+        """
+        Initialize task log stream
+
+        Args:
+            after_seq: Sequence number of the last line the client already has
+            task_id: Tag events with this task (multiplexed streams); no heartbeats are sent then
+        """
+        self.last_seq = after_seq
+        self.replayed_seq = after_seq
+        self.finished = False
+        self.task_id = task_id
+
+    def _tagged(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return data if self.task_id is None else {'task_id': self.task_id, **data}
+
+    def replay(self, logs: Iterable[Tuple[Optional[int], str]]) -> Iterator[str]:
+        """Events for stored logs sent before going live"""
+        for seq, message in logs:
+            if seq is not None:
+                self.last_seq = max(self.last_seq, seq)
+            yield format_log_event(seq, message, self.task_id)
+        self.replayed_seq = self.last_seq
+
+    def status(self, status: Optional[Dict[str, Any]]) -> Iterator[str]:
+        """Events for a status snapshot; a final status ends the stream"""
+        if not status:
+            return
+        yield format_event(self._tagged(status))
+        if status.get('status') in FINAL_STATUSES:
+            self.finished = True
+            yield format_event(self._tagged({'status': status['status'], 'complete': True, 'final': True}))
+
+    def gap(self, delivery) -> Tuple[int, Optional[int]]:
+        """Sequence range (after, before) to backfill when lines were dropped"""
+        first_seq = next((seq for seq, _ in delivery.logs if seq is not None), None)
+        return self.last_seq, first_seq
+
+    def deliver(self, delivery, backfill: Iterable[Tuple[Optional[int], str]] = ()) -> Iterator[str]:
+        """Events for one broker delivery, preceded by any backfilled gap"""
+        sent = False
+        for seq, message in backfill:
+            if seq is not None:
+                self.last_seq = max(self.last_seq, seq)
+            sent = True
+            yield format_log_event(seq, message, self.task_id)
+
+        for seq, message in delivery.logs:
+            if seq is not None:
+                # Skip lines already sent during replay
+                if seq <= self.replayed_seq:
+                    continue
+                self.last_seq = max(self.last_seq, seq)
+            sent = True
+            yield format_log_event(seq, message, self.task_id)
+
+        if delivery.status is not None:
+            sent = True
+            yield from self.status(delivery.status)
+
+        if not sent and self.task_id is None:
+            # Keep the connection alive
+            yield HEARTBEAT_EVENT
@@ -0,0 +1,338 @@
+"""
+Asyncio executor for streaming command output
+
+Each streamed devpod command used to tie up a thread pumping its pipe: a
+readline() per line, or a select() loop waking every 0.1s and re-slicing
+its whole buffer for every line. StreamExecutor reads the pipes of all
+running commands on one event loop thread:
+
+- output is split into lines incrementally, as chunks arrive, without
+  re-copying or re-scanning what was already read (see LineSplitter);
+  over-long lines are cut
+- complete lines are handed on in batches (as soon as batch_size lines
+  are complete, or whatever arrived within batch_interval), one callback
+  per batch instead of one per line
+- callbacks run on a small pool of dispatch threads, so slow log handling
+  never stalls the loop; streams are assigned to a dispatcher by key (the
+  task), so each task's batches are delivered in order and a slow handler
+  only delays the tasks sharing its dispatcher. A stream with too many
+  undelivered batches stops being read until its dispatcher catches up,
+  which pushes back on the command instead of buffering without bound
+
+Any process with a binary stdout pipe works: subprocess.Popen or the
+API backend's ApiProcess (see kube_backend).
+"""
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LinesCallback = Callable[[List[str]], None]
+
+
+DEFAULT_MAX_LINE_LENGTH = 65536
+TRUNCATION_MARKER = ' [line truncated]'
+
+
+def truncate_line(line: str, max_line_length: Optional[int] = DEFAULT_MAX_LINE_LENGTH,
+                  truncation_marker: str = TRUNCATION_MARKER) -> str:
+    """line, cut to max_line_length characters and marked if it was longer"""
+    if max_line_length and len(line) > max_line_length:
+        return line[:max_line_length] + truncation_marker
+    return line
+
+
+class LineSplitter:
+    """
+    Turns chunks of output into complete lines
+
+    Chunks are appended to one bytearray and consumed by offset: each byte
+    is scanned for newlines once, and all lines a chunk completes are
+    decoded with a single decode call, then split. Lines longer than
+    max_line_length characters are cut and end with truncation_marker;
+    while such a line is still arriving, at most 4 * max_line_length bytes
+    of it (enough for max_line_length UTF-8 characters) are kept. With
+    max_line_length None lines are never cut (output that is parsed, like
+    Claude's stream-json events, must arrive whole).
+    """
+
+    def __init__(self, encoding: str = 'utf-8', max_line_length: Optional[int] = DEFAULT_MAX_LINE_LENGTH,
+                 truncation_marker: str = TRUNCATION_MARKER):
+        self.encoding = encoding
+        self.max_line_length = max(1, int(max_line_length)) if max_line_length else None
+        self.truncation_marker = truncation_marker
+        self._buffer = bytearray()
+        self._start = 0            # Offset of the first unconsumed byte
+        self._scanned = 0          # Offset up to which _buffer holds no newline
+        self._truncating = False   # Dropping the rest of an over-long line
+        self.truncated = 0         # Lines cut so far
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Lines completed by chunk, without trailing whitespace"""
+        lines: List[str] = []
+        with memoryview(chunk) as data:
+            if self._truncating:
+                newline = chunk.find(b'\n')
+                if newline == -1:
+                    return lines
+                lines.append(self._take_truncated())
+                data = data[newline + 1:]
+            self._buffer += data
+
+        end = self._buffer.rfind(b'\n', self._scanned)
+        if end != -1:
+            lines.extend(self._decode(end))
+            self._start = end + 1
+            self._compact()
+        self._scanned = len(self._buffer)
+        if self.max_line_length and self._scanned - self._start > 4 * self.max_line_length:
+            # Keep the start of the line, drop the rest until its newline
+            del self._buffer[self._start + 4 * self.max_line_length:]
+            self._scanned = len(self._buffer)
+            self._truncating = True
+        return lines
+
+    def flush(self) -> List[str]:
+        """The unterminated last line, if any"""
+        if self._truncating:
+            return [self._take_truncated()]
+        if self._start == len(self._buffer):
+            return []
+        lines = self._decode(len(self._buffer))
+        self._buffer.clear()
+        self._start = self._scanned = 0
+        return [line for line in lines if line]
+
+    def _decode(self, end: int) -> List[str]:
+        """Lines in _buffer[_start:end], decoded in one call"""
+        with memoryview(self._buffer) as view, view[self._start:end] as region:
+            text = str(region, self.encoding, 'replace')
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
+            if self.max_line_length and len(line) > self.max_line_length:
+                lines[index] = truncate_line(line, self.max_line_length, self.truncation_marker)
+                self.truncated += 1
+            else:
+                lines[index] = line.rstrip()
+        return lines
+
+    def _take_truncated(self) -> str:
+        """The kept start of an over-long line, with the marker"""
+        with memoryview(self._buffer) as view, view[self._start:] as region:
+            line = str(region, self.encoding, 'replace')[:self.max_line_length]
+        self._buffer.clear()
+        self._start = self._scanned = 0
+        self._truncating = False
+        self.truncated += 1
+        return line + self.truncation_marker
+
+    def _compact(self):
+        """Drop consumed bytes: free when all are consumed, amortized otherwise"""
+        if self._start == len(self._buffer):
+            self._buffer.clear()
+            self._start = 0
+        elif self._start > 65536 and self._start * 2 > len(self._buffer):
+            del self._buffer[:self._start]
+            self._start = 0
+
+
+class _Stream:
+    """One process being read on the loop"""
+
+    def __init__(self, executor: 'StreamExecutor', process, on_lines: LinesCallback, future: Future,
+                 dispatch: queue.Queue, cap_lines: bool = True):
+        self.executor = executor
+        self.process = process
+        self.on_lines = on_lines
+        self.future = future
+        self.dispatch = dispatch    # Queue of the dispatcher delivering this stream's batches
+        self.splitter = LineSplitter(max_line_length=executor.max_line_length if cap_lines else None,
+                                     truncation_marker=executor.truncation_marker)
+        self.pending: List[str] = []
+        self.flush_handle = None
+        self.transport = None
+        self.in_flight = 0          # Batches queued for the dispatcher
+        self.paused = False
+
+
+class _StreamProtocol(asyncio.Protocol):
+    def __init__(self, stream: _Stream):
+        self.stream = stream
+
+    def connection_made(self, transport):
+        self.stream.transport = transport
+
+    def data_received(self, data: bytes):
+        self.stream.executor._on_data(self.stream, data)
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc):
+        self.stream.executor._on_eof(self.stream)
+
+
+class StreamExecutor:
+    """Reads the output of many processes on one event loop thread"""
+
+    def __init__(self, batch_size: int = 200, batch_interval: float = 0.05, max_batches_in_flight: int = 16,
+                 max_line_length: int = DEFAULT_MAX_LINE_LENGTH, truncation_marker: str = TRUNCATION_MARKER,
+                 dispatch_threads: int = 4):
+        """
+        Initialize stream executor
+
+        Args:
+            batch_size: Hand lines on as soon as this many are complete
+            batch_interval: Hand on fewer lines after this many seconds
+            max_batches_in_flight: Undelivered batches per stream before it is paused
+            max_line_length: Characters kept of a line before it is cut
+            truncation_marker: Appended to lines that were cut
+            dispatch_threads: Threads delivering batches; streams with the same key share one
+        """
+        self.batch_size = max(1, int(batch_size))
+        self.batch_interval = float(batch_interval)
+        self.max_batches_in_flight = max(1, int(max_batches_in_flight))
+        self.max_line_length = max_line_length
+        self.truncation_marker = truncation_marker
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatch = [queue.Queue() for _ in range(max(1, int(dispatch_threads)))]
+        self._next_dispatch = itertools.count()  # Spreads streams submitted without a key
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self.stats = {
+            'streams': 0,
+            'active': 0,
+            'lines': 0,
+            'batches': 0,
+            'bytes': 0,
+            'pauses': 0,
+            'truncated_lines': 0,
+        }
+
+    def start(self):
+        """Start the event loop and dispatch threads if they are not running yet"""
+        with self._lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._threads = [
+                threading.Thread(target=self.loop.run_forever, name='stream-executor-loop', daemon=True),
+                *(threading.Thread(target=self._run_dispatcher, args=(dispatch,),
+                                   name=f'stream-executor-dispatch-{index}', daemon=True)
+                  for index, dispatch in enumerate(self._dispatch)),
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def close(self, timeout: float = 5):
+        """Stop the loop and the dispatchers (running streams are abandoned)"""
+        with self._lock:
+            loop, self.loop = self.loop, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        for dispatch in self._dispatch:
+            dispatch.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def submit(self, process, on_lines: LinesCallback, cap_lines: bool = True, key: Any = None) -> Future:
+        """
+        Stream process.stdout to on_lines(batch of lines)
+
+        Returns a Future with the process's exit code, set once every line
+        has been delivered. cap_lines=False hands on over-long lines whole,
+        for consumers that parse them before logging. Streams with the same
+        key (e.g. a task_id) are delivered by the same dispatch thread, so
+        their batches never overtake each other.
+        """
+        self.start()
+        future = Future()
+        slot = hash(key) if key is not None else next(self._next_dispatch)
+        stream = _Stream(self, process, on_lines, future, self._dispatch[slot % len(self._dispatch)], cap_lines)
+        asyncio.run_coroutine_threadsafe(self._attach(stream), self.loop)
+        return future
+
+    def run(self, process, on_lines: LinesCallback, timeout: Optional[float] = None, cap_lines: bool = True,
+            key: Any = None) -> int:
+        """Stream process.stdout to on_lines and wait for its exit code"""
+        return self.submit(process, on_lines, cap_lines, key).result(timeout)
+
+    async def _attach(self, stream: _Stream):
+        self.stats['streams'] += 1
+        self.stats['active'] += 1
+        try:
+            await self.loop.connect_read_pipe(lambda: _StreamProtocol(stream), stream.process.stdout)
+        except Exception as e:
+            self.stats['active'] -= 1
+            stream.future.set_exception(e)
+
+    def _on_data(self, stream: _Stream, data: bytes):
+        self.stats['bytes'] += len(data)
+        stream.pending.extend(stream.splitter.feed(data))
+        if len(stream.pending) >= self.batch_size:
+            self._flush(stream)
+        elif stream.pending and stream.flush_handle is None:
+            stream.flush_handle = self.loop.call_later(self.batch_interval, self._flush, stream)
+
+    def _on_eof(self, stream: _Stream):
+        stream.pending.extend(stream.splitter.flush())
+        self.stats['truncated_lines'] += stream.splitter.truncated
+        self._flush(stream)
+        self.loop.create_task(self._finish(stream))
+
+    def _flush(self, stream: _Stream):
+        if stream.flush_handle is not None:
+            stream.flush_handle.cancel()
+            stream.flush_handle = None
+        if not stream.pending:
+            return
+        lines, stream.pending = stream.pending, []
+        stream.in_flight += 1
+        self.stats['lines'] += len(lines)
+        self.stats['batches'] += 1
+        stream.dispatch.put((stream, lines))
+        if stream.in_flight >= self.max_batches_in_flight and not stream.paused and stream.transport:
+            stream.paused = True
+            self.stats['pauses'] += 1
+            stream.transport.pause_reading()
+
+    def _delivered(self, stream: _Stream):
+        stream.in_flight -= 1
+        if stream.paused and stream.in_flight < self.max_batches_in_flight // 2 + 1:
+            stream.paused = False
+            if not stream.transport.is_closing():
+                stream.transport.resume_reading()
+
+    async def _finish(self, stream: _Stream):
+        """Wait for the process to exit after its output ended"""
+        delay = 0.001
+        while stream.process.poll() is None:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        self.stats['active'] -= 1
+        stream.dispatch.put((stream, None))
+
+    def _run_dispatcher(self, dispatch: queue.Queue):
+        """Deliver one dispatcher's batches in order; (stream, None) completes the stream's future"""
+        while True:
+            item = dispatch.get()
+            if item is None:
+                return
+            stream, lines = item
+            if lines is None:
+                stream.future.set_result(stream.process.returncode)
+                continue
+            try:
+                stream.on_lines(lines)
+            except Exception as e:
+                logger.error(f"Stream output handler failed: {e}")
+            loop = self.loop
+            if loop is not None:
+                loop.call_soon_threadsafe(self._delivered, stream)
@@ -0,0 +1,52 @@
+"""
+Time-sortable, collision-free task IDs
+
+IDs are ULIDs: a 48-bit millisecond timestamp followed by 80 random bits,
+Crockford base32 encoded. They sort by creation time, and the random part
+makes collisions across concurrent requests and across API server replicas
+practically impossible. Within one process, IDs created in the same
+millisecond increment the random part so they stay strictly increasing.
+"""
+
+import secrets
+import threading
+import time
+
+CROCKFORD_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ULID_LENGTH = 26
+_RANDOM_BITS = 80
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+
+def new_ulid() -> str:
+    """Generate a monotonic ULID string"""
+    global _last_ms, _last_random
+    with _lock:
+        ms = int(time.time() * 1000)
+        if ms <= _last_ms:
+            # Same millisecond (or the clock stepped back): stay monotonic
+            ms = _last_ms
+            random_part = _last_random + 1
+            if random_part >= 1 << _RANDOM_BITS:
+                ms += 1
+                random_part = secrets.randbits(_RANDOM_BITS)
+        else:
+            random_part = secrets.randbits(_RANDOM_BITS)
+        _last_ms, _last_random = ms, random_part
+    return _encode((ms << _RANDOM_BITS) | random_part, ULID_LENGTH)
+
+
+def new_task_id() -> str:
+    """Generate a task ID like task-01J9Z3K4N7QX8M2B5C6D7E8F9G"""
+    return f"task-{new_ulid()}"
@@ -0,0 +1,146 @@
+"""
+Coalescing, dirty-tracking persistence for task records
+
+save_task_status only marks a task dirty. A background flusher collects
+dirty tasks for a short window, takes one snapshot per task (the only step
+that touches the shared task lock), diffs it against the last persisted
+version and writes just the changed fields to MongoDB as a `$set` (and the
+fields dropped from the record as an `$unset`), plus the full record to the
+local JSON backup. Serialization and I/O never run while
+the task lock is held, and a burst of updates costs one write per task.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stands in for the values of a record whose write failed, so the retry
+# resends every field but still knows which fields to unset
+_UNWRITTEN = object()
+
+
+class TaskPersister:
+    """Writes dirty task records at most once per task per interval"""
+
+    def __init__(self, snapshot: Callable[[str], Optional[Dict[str, Any]]],
+                 writer: Callable[..., bool],
+                 file_writer: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 interval: float = 1.0):
+        """
+        Initialize task persister
+
+        Args:
+            snapshot: Returns a copy of the task record (taking whatever lock it needs), or None
+            writer: Persists changed fields and removes dropped ones,
+                e.g. save_task_to_db(task_id, fields, unset=[field, ...])
+            file_writer: Persists the full record to the local backup
+            interval: Seconds to coalesce updates before writing
+        """
+        self.snapshot = snapshot
+        self.writer = writer
+        self.file_writer = file_writer
+        self.interval = interval
+        self._dirty = set()
+        self._persisted = {}  # task_id -> last written record
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self._thread = None
+        self.stats = {'marked': 0, 'writes': 0, 'fields_written': 0, 'failed': 0}
+
+    def start(self):
+        """Start the background flusher"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='task-persister', daemon=True)
+            self._thread.start()
+
+    def mark_dirty(self, task_id: str):
+        """Schedule a task for writing; cheap and safe to call with the task lock held"""
+        with self._cond:
+            self.stats['marked'] += 1
+            if task_id not in self._dirty:
+                self._dirty.add(task_id)
+                self._cond.notify()
+
+    def flush(self, task_ids: Optional[Iterable[str]] = None):
+        """Write dirty tasks now (all of them if task_ids is None)"""
+        with self._cond:
+            if task_ids is None:
+                pending = list(self._dirty)
+            else:
+                pending = [task_id for task_id in task_ids if task_id in self._dirty]
+            self._dirty.difference_update(pending)
+        for task_id in pending:
+            self._persist(task_id)
+
+    def forget(self, task_id: str):
+        """Drop the cached copy of a finished task (its next write is a full one)"""
+        with self._io_lock:
+            self._persisted.pop(task_id, None)
+
+    def pending(self) -> int:
+        """Number of tasks waiting to be written"""
+        with self._cond:
+            return len(self._dirty)
+
+    def close(self):
+        """Write everything still dirty and stop the flusher"""
+        self._closed = True
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Let a burst of updates accumulate into one write per task
+            time.sleep(self.interval)
+            self.flush()
+
+    def _persist(self, task_id: str):
+        # One writer at a time so diffs are taken against what was actually written
+        with self._io_lock:
+            record = self.snapshot(task_id)
+            if record is None:
+                return
+            record = {key: value.isoformat() if isinstance(value, datetime) else value
+                      for key, value in record.items()}
+
+            previous = self._persisted.get(task_id)
+            if previous is None:
+                changed, removed = record, []
+            else:
+                changed = {key: value for key, value in record.items()
+                           if key not in previous or previous[key] != value}
+                removed = [key for key in previous if key not in record]
+            if not changed and not removed:
+                return
+
+            try:
+                if not self.writer(task_id, dict(changed), unset=removed):
+                    raise RuntimeError('writer reported failure')
+                if self.file_writer:
+                    self.file_writer(task_id, record)
+            except Exception as e:
+                logger.error(f"Failed to save task {task_id}: {e}")
+                self.stats['failed'] += 1
+                # Retry with a full write next time, still unsetting dropped fields
+                self._persisted[task_id] = dict.fromkeys(previous or record, _UNWRITTEN)
+                with self._cond:
+                    self._dirty.add(task_id)
+                    self._cond.notify()
+                return
+
+            self._persisted[task_id] = record
+            self.stats['writes'] += 1
+            self.stats['fields_written'] += len(changed)
@@ -0,0 +1,135 @@
+"""
+Paged task listing queries
+
+/api/tasks and /api/tasks/repo/<repo> page through task history newest
+first. Pages are keyed on (created_at, task_id) rather than skip/offset:
+the cursor handed to the client encodes the sort key of the last task it
+received, and the next page is the range strictly below it, which the
+(…, created_at, task_id) compound indexes serve without scanning the
+tasks already returned. task_id breaks ties between tasks created in the
+same instant. A fields= projection is passed down to find() so listings
+do not ship embedded logs unless asked to.
+"""
+
+import base64
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Sort order of task listings (and of the compound indexes that serve them)
+TASK_SORT = [('created_at', -1), ('task_id', -1)]
+
+# Listing page sizes
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Fields left out of listings unless requested with fields=
+# (logs are served by /api/task/<task_id>/logs)
+DEFAULT_EXCLUDED_FIELDS = ('logs',)
+
+# Fields every listed task carries: the cursor is built from them
+CURSOR_FIELDS = ('task_id', 'created_at')
+
+
+class InvalidQuery(ValueError):
+    """A listing parameter that cannot be turned into a query"""
+
+
+def encode_cursor(task: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just after `task` in listing order"""
+    key = json.dumps([task.get('created_at'), task.get('task_id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """(created_at, task_id) of a cursor from encode_cursor()"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidQuery(f"Invalid cursor: {cursor}") from e
+    if not isinstance(task_id, str) or not isinstance(created_at, (str, type(None))):
+        raise InvalidQuery(f"Invalid cursor: {cursor}")
+    return created_at, task_id
+
+
+def parse_page_size(value: Optional[str], default: int = DEFAULT_PAGE_SIZE) -> int:
+    """limit= parameter, clamped to 1..MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return default
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except ValueError:
+        raise InvalidQuery(f"Invalid limit: {value}")
+
+
+def parse_list(value: Optional[str]) -> List[str]:
+    """Comma-separated parameter as a list of non-empty values"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def build_projection(fields: Optional[Iterable[str]]) -> Dict[str, int]:
+    """
+    find() projection for a listing
+
+    Args:
+        fields: Top-level fields to return, or None for everything except DEFAULT_EXCLUDED_FIELDS
+
+    Returns:
+        Projection document (always keeping the cursor fields)
+    """
+    if not fields:
+        return {field: 0 for field in DEFAULT_EXCLUDED_FIELDS}
+    projection = {}
+    for field in fields:
+        # Plain top-level names only: no operators or paths into embedded documents
+        if not field or field.startswith('$') or '.' in field:
+            raise InvalidQuery(f"Invalid field: {field}")
+        projection[field] = 1
+    projection.update({field: 1 for field in CURSOR_FIELDS})
+    return projection
+
+
+def build_filter(github_repo: Optional[str] = None, statuses: Optional[List[str]] = None,
+                 created_after: Optional[str] = None, created_before: Optional[str] = None,
+                 cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    find() filter for a listing page
+
+    Args:
+        github_repo: Only tasks of this repository
+        statuses: Only tasks in one of these statuses
+        created_after: Only tasks created at or after this ISO timestamp
+        created_before: Only tasks created before this ISO timestamp
+        cursor: Cursor of the previous page (encode_cursor())
+
+    Returns:
+        Filter document
+    """
+    query: Dict[str, Any] = {}
+    if github_repo:
+        query['github_repo'] = github_repo
+    if statuses:
+        query['status'] = statuses[0] if len(statuses) == 1 else {'$in': list(statuses)}
+    created_range = {}
+    if created_after:
+        created_range['$gte'] = created_after
+    if created_before:
+        created_range['$lt'] = created_before
+    if created_range:
+        query['created_at'] = created_range
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        # Strictly after (created_at, task_id) in descending order
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, 'task_id': {'$lt': task_id}}
+        ]
+    return query
+
+
+def split_page(tasks: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Page of `limit` tasks from a find() limited to limit + 1, and the cursor of the next page"""
+    if len(tasks) <= limit:
+        return tasks, None
+    page = tasks[:limit]
+    return page, encode_cursor(page[-1])
@@ -0,0 +1,194 @@
+"""
+Bounded scheduler for remote tasks
+
+Submitted tasks wait in a FIFO queue and are started on their own thread
+only while fewer than max_workers tasks run, and while fewer than
+tasks_per_devpod run on the same devpod (1 unless tasks get their own git
+worktree; otherwise they share one workspace). The queue is persisted
+to disk so queued tasks survive a restart; secrets such as the GitHub token
+are kept in memory only, so restored tasks are held until a client supplies
+them again via resume().
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TaskScheduler:
+    """FIFO task queue with a global concurrency limit and a per-devpod limit"""
+
+    def __init__(self, run_task: Callable[..., None], max_workers: int = 4, state_file: Optional[Path] = None,
+                 on_start: Optional[Callable[[str, threading.Thread], None]] = None,
+                 on_queue_change: Optional[Callable[[], None]] = None, daemon_threads: bool = False,
+                 tasks_per_devpod: int = 1):
+        """
+        Initialize task scheduler
+
+        Args:
+            run_task: Called as run_task(task_id, **params, **secrets) on the task's thread
+            max_workers: Maximum number of tasks running at once
+            state_file: JSON file the pending queue is persisted to (without secrets)
+            on_start: Called with (task_id, thread) just before a task's thread starts
+            on_queue_change: Called (without scheduler locks held) when queue positions change
+            daemon_threads: Start task threads as daemon threads
+            tasks_per_devpod: Maximum number of tasks running at once on one devpod
+        """
+        self.run_task = run_task
+        self.max_workers = max(1, max_workers)
+        self.state_file = state_file
+        self.on_start = on_start
+        self.on_queue_change = on_queue_change
+        self.daemon_threads = daemon_threads
+        self.tasks_per_devpod = max(1, tasks_per_devpod)
+        self._pending: List[Dict[str, Any]] = []
+        self._running: Dict[str, str] = {}  # task_id -> devpod_name
+        self._lock = threading.Lock()
+
+    def submit(self, task_id: str, devpod_name: str, params: Dict[str, Any],
+               secrets: Optional[Dict[str, Any]] = None) -> Optional[int]:
+        """
+        Queue a task
+
+        Returns:
+            1-based queue position, or None if the task started immediately
+        """
+        job = {
+            'task_id': task_id,
+            'devpod_name': devpod_name,
+            'params': dict(params),
+            'secrets': dict(secrets or {}),
+            'queued_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            self._pending.append(job)
+        self._dispatch()
+        return self.queue_position(task_id)
+
+    def resume(self, task_id: str, secrets: Dict[str, Any]) -> bool:
+        """Supply secrets for a task restored from disk so it can run"""
+        with self._lock:
+            job = next((job for job in self._pending if job['task_id'] == task_id), None)
+            if job is None or job['secrets']:
+                return False
+            job['secrets'] = dict(secrets)
+        self._dispatch()
+        return True
+
+    def _dispatch(self):
+        """Start every queued task that fits, in FIFO order"""
+        started = []
+        with self._lock:
+            busy = Counter(self._running.values())
+            for job in list(self._pending):
+                if len(self._running) >= self.max_workers:
+                    break
+                # Held (restored without secrets) or its devpod is full: later tasks may still run
+                if not job['secrets'] or busy[job['devpod_name']] >= self.tasks_per_devpod:
+                    continue
+                self._pending.remove(job)
+                self._running[job['task_id']] = job['devpod_name']
+                busy[job['devpod_name']] += 1
+                started.append(job)
+            self._save()
+
+        for job in started:
+            thread = threading.Thread(target=self._run, args=(job,), daemon=self.daemon_threads,
+                                      name=f"task-{job['task_id']}")
+            # Before start(): a task that finishes at once must not unregister first
+            if self.on_start:
+                self.on_start(job['task_id'], thread)
+            thread.start()
+            logger.info(f"Started task {job['task_id']} on {job['devpod_name']} in thread {thread.name}")
+        self._queue_changed()
+
+    def _run(self, job: Dict[str, Any]):
+        try:
+            self.run_task(job['task_id'], **job['params'], **job['secrets'])
+        except Exception as e:
+            logger.error(f"Task {job['task_id']} raised: {e}")
+        finally:
+            with self._lock:
+                self._running.pop(job['task_id'], None)
+            self._dispatch()
+
+    def _queue_changed(self):
+        if self.on_queue_change:
+            try:
+                self.on_queue_change()
+            except Exception as e:
+                logger.error(f"Queue change callback failed: {e}")
+
+    def queue_position(self, task_id: str) -> Optional[int]:
+        """1-based position of a queued task, None if it is not queued"""
+        return self.positions().get(task_id)
+
+    def positions(self) -> Dict[str, int]:
+        """Queue position of every pending task"""
+        with self._lock:
+            return {job['task_id']: index + 1 for index, job in enumerate(self._pending)}
+
+    def held(self) -> List[str]:
+        """Tasks waiting for secrets before they can run"""
+        with self._lock:
+            return [job['task_id'] for job in self._pending if not job['secrets']]
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and worker counts for monitoring"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'running': len(self._running),
+                'queued': len(self._pending),
+                'held': sum(1 for job in self._pending if not job['secrets']),
+                'busy_devpods': sorted(set(self._running.values()))
+            }
+
+    def _save(self):
+        """Persist the pending queue without secrets (caller holds the lock)"""
+        if self.state_file is None:
+            return
+        state = [{key: value for key, value in job.items() if key != 'secrets'} for job in self._pending]
+        try:
+            tmp_file = self.state_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            logger.error(f"Failed to save task queue: {e}")
+
+    def restore(self) -> List[Dict[str, Any]]:
+        """
+        Load the queue persisted by a previous run
+
+        Restored tasks keep their order but are held until resume() supplies
+        their secrets. Returns the restored jobs (without secrets).
+        """
+        if self.state_file is None or not self.state_file.exists():
+            return []
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load task queue: {e}")
+            return []
+
+        restored = []
+        with self._lock:
+            queued = {job['task_id'] for job in self._pending}
+            for job in state:
+                if not isinstance(job, dict) or 'task_id' not in job or job['task_id'] in queued:
+                    continue
+                job = {**job, 'params': dict(job.get('params', {})), 'secrets': {}}
+                self._pending.append(job)
+                restored.append({key: value for key, value in job.items() if key != 'secrets'})
+        if restored:
+            logger.info(f"Restored {len(restored)} queued tasks, waiting for resubmitted credentials")
+        return restored
@@ -0,0 +1,165 @@
+"""
+In-memory task state with per-task locks
+
+Replaces the module-level tasks dict guarded by one global lock. Each task
+record has its own reentrant lock, so log ingestion for one task never waits
+on another task or on a reader. The registry lock only guards adding and
+removing tasks and is never held while a task lock is taken. Readers that
+scan many tasks iterate over a point-in-time list of records instead of
+locking the whole store.
+
+The store also keeps per-status counters and a created_at-ordered index up
+to date on every insert and status change, so dashboard summaries cost
+O(limit) instead of a scan and sort of every task. Status must therefore be
+changed through update_fields() (or by replacing the record), not by
+assigning to the record directly.
+"""
+
+import bisect
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from .ring_buffer import RingBuffer
+except ImportError:
+    from ring_buffer import RingBuffer
+
+
+class TaskStore:
+    """Dict-like task registry with one lock per task"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+        self._status_counts = Counter()
+        self._indexed = {}  # task_id -> (status, recency key) as counted/indexed
+        self._recency: List[Tuple[str, str]] = []  # sorted (created_at, task_id)
+
+    def lock(self, task_id: str) -> threading.RLock:
+        """
+        The lock guarding one task's record (created on first use)
+
+        For creating or writing a task. Paths that only look a task up by an
+        ID a client sent use locked(), which never creates a lock.
+        """
+        task_lock = self._locks.get(task_id)
+        if task_lock is None:
+            with self._lock:
+                task_lock = self._locks.setdefault(task_id, threading.RLock())
+        return task_lock
+
+    @contextmanager
+    def locked(self, task_id: str) -> Iterator[Optional[Dict[str, Any]]]:
+        """Hold an existing task's lock and yield its record; yields None (no lock) for unknown IDs"""
+        if task_id not in self._tasks:
+            yield None
+            return
+        with self.lock(task_id):
+            yield self._tasks.get(task_id)
+
+    def snapshot(self, task_id: str, exclude: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Consistent shallow copy of a task record, lists copied too and ring buffers as lists"""
+        with self.locked(task_id) as task:
+            if task is None:
+                return None
+            return {key: _copy_value(value) for key, value in task.items() if key not in exclude}
+
+    def tail(self, task_id: str, key: str, limit: int) -> List[Any]:
+        """The last `limit` items of a task's list or ring buffer field, without copying the rest"""
+        with self.locked(task_id) as task:
+            items = (task or {}).get(key) or []
+            if isinstance(items, RingBuffer):
+                return items.tail(limit)
+            return list(items[-limit:]) if limit > 0 else []
+
+    def update_fields(self, task_id: str, fields: Dict[str, Any]) -> bool:
+        """Update a task's fields, keeping status counters in step; False if unknown"""
+        with self.locked(task_id) as task:
+            if task is None:
+                return False
+            task.update(fields)
+            if 'status' in fields or 'created_at' in fields:
+                with self._lock:
+                    self._reindex(task_id, task)
+            return True
+
+    def status_counts(self) -> Dict[Any, int]:
+        """Number of tasks per status"""
+        with self._lock:
+            return dict(self._status_counts)
+
+    def recent(self, limit: int = 10) -> List[str]:
+        """IDs of the most recently created tasks, newest first"""
+        with self._lock:
+            return [task_id for _, task_id in reversed(self._recency[-limit:])] if limit > 0 else []
+
+    def _reindex(self, task_id: str, task: Optional[Dict[str, Any]]):
+        """Move a task between counters and in the recency index (caller holds _lock)"""
+        previous = self._indexed.pop(task_id, None)
+        if previous is not None:
+            status, key = previous
+            self._status_counts[status] -= 1
+            if not self._status_counts[status]:
+                del self._status_counts[status]
+            index = bisect.bisect_left(self._recency, key)
+            if index < len(self._recency) and self._recency[index] == key:
+                del self._recency[index]
+        if task is not None:
+            status = task.get('status')
+            key = (str(task.get('created_at') or ''), task_id)
+            self._status_counts[status] += 1
+            if not self._recency or key >= self._recency[-1]:
+                self._recency.append(key)  # Usual case: newest task
+            else:
+                bisect.insort(self._recency, key)
+            self._indexed[task_id] = (status, key)
+
+    def __getitem__(self, task_id: str) -> Dict[str, Any]:
+        return self._tasks[task_id]
+
+    def __setitem__(self, task_id: str, task: Dict[str, Any]):
+        with self._lock:
+            self._tasks[task_id] = task
+            self._reindex(task_id, task)
+
+    def __delitem__(self, task_id: str):
+        with self._lock:
+            del self._tasks[task_id]
+            self._locks.pop(task_id, None)
+            self._reindex(task_id, None)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        return self._tasks.get(task_id, default)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._tasks)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._tasks.values())
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Point-in-time list of (task_id, record); records are live, lock them to mutate"""
+        with self._lock:
+            return list(self._tasks.items())
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, RingBuffer):
+        return value.to_list()
+    if isinstance(value, list):
+        return list(value)
+    return value
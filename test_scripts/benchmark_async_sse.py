@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Load test for the asyncio SSE stream server
+
+Opens N concurrent streams to /api/task-logs/<task_id>/stream on an
+AsyncStreamServer fed by a fake log producer thread, then reports server
+memory and end-to-end delivery latency (p50/p99). Clients run in separate
+processes so they do not compete with the server for the GIL.
+
+    python test_scripts/benchmark_async_sse.py --streams 2000 --lines 20 --interval 0.25
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import aiohttp
+
+from src.async_stream_server import AsyncStreamServer
+from src.log_broker import LogBroker
+
+TASK_ID = 'task-load-test'
+
+
+def rss_mb():
+    """Resident set size of this process in MB"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def read_stream(session, url, latencies):
+    """Read one SSE stream until the final event, recording per-line latency"""
+    received = 0
+    async with session.get(url) as response:
+        async for raw in response.content:
+            line = raw.decode().strip()
+            if not line.startswith('data: '):
+                continue
+            data = json.loads(line[6:])
+            if 'log' in data:
+                # time.monotonic() is system-wide, so it compares across processes
+                latencies.append(time.monotonic() - float(data['log']))
+                received += 1
+            if data.get('final'):
+                break
+    return received
+
+
+async def run_clients(url, count):
+    latencies = []
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        received = await asyncio.gather(*[read_stream(session, url, latencies) for _ in range(count)])
+    return latencies, received
+
+
+def client_process(url, count, conn):
+    conn.send(asyncio.run(run_clients(url, count)))
+    conn.close()
+
+
+def producer(broker, lines, interval):
+    """Fake task: publish timestamped lines, then a final status"""
+    for seq in range(1, lines + 1):
+        broker.publish(TASK_ID, repr(time.monotonic()), seq)
+        time.sleep(interval)
+    broker.publish_status(TASK_ID, {'status': 'completed', 'claude_status': 'COMPLETED', 'progress': 100})
+
+
+def main(args):
+    broker = LogBroker()
+    status = {'status': 'executing_task', 'claude_status': 'RUNNING', 'progress': 60}
+    server = AsyncStreamServer(broker, replay_logs=lambda *a, **kw: [],
+                               get_status=lambda task_id: status, heartbeat_interval=30)
+    port = free_port()
+    server.start(host='127.0.0.1', port=port)
+    time.sleep(0.5)
+    baseline_rss = rss_mb()
+
+    url = f'http://127.0.0.1:{port}/api/task-logs/{TASK_ID}/stream'
+    ctx = multiprocessing.get_context('fork')
+    workers = []
+    start = time.monotonic()
+    for i in range(args.client_procs):
+        count = args.streams // args.client_procs + (1 if i < args.streams % args.client_procs else 0)
+        parent_conn, child_conn = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=client_process, args=(url, count, child_conn))
+        proc.start()
+        workers.append((proc, parent_conn))
+
+    while server.connections < args.streams:
+        time.sleep(0.05)
+    connect_time = time.monotonic() - start
+    connected_rss = rss_mb()
+
+    cpu_start = time.process_time()
+    threading.Thread(target=producer, args=(broker, args.lines, args.interval), daemon=True).start()
+
+    latencies, received = [], []
+    for proc, conn in workers:
+        worker_latencies, worker_received = conn.recv()
+        latencies.extend(worker_latencies)
+        received.extend(worker_received)
+        proc.join()
+    server_cpu = time.process_time() - cpu_start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    complete = sum(1 for count in received if count == args.lines)
+
+    print(f"Streams:             {args.streams} (connected in {connect_time:.2f}s, {args.client_procs} client processes)")
+    print(f"Lines per stream:    {args.lines} every {args.interval * 1000:.0f}ms")
+    print(f"Complete streams:    {complete}/{args.streams}")
+    print(f"Server RSS:          {baseline_rss:.1f}MB idle -> {connected_rss:.1f}MB with streams open "
+          f"({(connected_rss - baseline_rss) * 1024 / args.streams:.1f}KB per stream)")
+    print(f"Server CPU:          {server_cpu:.2f}s ({server_cpu * 1e6 / max(len(latencies), 1):.0f}us per delivered line)")
+    print(f"Delivery latency:    p50 {p50:.1f}ms  p99 {p99:.1f}ms  max {latencies[-1] * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=1000)
+    parser.add_argument('--lines', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.25)
+    parser.add_argument('--client-procs', type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark Claude output ingestion: stream-json events vs keyword matching of text
+
+Replays a recorded run script transcript in stream-json mode (default:
+tests/fixtures/claude_stream_streamlit.txt) --repeat times through
+ClaudeStreamParser and through the text-mode OutputClassifier, reports the
+time per line, and shows when each approach first marks Claude COMPLETED
+(keyword matching reacts to any "done" in Claude's prose).
+
+    python test_scripts/benchmark_claude_events.py --repeat 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.claude_events import ClaudeStreamParser
+from src.output_classifier import OutputClassifier
+
+
+def parse_structured(lines):
+    parser = ClaudeStreamParser()
+    for line in lines:
+        parser.feed(line)
+    return parser
+
+
+def parse_text(classifier, lines):
+    for line in lines:
+        classifier.classify(line)
+
+
+def first_completed(lines):
+    """Line numbers at which each mode first sets claude_status to COMPLETED"""
+    classifier = OutputClassifier()
+    keyword = next((number for number, line in enumerate(lines, 1)
+                    if any(event.kind == 'completed' for event in classifier.classify(line))), None)
+    parser = ClaudeStreamParser()
+    structured = None
+    for number, line in enumerate(lines, 1):
+        events = parser.feed(line) or []
+        if any(event.type == 'result' and not event.is_error for event in events):
+            structured = number
+            break
+    return keyword, structured
+
+
+def timed(fn, lines, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(lines)
+    return (time.perf_counter() - started) / (repeat * len(lines)) * 1e9
+
+
+def main(args):
+    with open(args.transcript, encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in f]
+    classifier = OutputClassifier()
+
+    structured = timed(parse_structured, lines, args.repeat)
+    text = timed(lambda batch: parse_text(classifier, batch), lines, args.repeat)
+    keyword, result = first_completed(lines)
+    summary = parse_structured(lines).summary()
+
+    print(f"{len(lines)} lines x {args.repeat}")
+    print(f"keyword classifier (text mode)   {text:8.0f} ns/line")
+    print(f"stream-json parser               {structured:8.0f} ns/line")
+    print(f"COMPLETED after line {keyword} with keywords, line {result} (result event) with stream-json")
+    print(f"Structured summary: {summary}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcript', default=os.path.join(ROOT, 'tests', 'fixtures', 'claude_stream_streamlit.txt'))
+    parser.add_argument('--repeat', type=int, default=5000)
+    main(parser.parse_args())
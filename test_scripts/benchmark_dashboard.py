@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Benchmark /api/dashboard response time with many tasks in memory
+
+Fills the in-memory task store with synthetic tasks, then times the
+dashboard summary computed the old way (four status passes plus a sort of
+every task by created_at) against the incrementally maintained counters and
+recency index the /api/dashboard route now uses.
+
+    python test_scripts/benchmark_dashboard.py --tasks 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.task_store import TaskStore
+
+STATUSES = ['completed'] * 6 + ['failed'] * 2 + ['interrupted', 'queued', 'executing_task']
+
+
+def safe_task(task_id, task):
+    return {'task_id': task_id, 'status': task.get('status'), 'progress': task.get('progress', 0),
+            'created_at': task.get('created_at', ''), 'logs': task.get('logs', [])[-5:]}
+
+
+def dashboard_scan(store):
+    """Previous implementation: full passes and a full sort per request"""
+    all_tasks = store.items()
+    summary = {
+        'total_tasks': len(all_tasks),
+        'completed_tasks': sum(1 for _, t in all_tasks if t.get('status') == 'completed'),
+        'failed_tasks': sum(1 for _, t in all_tasks if t.get('status') == 'failed'),
+        'queued_tasks': sum(1 for _, t in all_tasks if t.get('status') == 'queued'),
+        'running_tasks': sum(1 for _, t in all_tasks
+                             if t.get('status') not in ['completed', 'failed', 'interrupted', 'queued']),
+    }
+    recent = sorted(all_tasks, key=lambda x: x[1].get('created_at', ''), reverse=True)[:10]
+    summary['recent_tasks'] = [safe_task(task_id, store.snapshot(task_id)) for task_id, _ in recent]
+    return summary
+
+
+def dashboard_incremental(store):
+    """Current implementation: maintained counters and recency index"""
+    counts = store.status_counts()
+    total = sum(counts.values())
+    summary = {
+        'total_tasks': total,
+        'completed_tasks': counts.get('completed', 0),
+        'failed_tasks': counts.get('failed', 0),
+        'queued_tasks': counts.get('queued', 0),
+        'running_tasks': total - counts.get('completed', 0) - counts.get('failed', 0)
+                         - counts.get('queued', 0) - counts.get('interrupted', 0),
+    }
+    summary['recent_tasks'] = [safe_task(task_id, store.snapshot(task_id)) for task_id in store.recent(10)]
+    return summary
+
+
+def build_store(count):
+    store = TaskStore()
+    now = datetime.now()
+    # Shuffled so the recency index is not just built by appends
+    offsets = list(range(count))
+    random.shuffle(offsets)
+    for i, offset in enumerate(offsets):
+        store[f'task-{i}'] = {
+            'status': random.choice(STATUSES), 'progress': 100, 'logs': ['line'] * 20,
+            'created_at': (now - timedelta(seconds=offset)).isoformat()
+        }
+    return store
+
+
+def timed(fn, store, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(store)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main(args):
+    for count in args.tasks:
+        started = time.perf_counter()
+        store = build_store(count)
+        build_time = time.perf_counter() - started
+        scan_ms, before = timed(dashboard_scan, store, args.repeat)
+        incremental_ms, after = timed(dashboard_incremental, store, args.repeat)
+        assert before == after, 'summaries differ'
+
+        # Cost moved to the write path: one status transition
+        started = time.perf_counter()
+        for i in range(1000):
+            store.update_fields(f'task-{i}', {'status': 'completed'})
+        transition_us = (time.perf_counter() - started) * 1e6 / 1000
+
+        print(f"{count} tasks (store built in {build_time:.2f}s):")
+        print(f"  full scan + sort     {scan_ms:8.2f}ms per request")
+        print(f"  incremental          {incremental_ms:8.3f}ms per request")
+        print(f"  status transition    {transition_us:8.1f}us (index maintenance)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
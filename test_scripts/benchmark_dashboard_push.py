@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Benchmark MongoDB load from open dashboards: 3-second polling vs the pushed dashboard stream
+
+Runs the Flask app in-process with --tasks tasks in memory while a driver
+thread moves tasks through their phases. --clients dashboards in the
+repository view either poll /api/dashboard, /api/tasks/by-repo and
+/api/repository-stats every --poll-interval seconds (the previous UI), or
+load them once and then follow /api/dashboard/stream. Every call into the
+MongoDB wrapper after a --warmup period is counted, whether or not a
+server is reachable.
+
+    python test_scripts/benchmark_dashboard_push.py --clients 50 --seconds 15
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import src.api_server as api
+
+PHASES = [('creating_devpod', 10), ('cloning_repository', 20), ('setting_up_claude', 30),
+          ('preparing_workspace', 40), ('executing_task', 60), ('reviewing_changes', 75),
+          ('checking_server', 85), ('completed', 100)]
+
+DB_READS = ('get_task', 'get_all_tasks', 'get_tasks_by_repo', 'get_tasks_grouped_by_repo',
+            'get_logs', 'get_logs_after', 'get_last_log_seq', 'get_recent_logs', 'get_repository_stats')
+
+db_calls = Counter()
+db_calls_lock = threading.Lock()
+
+
+def count_db_reads():
+    """Wrap the MongoDB read methods so every call is counted"""
+    for name in DB_READS:
+        method = getattr(api.db, name)
+
+        def counted(*args, _name=name, _method=method, **kwargs):
+            with db_calls_lock:
+                db_calls[_name] += 1
+            return _method(*args, **kwargs)
+        setattr(api.db, name, counted)
+
+
+def seed_tasks(count):
+    now = datetime.now()
+    for i in range(count):
+        task_id = f'bench-{i}'
+        with api.tasks_status.lock(task_id):
+            api.tasks_status[task_id] = {
+                'status': 'completed', 'progress': 100, 'logs': [], 'devpod_name': f'pod-{i % 10}',
+                'github_repo': f'owner/repo-{i % 5}', 'task_description': 'Synthetic task',
+                'created_at': (now - timedelta(seconds=count - i)).isoformat()
+            }
+
+
+def drive(stop, interval):
+    """Move tasks through the execute_remote_task phases"""
+    transitions = 0
+    task = 0
+    while not stop.is_set():
+        task_id = f'bench-{task % 20}'
+        for status, progress in PHASES:
+            if stop.wait(interval):
+                break
+            api.update_task(task_id, status=status, progress=progress)
+            transitions += 1
+        task += 1
+    return transitions
+
+
+def load_full(client):
+    client.get('/api/dashboard')
+    client.get('/api/tasks/by-repo')
+    client.get('/api/repository-stats')
+
+
+def polling_client(stop, args, requests):
+    client = api.app.test_client()
+    while not stop.is_set():
+        load_full(client)
+        requests[0] += 3
+        stop.wait(args.poll_interval)
+
+
+def streaming_client(stop, args, requests, events):
+    client = api.app.test_client()
+    version = client.get('/api/dashboard').get_json()['version']
+    client.get('/api/tasks/by-repo')
+    client.get('/api/repository-stats')
+    requests[0] += 4
+    response = client.get(f'/api/dashboard/stream?version={version}', buffered=False)
+    try:
+        for chunk in response.response:
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if 'heartbeat' not in text:
+                events[0] += 1
+            if stop.is_set():
+                break
+    finally:
+        response.close()
+
+
+def run(args, push):
+    stop = threading.Event()
+    requests, events = [0], [0]
+    target = streaming_client if push else polling_client
+    extra = (events,) if push else ()
+    clients = [threading.Thread(target=target, args=(stop, args, requests) + extra, daemon=True)
+               for _ in range(args.clients)]
+    result = {}
+    driver = threading.Thread(target=lambda: result.update(transitions=drive(stop, args.transition_interval)))
+    driver.start()
+    for client in clients:
+        client.start()
+    # Count steady state only, after every dashboard has done its first load
+    time.sleep(args.warmup)
+    with db_calls_lock:
+        db_calls.clear()
+    requests[0] = events[0] = 0
+    started = time.perf_counter()
+    time.sleep(args.seconds)
+    stop.set()
+    driver.join()
+    # Wake streaming clients blocked waiting for changes so they notice the stop
+    api.update_task('bench-0', status='executing_task', progress=60)
+    for client in clients:
+        client.join(timeout=2)
+    elapsed = time.perf_counter() - started
+    with db_calls_lock:
+        calls = dict(db_calls)
+    return elapsed, calls, requests[0], events[0], result.get('transitions', 0)
+
+
+def report(name, elapsed, calls, requests, events, transitions):
+    total = sum(calls.values())
+    print(f"{name}:")
+    print(f"  mongo reads       {total} ({total / elapsed:.1f} ops/s)  {json.dumps(calls)}")
+    print(f"  http requests     {requests} ({requests / elapsed:.1f}/s)")
+    print(f"  pushed events     {events} ({transitions} status changes in total)")
+
+
+def main(args):
+    count_db_reads()
+    seed_tasks(args.tasks)
+    print(f"{args.clients} open dashboards, {args.tasks} tasks, {args.seconds}s "
+          f"(MongoDB connected: {api.db._connected})\n")
+    report(f'Polling every {args.poll_interval}s', *run(args, push=False))
+    report('Dashboard stream', *run(args, push=True))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--poll-interval', type=float, default=3.0)
+    parser.add_argument('--transition-interval', type=float, default=0.5)
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark task setup time: submission to 'executing_task', prebaked image vs installing
+
+Submits --runs tasks to each devpod in --devpods on a running API server
+and polls /api/task-status until the task reaches executing_task. Create
+one devpod from the default image and one from the image built from
+docker/devpod/Dockerfile (devpod.default_image in config.yaml) to compare;
+the task's toolchain field shows which path each run took. Tasks on the
+same devpod run one at a time, so runs are submitted sequentially. An empty
+name ('') submits without a devpod name, so tasks take warm pool devpods
+(devpod.warm_pool in config.yaml).
+
+    GITHUB_TOKEN=... python test_scripts/benchmark_devpod_startup.py \\
+        --devpods bench-default bench-prebaked '' --repo owner/repo --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+
+def wait_for(server, task_id, timeout):
+    """Task status once it is executing Claude (or has failed)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = requests.get(f"{server}/api/task-status/{task_id}").json()
+        if task.get('status') in ('executing_task', 'failed', 'completed'):
+            return task
+        time.sleep(0.5)
+    raise TimeoutError(f"Task {task_id} did not reach executing_task within {timeout}s")
+
+
+def run(server, devpod, args, token):
+    submitted = time.monotonic()
+    response = requests.post(f"{server}/api/create-task", json={
+        'devpod_name': devpod,
+        'github_repo': args.repo,
+        'github_token': token,
+        'task_description': args.task
+    })
+    response.raise_for_status()
+    task_id = response.json()['task_id']
+    task = wait_for(server, task_id, args.timeout)
+    elapsed = time.monotonic() - submitted
+    if task.get('status') == 'failed':
+        raise RuntimeError(f"Task {task_id} failed: {task.get('error')}")
+    # Let Claude finish before the next run on this devpod
+    while task.get('status') not in ('completed', 'failed'):
+        time.sleep(2)
+        task = requests.get(f"{server}/api/task-status/{task_id}").json()
+    return elapsed, task.get('setup_seconds'), task.get('toolchain')
+
+
+def main(args):
+    token = os.environ.get('GITHUB_TOKEN')
+    if not token:
+        sys.exit("Set GITHUB_TOKEN")
+    for devpod in args.devpods:
+        timings, toolchains = [], set()
+        for _ in range(args.runs):
+            elapsed, setup_seconds, toolchain = run(args.server, devpod, args, token)
+            timings.append(setup_seconds if setup_seconds is not None else elapsed)
+            toolchains.add(toolchain)
+        print(f"{devpod or '(warm pool)':<24} toolchain={'/'.join(sorted(map(str, toolchains))):<10} "
+              f"submission -> executing_task: median {statistics.median(timings):6.1f}s "
+              f"(min {min(timings):.1f}s, max {max(timings):.1f}s)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', default='http://localhost:15001')
+    parser.add_argument('--devpods', nargs='+', required=True)
+    parser.add_argument('--repo', required=True, help='owner/repo the tasks run against')
+    parser.add_argument('--task', default='Print the repository layout; do not change any files')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=1800)
+    main(parser.parse_args())
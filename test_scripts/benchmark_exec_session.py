@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark the devpod setup phase: one kubectl exec per command vs a persistent session
+
+Replays the command sequence execute_remote_task runs between creating_devpod
+and executing_task (git config, repo update, tool checks, Claude settings,
+branch checks, script upload) against a stand-in kubectl that runs commands
+locally after sleeping --exec-latency seconds, the per-exec cost of API auth
+and stream setup. Package installs are replaced by `true`.
+
+    python test_scripts/benchmark_exec_session.py --exec-latency 0.3 --runs 3
+"""
+import argparse
+import os
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.exec_session import ExecSessionPool
+
+FAKE_KUBECTL = """#!/bin/bash
+sleep "$FAKE_KUBECTL_LATENCY"
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do shift; done
+shift
+exec "$@"
+"""
+
+REPO = 'demo-repo'
+
+SETUP_COMMANDS = [
+    'git config --global user.name "Auto Worker"',
+    'git config --global user.email "auto-worker@example.com"',
+    'git config --global credential.helper store',
+    'echo "https://token@github.com" > ~/.git-credentials',
+    f'cd ~/{REPO} && git status',
+    f'cd ~/{REPO} && git fetch origin || true',
+    f'cd ~/{REPO} && git checkout main || git checkout master || git checkout -b main',
+    f'cd ~/{REPO} && git reset --hard || true',
+    f'cd ~/{REPO} && git clean -fd',
+    'which node || echo "not found"',
+    'true  # npm install -g @anthropic-ai/claude-code',
+    '''mkdir -p ~/.claude && cat > ~/.claude/settings.json << 'EOF'
+{"permissions": {"allow": ["Bash(*)"], "deny": []}}
+EOF''',
+    'which claude || echo "not found"',
+    f'cd ~/{REPO} && (git checkout main || git checkout master)',
+    f'cd ~/{REPO} && git branch --show-current',
+    f'cd ~/{REPO} && echo "IyEvYmluL2Jhc2gKZWNobyBoaQo=" | base64 -d > run_claude.sh && chmod +x run_claude.sh',
+]
+
+
+def one_shot(kubectl, command):
+    """The original exec_in_devpod path"""
+    escaped_cmd = command.replace("'", "'\"'\"'")
+    kubectl_cmd = f"timeout 120 {kubectl} exec -n devpod bench-pod -- bash -c '{escaped_cmd}'"
+    return subprocess.run(kubectl_cmd, shell=True, capture_output=True, text=True)
+
+
+def run_setup(execute):
+    start = time.monotonic()
+    results = [execute(command) for command in SETUP_COMMANDS]
+    return time.monotonic() - start, results
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix='exec-bench-')
+    kubectl = os.path.join(workdir, 'kubectl')
+    with open(kubectl, 'w') as f:
+        f.write(FAKE_KUBECTL)
+    os.chmod(kubectl, os.stat(kubectl).st_mode | stat.S_IEXEC)
+
+    # Keep git config and the demo repo out of the real home directory
+    os.environ['HOME'] = workdir
+    os.environ['FAKE_KUBECTL_LATENCY'] = str(args.exec_latency)
+    subprocess.run(f'git init -q -b main {REPO} && cd {REPO} && git commit -q --allow-empty -m init',
+                   shell=True, cwd=workdir, check=True,
+                   env={**os.environ, 'GIT_AUTHOR_NAME': 'b', 'GIT_AUTHOR_EMAIL': 'b@b',
+                        'GIT_COMMITTER_NAME': 'b', 'GIT_COMMITTER_EMAIL': 'b@b'})
+
+    before, after = [], []
+    for _ in range(args.runs):
+        elapsed, baseline_results = run_setup(lambda command: one_shot(kubectl, command))
+        before.append(elapsed)
+
+        # A fresh pool per run so the session start is included in the timing
+        pool = ExecSessionPool(kubectl=kubectl)
+        elapsed, session_results = run_setup(lambda command: pool.run('bench-pod', command))
+        after.append(elapsed)
+        pool.close_all()
+
+        for command, old, new in zip(SETUP_COMMANDS, baseline_results, session_results):
+            # Output can differ with repo state between runs, exit codes must not
+            if old.returncode != new.returncode:
+                print(f"Exit code mismatch for {command!r}: {old.returncode} != {new.returncode}")
+
+    print(f"Setup commands:       {len(SETUP_COMMANDS)} (simulated exec latency {args.exec_latency * 1000:.0f}ms)")
+    print(f"kubectl exec per cmd: {min(before):.2f}s best of {args.runs}")
+    print(f"Persistent session:   {min(after):.2f}s best of {args.runs}")
+    print(f"Speedup:              {min(before) / min(after):.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exec-latency', type=float, default=0.3)
+    parser.add_argument('--runs', type=int, default=3)
+    main(parser.parse_args())
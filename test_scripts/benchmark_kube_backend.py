@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Benchmark per-exec overhead: kubectl processes vs the Kubernetes API backend
+
+Starts a fake API server on localhost (pod list, and websocket exec that runs
+the command locally and answers on the v4.channel.k8s.io channels) with a
+kubeconfig pointing at it, then times --runs of:
+
+- KubernetesApiBackend: a one-off exec (new websocket each), a command over a
+  persistent ExecSession on an API websocket, and a pod list over the
+  pooled keep-alive client
+- KubectlBackend with a stand-in kubectl (a bash script that runs the
+  command locally): the process-spawn floor of the kubectl path, before
+  kubectl parses the kubeconfig and opens its own TLS connection
+- the real kubectl against the fake server, if kubectl is on PATH (exec
+  needs a kubectl that speaks websockets, 1.30+)
+
+    python test_scripts/benchmark_kube_backend.py --runs 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import stat
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from aiohttp import WSMsgType, web
+
+from src.exec_session import ExecSessionPool
+from src.kube_backend import KubectlBackend, KubernetesApiBackend
+
+POD = 'devpod-bench-pod'
+
+FAKE_KUBECTL = """#!/bin/bash
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do shift; done
+shift
+exec "$@"
+"""
+
+
+async def list_pods(request):
+    return web.json_response({
+        'kind': 'PodList', 'apiVersion': 'v1', 'metadata': {'resourceVersion': '1'},
+        'items': [{'metadata': {'name': POD, 'namespace': request.match_info['namespace'],
+                                'labels': {'devpod.sh/workspace': 'bench'}}}],
+    })
+
+
+async def exec_pod(request):
+    """Run ?command=... locally and speak the remotecommand channel protocol"""
+    ws = web.WebSocketResponse(protocols=('v4.channel.k8s.io',))
+    await ws.prepare(request)
+    argv = request.query.getall('command')
+    stdin = request.query.get('stdin') == 'true'
+    process = await asyncio.create_subprocess_exec(
+        *argv, stdin=asyncio.subprocess.PIPE if stdin else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+    async def pump(stream, channel):
+        while True:
+            data = await stream.read(65536)
+            if not data:
+                return
+            await ws.send_bytes(bytes([channel]) + data)
+
+    async def feed():
+        async for message in ws:
+            if message.type == WSMsgType.BINARY and message.data[:1] == b'\x00':
+                process.stdin.write(message.data[1:])
+                await process.stdin.drain()
+        if process.returncode is None:
+            process.kill()
+
+    feeder = asyncio.ensure_future(feed()) if stdin else None
+    await asyncio.gather(pump(process.stdout, 1), pump(process.stderr, 2))
+    code = await process.wait()
+    status = {'status': 'Success'} if code == 0 else {
+        'status': 'Failure', 'reason': 'NonZeroExitCode',
+        'details': {'causes': [{'reason': 'ExitCode', 'message': str(code)}]}}
+    if not ws.closed:
+        await ws.send_bytes(b'\x03' + json.dumps(status).encode())
+        await ws.close()
+    if feeder:
+        feeder.cancel()
+    return ws
+
+
+def start_fake_api_server():
+    """Serve the fake API on a free port in a background loop; returns the URL"""
+    app = web.Application()
+    app.router.add_get('/api/v1/namespaces/{namespace}/pods', list_pods)
+    app.router.add_route('*', '/api/v1/namespaces/{namespace}/pods/{name}/exec', exec_pod)
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(app, access_log=None)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f'http://127.0.0.1:{port}'
+
+
+def write_kubeconfig(path, server):
+    with open(path, 'w') as f:
+        json.dump({
+            'apiVersion': 'v1', 'kind': 'Config', 'current-context': 'bench',
+            'clusters': [{'name': 'bench', 'cluster': {'server': server}}],
+            'users': [{'name': 'bench', 'user': {'token': 'bench'}}],
+            'contexts': [{'name': 'bench', 'context': {'cluster': 'bench', 'user': 'bench'}}],
+        }, f)
+
+
+def measure(runs, fn):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<52} median {statistics.median(timings) * 1000:7.2f} ms "
+          f"(p90 {sorted(timings)[int(len(timings) * 0.9)] * 1000:.2f} ms)")
+
+
+def check(result):
+    assert result.returncode == 0 and result.stdout.strip() == 'ok', result
+
+
+def main(args):
+    server = start_fake_api_server()
+    with tempfile.TemporaryDirectory() as scratch:
+        kubeconfig = os.path.join(scratch, 'kubeconfig')
+        write_kubeconfig(kubeconfig, server)
+        os.environ['KUBECONFIG'] = kubeconfig
+        fake_kubectl = os.path.join(scratch, 'kubectl')
+        with open(fake_kubectl, 'w') as f:
+            f.write(FAKE_KUBECTL)
+        os.chmod(fake_kubectl, os.stat(fake_kubectl).st_mode | stat.S_IEXEC)
+
+        api = KubernetesApiBackend('devpod', pool_size=4)
+        report('api: one-off exec (websocket per command)',
+               measure(args.runs, lambda: check(api.run(POD, 'echo ok'))))
+        sessions = ExecSessionPool(backend=api)
+        check(sessions.run(POD, 'echo ok'))
+        report('api: persistent session exec',
+               measure(args.runs, lambda: check(sessions.run(POD, 'echo ok'))))
+        sessions.close_all()
+        report('api: pod list (keep-alive pool)', measure(args.runs, lambda: api.find_pods()))
+
+        stand_in = KubectlBackend('devpod', kubectl=fake_kubectl)
+        report('kubectl stand-in: one-off exec (spawn floor)',
+               measure(args.runs, lambda: check(stand_in.run(POD, 'echo ok'))))
+
+        kubectl = shutil.which('kubectl')
+        if kubectl:
+            real = KubectlBackend('devpod', kubectl=kubectl)
+            report('kubectl: pod list', measure(args.runs, lambda: real.find_pods()))
+            try:
+                report('kubectl: one-off exec', measure(args.runs, lambda: check(real.run(POD, 'echo ok'))))
+            except AssertionError as e:
+                print(f"kubectl exec against the fake server failed (needs websocket exec): {e}")
+        else:
+            print("kubectl not on PATH: real kubectl timings skipped")
+        api.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=100)
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Microbenchmark line splitting of multi-megabyte output bursts
+
+Feeds --megabytes of output in --chunk-size chunks to three splitters:
+
+- split-per-line: `buffer += chunk` then split(b'\\n', 1) and a decode per
+  line (the old exec_in_devpod_stream_realtime); recopies the rest of the
+  buffer for every line
+- rfind-per-chunk: one split per chunk, but rescans the whole pending
+  buffer for a newline on every chunk and decodes per line
+- LineSplitter: offsets into one bytearray, each byte scanned once, one
+  decode per chunk, over-long lines cut
+
+Scenarios: a diff-like burst of ordinary lines, the same burst arriving
+as one chunk, and a single multi-megabyte line (a minified file or base64
+blob) without a newline until the end.
+
+    python test_scripts/benchmark_line_splitter.py --megabytes 8 --chunk-size 262144
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.stream_executor import LineSplitter
+
+
+class SplitPerLine:
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, chunk):
+        lines = []
+        self.buffer += chunk
+        while b'\n' in self.buffer:
+            line, self.buffer = self.buffer.split(b'\n', 1)
+            lines.append(line.decode('utf-8', errors='replace').rstrip())
+        return lines
+
+    def flush(self):
+        return [self.buffer.decode('utf-8', errors='replace').rstrip()] if self.buffer else []
+
+
+class RfindPerChunk:
+    def __init__(self):
+        self.pending = bytearray()
+
+    def feed(self, chunk):
+        self.pending += chunk
+        end = self.pending.rfind(b'\n')
+        if end == -1:
+            return []
+        lines = [line.decode('utf-8', errors='replace').rstrip() for line in self.pending[:end].split(b'\n')]
+        del self.pending[:end + 1]
+        return lines
+
+    def flush(self):
+        line = self.pending.decode('utf-8', errors='replace').rstrip()
+        self.pending.clear()
+        return [line] if line else []
+
+
+def diff_burst(size):
+    line = b'+    assert splitter.feed(chunk) == expected  # \xe2\x9c\x85 some typical diff content\n'
+    return line * (size // len(line))
+
+
+def long_line(size):
+    return b'A' * size + b'\nafter\n'
+
+
+def run(splitter, data, chunk_size):
+    started = time.perf_counter()
+    count = 0
+    for offset in range(0, len(data), chunk_size):
+        count += len(splitter.feed(data[offset:offset + chunk_size]))
+    count += len(splitter.flush())
+    return time.perf_counter() - started, count
+
+
+def main(args):
+    size = args.megabytes * 1024 * 1024
+    scenarios = [
+        (f'{args.megabytes} MB of diff lines, {args.chunk_size // 1024} KB chunks', diff_burst(size), args.chunk_size),
+        (f'{args.megabytes} MB of diff lines, one chunk', diff_burst(size), size),
+        (f'one {args.megabytes} MB line, {args.chunk_size // 1024} KB chunks', long_line(size), args.chunk_size),
+    ]
+    splitters = [('split-per-line', SplitPerLine), ('rfind-per-chunk', RfindPerChunk),
+                 ('LineSplitter', LineSplitter)]
+    for title, data, chunk_size in scenarios:
+        print(title)
+        for name, factory in splitters:
+            if name == 'split-per-line' and chunk_size == size and args.megabytes > 2:
+                print(f"  {name:<16} skipped (quadratic: minutes for a one-chunk burst this size)")
+                continue
+            elapsed, count = run(factory(), data, chunk_size)
+            print(f"  {name:<16} {elapsed * 1000:9.1f} ms  {len(data) / elapsed / 1e6:8.1f} MB/s  {count} lines")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=int, default=8)
+    parser.add_argument('--chunk-size', type=int, default=256 * 1024, help='Bytes per read (asyncio reads up to 256 KB)')
+    main(parser.parse_args())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark log ingestion: one insert_one per line vs. the write-behind pipeline
+
+Runs against an in-memory stand-in collection that simulates a MongoDB round
+trip, or against a real mongod when --mongo-url is given.
+
+    python test_scripts/benchmark_log_ingestion.py --lines 5000 --rtt-ms 1
+    python test_scripts/benchmark_log_ingestion.py --mongo-url mongodb://localhost:27017/
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.log_pipeline import LogPipeline
+
+
+class FakeCollection:
+    """In-memory stand-in for a MongoDB collection with a fixed round-trip time"""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.docs = []
+
+    def insert_one(self, doc):
+        time.sleep(self.rtt)
+        self.docs.append(doc)
+
+    def insert_many(self, docs, ordered=True):
+        time.sleep(self.rtt)
+        self.docs.extend(docs)
+        return True
+
+
+def get_collection(args):
+    if not args.mongo_url:
+        return FakeCollection(args.rtt_ms / 1000.0)
+    from pymongo import MongoClient
+    collection = MongoClient(args.mongo_url)['remote_developer_bench']['task_logs']
+    collection.drop()
+    return collection
+
+
+def bench_insert_one(collection, lines):
+    """Baseline: synchronous insert per line, like add_log_to_db"""
+    start = time.perf_counter()
+    for i in range(lines):
+        collection.insert_one({'task_id': 'bench', 'message': f'line {i}', 'timestamp': datetime.now()})
+    return time.perf_counter() - start
+
+
+def bench_pipeline(collection, lines, batch_size, flush_interval):
+    """Write-behind pipeline: submit per line, flush once at the end"""
+    pipeline = LogPipeline(
+        writer=lambda batch: collection.insert_many(batch, ordered=False),
+        batch_size=batch_size,
+        flush_interval=flush_interval
+    )
+    pipeline.start()
+    start = time.perf_counter()
+    for i in range(lines):
+        pipeline.submit('bench', f'line {i}')
+    submitted = time.perf_counter() - start
+    pipeline.flush(timeout=300)
+    total = time.perf_counter() - start
+    pipeline.close()
+    return submitted, total, pipeline.stats['batches']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=5000)
+    parser.add_argument('--rtt-ms', type=float, default=1.0, help='Simulated round trip of the stand-in collection')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--flush-interval', type=float, default=0.5)
+    parser.add_argument('--mongo-url', default=None)
+    args = parser.parse_args()
+
+    target = args.mongo_url or f'in-memory stand-in (rtt {args.rtt_ms}ms)'
+    print(f"Ingesting {args.lines} lines into {target}")
+
+    before = bench_insert_one(get_collection(args), args.lines)
+    print(f"  before (insert_one per line): {args.lines / before:12.0f} lines/s  ({before:.2f}s)")
+
+    submitted, total, batches = bench_pipeline(get_collection(args), args.lines, args.batch_size, args.flush_interval)
+    print(f"  after  (write-behind, ingest): {args.lines / submitted:12.0f} lines/s  ({submitted:.2f}s)")
+    print(f"  after  (write-behind, durable): {args.lines / total:11.0f} lines/s  ({total:.2f}s, {batches} batches)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark per-line allocations of in-memory task logs: list re-slicing vs RingBuffer
+
+Appends --lines pre-built log lines to one task's recent log the way
+add_log used to (append, then copy the last N with [-N:] once full) and
+with RingBuffer, and reports with tracemalloc the bytes allocated per line
+(the peak above what was already allocated before the append), what the
+buffer retains at the end, and the time per line.
+
+    python test_scripts/benchmark_memory_logs.py --capacity 100 1000 --lines 20000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.ring_buffer import bounded
+
+
+def append_sliced(task, message, capacity):
+    """Previous add_log: append, then re-slice once over capacity"""
+    if 'logs' not in task:
+        task['logs'] = []
+    task['logs'].append(message)
+    if len(task['logs']) > capacity:
+        task['logs'] = task['logs'][-capacity:]
+
+
+def append_ring(task, message, capacity):
+    logs = bounded(task.get('logs'), capacity)
+    task['logs'] = logs
+    logs.append(message)
+
+
+def measure(append, messages, capacity):
+    """(bytes allocated per line, bytes retained by the buffer)"""
+    task = {}
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    for message in messages:
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        append(task, message, capacity)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return allocated / len(messages), retained
+
+
+def timed(append, messages, capacity):
+    task = {}
+    started = time.perf_counter()
+    for message in messages:
+        append(task, message, capacity)
+    return (time.perf_counter() - started) / len(messages) * 1e9
+
+
+def main(args):
+    messages = [f"[{i:06}] Claude output line " + 'x' * 60 for i in range(args.lines)]
+    print(f"{'capacity':>8}  {'method':<8} {'alloc/line':>12} {'retained':>10} {'ns/line':>9}")
+    for capacity in args.capacity:
+        for name, append in (('slice', append_sliced), ('ring', append_ring)):
+            per_line, retained = measure(append, messages, capacity)
+            nanos = timed(append, messages, capacity)
+            print(f"{capacity:>8}  {name:<8} {per_line:>10.0f} B {retained:>8} B {nanos:>9.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--capacity', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--lines', type=int, default=20000)
+    main(parser.parse_args())
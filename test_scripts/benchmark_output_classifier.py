@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark classifying Claude output lines: keyword scans vs the compiled classifier
+
+Replays a recorded task transcript (default: task_task-1749198527_logs.txt)
+--repeat times through the scans add_log and parse_claude_output used to do
+(several lower() calls and one `keyword in line` pass per keyword) and through
+OutputClassifier.classify(), checks that both pick the same kind for every
+line, and reports the time per line.
+
+    python test_scripts/benchmark_output_classifier.py --transcript task_task-1749198527_logs.txt --repeat 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.output_classifier import OutputClassifier
+
+
+def legacy_classify(line):
+    """add_log's completion check followed by parse_claude_output's if/elif chain"""
+    finished = any(keyword in line.lower() for keyword in ['completed!', 'finished!', 'all tasks finished'])
+    if "CLAUDE_STATUS:" in line:
+        kind = 'claude_status'
+    elif "█" in line or "▓" in line:
+        kind = 'progress_bar'
+    elif any(keyword in line.lower() for keyword in ['creating', 'writing', 'updating', 'modifying']):
+        kind = 'file_operation'
+    elif any(keyword in line.lower() for keyword in ['thinking', 'planning', 'analyzing']):
+        kind = 'thinking'
+    elif any(keyword in line.lower() for keyword in ['completed', 'finished', 'done', '완료']):
+        kind = 'completed'
+    else:
+        kind = None
+    return kind, finished
+
+
+def compiled_classify(classifier, line):
+    events = classifier.classify(line)
+    kind = next((event.kind for event in events if event.kind != 'task_finished'), None)
+    return kind, any(event.kind == 'task_finished' for event in events)
+
+
+def timed(fn, lines, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            fn(line)
+    return (time.perf_counter() - started) / (repeat * len(lines)) * 1e9
+
+
+def main(args):
+    with open(args.transcript, encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in f]
+    classifier = OutputClassifier()
+
+    for line in lines:
+        assert legacy_classify(line) == compiled_classify(classifier, line), line
+    matched = sum(1 for line in lines if classifier.classify(line))
+
+    legacy = timed(legacy_classify, lines, args.repeat)
+    compiled = timed(classifier.classify, lines, args.repeat)
+    print(f"{len(lines)} lines ({matched} produce events) x {args.repeat}")
+    print(f"keyword scans        {legacy:8.0f} ns/line")
+    print(f"compiled classifier  {compiled:8.0f} ns/line ({legacy / compiled:.1f}x)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transcript', default=os.path.join(ROOT, 'task_task-1749198527_logs.txt'))
+    parser.add_argument('--repeat', type=int, default=20000)
+    main(parser.parse_args())
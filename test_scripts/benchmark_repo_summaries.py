@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Benchmark /api/tasks/by-repo and /api/repository-stats: $group pipelines vs materialized summaries
+
+Fills a scratch database on a real mongod with --tasks synthetic task
+documents spread over --repos repositories, then times the previous
+full-collection aggregation pipelines against reads of the repo_summaries
+collection, the one-off rebuild (backfill), and what keeping the summaries
+current adds to each task save.
+
+    python test_scripts/benchmark_repo_summaries.py --tasks 1000000 --mongo-url mongodb://localhost:27017/
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.database import MongoDB
+
+STATUSES = ['completed'] * 6 + ['failed'] * 2 + ['interrupted', 'executing_task']
+
+# The pipelines the endpoints ran on every request before summaries were materialized
+LEGACY_GROUPED = [
+    {'$sort': {'created_at': -1}},
+    {'$group': {
+        '_id': '$github_repo',
+        'tasks': {'$push': {'task_id': '$task_id', 'status': '$status', 'created_at': '$created_at',
+                            'task_description': '$task_description', 'devpod_name': '$devpod_name',
+                            'progress': '$progress', 'has_changes': '$has_changes',
+                            'is_committed': '$is_committed'}},
+        'total_tasks': {'$sum': 1},
+        'completed_tasks': {'$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}},
+        'failed_tasks': {'$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}},
+        'running_tasks': {'$sum': {'$cond': [
+            {'$not': {'$in': ['$status', ['completed', 'failed', 'interrupted']]}}, 1, 0]}}
+    }},
+    {'$project': {'repo': '$_id', 'tasks': {'$slice': ['$tasks', 10]},
+                  'stats': {'total': '$total_tasks', 'completed': '$completed_tasks',
+                            'failed': '$failed_tasks', 'running': '$running_tasks'}}},
+    {'$sort': {'stats.total': -1}}
+]
+
+LEGACY_STATS = [
+    {'$group': {
+        '_id': '$github_repo',
+        'total_tasks': {'$sum': 1},
+        'completed_tasks': {'$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}},
+        'failed_tasks': {'$sum': {'$cond': [{'$eq': ['$status', 'failed']}, 1, 0]}},
+        'total_commits': {'$sum': {'$cond': [{'$eq': ['$is_committed', True]}, 1, 0]}},
+        'last_activity': {'$max': '$last_updated'},
+        'first_activity': {'$min': '$created_at'}
+    }},
+    {'$sort': {'last_activity': -1}}
+]
+
+
+def seed(db, args):
+    db.tasks_collection.drop()
+    db.repo_summaries_collection.drop()
+    db._create_indexes()
+    start = datetime.now() - timedelta(days=365)
+    batch = []
+    for i in range(args.tasks):
+        created = start + timedelta(seconds=i * 30)
+        status = random.choice(STATUSES)
+        batch.append({
+            'task_id': f'task-{i:08}', 'github_repo': f'owner/repo-{random.randrange(args.repos)}',
+            'status': status, 'progress': 100 if status == 'completed' else 60,
+            'created_at': created.isoformat(), 'last_updated': created + timedelta(minutes=20),
+            'task_description': 'Synthetic task ' * 8, 'devpod_name': f'pod-{i % 50}',
+            'has_changes': status == 'completed', 'is_committed': status == 'completed' and i % 3 == 0,
+            'logs': ['output line ' + 'x' * 60] * 20
+        })
+        if len(batch) == 10000:
+            db.tasks_collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.tasks_collection.insert_many(batch, ordered=False)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench_saves(db, args):
+    """Per-save cost: plain update_one vs save_task with summary maintenance"""
+    task_ids = [f'task-{random.randrange(args.tasks):08}' for _ in range(args.saves)]
+    started = time.perf_counter()
+    for task_id in task_ids:
+        db.tasks_collection.update_one({'task_id': task_id},
+                                       {'$set': {'progress': 75, 'last_updated': datetime.now()}})
+    plain = (time.perf_counter() - started) * 1000 / args.saves
+    started = time.perf_counter()
+    for task_id in task_ids:
+        db.save_task(task_id, {'status': random.choice(STATUSES), 'progress': 85})
+    with_summary = (time.perf_counter() - started) * 1000 / args.saves
+    return plain, with_summary
+
+
+def main(args):
+    os.environ['MONGODB_URL'] = args.mongo_url
+    os.environ['MONGODB_DATABASE'] = args.database
+    db = MongoDB()
+    db.connect()
+    if not db._connected:
+        sys.exit(f"Cannot reach MongoDB at {args.mongo_url}")
+
+    started = time.perf_counter()
+    seed(db, args)
+    print(f"Inserted {args.tasks} tasks over {args.repos} repositories in {time.perf_counter() - started:.0f}s\n")
+
+    started = time.perf_counter()
+    db.rebuild_repo_summaries()
+    print(f"Rebuild (backfill)          {time.perf_counter() - started:8.1f}s once")
+
+    legacy_grouped = timed(lambda: list(db.tasks_collection.aggregate(LEGACY_GROUPED, allowDiskUse=True)), args.repeat)
+    legacy_stats = timed(lambda: list(db.tasks_collection.aggregate(LEGACY_STATS, allowDiskUse=True)), args.repeat)
+    grouped = timed(db.get_tasks_grouped_by_repo, args.repeat)
+    stats = timed(db.get_repository_stats, args.repeat)
+    print(f"/api/tasks/by-repo          {legacy_grouped:8.1f}ms -> {grouped:.1f}ms")
+    print(f"/api/repository-stats       {legacy_stats:8.1f}ms -> {stats:.1f}ms")
+
+    plain, with_summary = bench_saves(db, args)
+    print(f"Task save                   {plain:8.2f}ms -> {with_summary:.2f}ms (summary maintenance)")
+
+    if not args.keep:
+        db.client.drop_database(args.database)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--repos', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--saves', type=int, default=2000)
+    parser.add_argument('--mongo-url', default='mongodb://localhost:27017/')
+    parser.add_argument('--database', default='remote_developer_bench')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch database')
+    main(parser.parse_args())
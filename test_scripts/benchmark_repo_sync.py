@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark repository checkout: old clone / four-step update vs the repo_sync script
+
+Serves --source (a local repository, default: this one) as
+https://github.com/owner/project through git's url.insteadOf, then times,
+--runs times each, in a scratch $HOME:
+
+- a full `git clone` (the old path for a new workspace) against the sync
+  script's clone with a warm mirror (--reference)
+- the old refresh (fetch, checkout, reset, clean as separate commands)
+  against the sync script's single fetch + forced checkout
+
+Runs locally, so the numbers show the work saved rather than network time;
+against GitHub the mirror also saves the download of every object.
+
+    python test_scripts/benchmark_repo_sync.py --source ~/src/some-large-repo --runs 5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.repo_sync import SyncOptions, parse_sync_output, sync_script
+
+URL = 'https://github.com/owner/project.git'
+
+
+def sh(command, env):
+    subprocess.run(['bash', '-c', command], env=env, check=True, capture_output=True, text=True)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def old_refresh(env):
+    # One command per exec, as execute_remote_task used to run them
+    for cmd in ['cd ~/project && git fetch origin',
+                'cd ~/project && git checkout main || git checkout master || git checkout -b main',
+                'cd ~/project && git reset --hard origin/$(git symbolic-ref --short HEAD) || true',
+                'cd ~/project && git clean -fd']:
+        sh(cmd, env)
+
+
+def new_sync(env, options):
+    result = subprocess.run(['bash', '-c', sync_script('owner/project', '$HOME/project', options)],
+                            env=env, check=True, capture_output=True, text=True)
+    return parse_sync_output(result.stdout)
+
+
+def report(label, timings):
+    print(f"{label:<48} median {statistics.median(timings) * 1000:8.1f} ms (min {min(timings) * 1000:.1f} ms)")
+
+
+def main(args):
+    source = os.path.abspath(args.source)
+    with tempfile.TemporaryDirectory() as scratch:
+        remote = os.path.join(scratch, 'remote', 'owner')
+        os.makedirs(remote)
+        subprocess.run(['git', 'clone', '--quiet', '--bare', source, os.path.join(remote, 'project.git')], check=True)
+        home = os.path.join(scratch, 'home')
+        os.makedirs(home)
+        git_config = os.path.join(scratch, 'gitconfig')
+        with open(git_config, 'w') as f:
+            f.write(f'[url "file://{scratch}/remote/"]\n\tinsteadOf = https://github.com/\n'
+                    '[protocol "file"]\n\tallow = always\n')
+        env = {**os.environ, 'HOME': home, 'GIT_CONFIG_GLOBAL': git_config, 'GIT_CONFIG_NOSYSTEM': '1'}
+        options = SyncOptions()
+        workspace = os.path.join(home, 'project')
+
+        full_clone, mirror_clone = [], []
+        new_sync(env, options)  # Warm the mirror
+        for _ in range(args.runs):
+            shutil.rmtree(workspace, ignore_errors=True)
+            full_clone.append(timed(lambda: sh(f'cd ~ && git clone --quiet {URL} project', env)))
+            shutil.rmtree(workspace, ignore_errors=True)
+            mirror_clone.append(timed(lambda: new_sync(env, options)))
+
+        four_step, single = [], []
+        for _ in range(args.runs):
+            four_step.append(timed(lambda: old_refresh(env)))
+            single.append(timed(lambda: new_sync(env, options)))
+        steps = new_sync(env, options).timings
+
+    report('new workspace: full clone', full_clone)
+    report('new workspace: sync script (warm mirror)', mirror_clone)
+    report('existing workspace: fetch/checkout/reset/clean', four_step)
+    report('existing workspace: sync script', single)
+    print(f"Sync script sub-steps (last run): {steps}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=ROOT, help='Local repository to serve as owner/project')
+    parser.add_argument('--runs', type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmark streaming command output: a thread per process vs the StreamExecutor
+
+Starts --processes fake streaming commands at once (each writes --bursts
+bursts of --lines-per-burst lines, --interval seconds apart, like Claude
+printing a diff and then thinking) and reads them with:
+
+- readline: one thread per process, a readline() and a handler call per
+  line (the old exec_in_devpod_stream_simple)
+- select: one thread per process, select() with a 0.1s timeout, 4 KB reads
+  and split(b'\\n', 1) per line (the old exec_in_devpod_stream_realtime)
+- executor: every process on the StreamExecutor loop, handler called per
+  batch of lines
+
+The handler takes a lock and records the lines, standing in for the log
+hand-off. Reports wall time, this process's CPU time (the commands' own CPU
+is not included), line throughput, handler calls and peak reader threads.
+
+    python test_scripts/benchmark_stream_executor.py --processes 100 --bursts 20
+"""
+import argparse
+import os
+import resource
+import select
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.stream_executor import StreamExecutor
+
+FAKE_COMMAND = """
+import sys, time
+bursts, lines, interval = int(sys.argv[1]), int(sys.argv[2]), float(sys.argv[3])
+for burst in range(bursts):
+    sys.stdout.write(''.join(f'burst {burst} line {i}: ' + 'x' * 60 + '\\n' for i in range(lines)))
+    sys.stdout.flush()
+    time.sleep(interval)
+"""
+
+
+class Sink:
+    """Counts delivered lines and handler calls"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lines = 0
+        self.calls = 0
+
+    def line(self, text):
+        with self.lock:
+            self.lines += 1
+            self.calls += 1
+
+    def batch(self, lines):
+        with self.lock:
+            self.lines += len(lines)
+            self.calls += 1
+
+
+def spawn(args):
+    return subprocess.Popen([sys.executable, '-c', FAKE_COMMAND, str(args.bursts), str(args.lines_per_burst),
+                             str(args.interval)], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+
+
+def read_readline(process, sink):
+    stdout = open(process.stdout.fileno(), 'r', encoding='utf-8', errors='replace', closefd=False)
+    for line in iter(stdout.readline, ''):
+        sink.line(line.rstrip())
+    process.wait()
+
+
+def read_select(process, sink):
+    fd = process.stdout.fileno()
+    output_buffer = b""
+    while True:
+        poll_status = process.poll()
+        ready, _, _ = select.select([process.stdout], [], [], 0.1)
+        if ready:
+            chunk = os.read(fd, 4096)
+            output_buffer += chunk
+            while b'\n' in output_buffer:
+                line, output_buffer = output_buffer.split(b'\n', 1)
+                sink.line(line.decode('utf-8', errors='replace').rstrip())
+            if not chunk and poll_status is not None:
+                break
+        elif poll_status is not None:
+            break
+    process.wait()
+
+
+def run_threads(processes, reader, sink):
+    threads = []
+    for process in processes:
+        thread = threading.Thread(target=reader, args=(process, sink))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+
+def run_executor(processes, sink):
+    executor = StreamExecutor()
+    futures = [executor.submit(process, sink.batch) for process in processes]
+    for future in futures:
+        future.result()
+    executor.close()
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(label, run, args):
+    # Start every command before reading, so all of them stream at once
+    processes = [spawn(args) for _ in range(args.processes)]
+    sink, done, peak = Sink(), threading.Event(), [0]
+
+    def sample_threads():
+        while not done.wait(0.01):
+            # Not counting the main and sampler threads
+            peak[0] = max(peak[0], threading.active_count() - 2)
+
+    sampler = threading.Thread(target=sample_threads)
+    sampler.start()
+    started, cpu = time.perf_counter(), cpu_seconds()
+    run(processes, sink)
+    wall, cpu = time.perf_counter() - started, cpu_seconds() - cpu
+    done.set()
+    sampler.join()
+    expected = args.processes * args.bursts * args.lines_per_burst
+    assert sink.lines == expected, (label, sink.lines, expected)
+    print(f"{label:<10} wall {wall:6.2f} s  cpu {cpu:6.2f} s  {sink.lines / wall:10.0f} lines/s  "
+          f"{sink.calls:8d} handler calls  {peak[0]:4d} reader threads")
+
+
+def main(args):
+    print(f"{args.processes} processes x {args.bursts} bursts x {args.lines_per_burst} lines")
+    measure('readline', lambda processes, sink: run_threads(processes, read_readline, sink), args)
+    measure('select', lambda processes, sink: run_threads(processes, read_select, sink), args)
+    measure('executor', run_executor, args)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=100)
+    parser.add_argument('--bursts', type=int, default=20)
+    parser.add_argument('--lines-per-burst', type=int, default=500)
+    parser.add_argument('--interval', type=float, default=0.05)
+    main(parser.parse_args())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Contention benchmark: one global tasks_lock vs per-task locks (TaskStore)
+
+--ingest threads each stream log lines into their own task through the
+add_log / parse_claude_output code paths, while --readers threads poll the
+dashboard (count statuses, sort by created_at, copy the top 10) over
+--tasks tasks held in memory. Reports ingest throughput, add_log latency
+and dashboard latency for both locking schemes.
+
+    python test_scripts/benchmark_task_locking.py --tasks 5000 --ingest 50 --seconds 5
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.task_store import TaskStore
+
+
+class GlobalLockStore:
+    """The original layout: a plain dict and one lock for everything"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.global_lock = threading.Lock()
+
+    def lock(self, task_id):
+        return self.global_lock
+
+    def items_locked(self):
+        return self.global_lock
+
+
+class PerTaskStore:
+    def __init__(self):
+        self.tasks = TaskStore()
+
+    def lock(self, task_id):
+        return self.tasks.lock(task_id)
+
+
+def add_log(store, task_id, message):
+    with store.lock(task_id):
+        task = store.tasks[task_id]
+        task['logs'].append(message)
+        if len(task['logs']) > 100:
+            task['logs'] = task['logs'][-100:]
+        task['last_updated'] = datetime.now().isoformat()
+
+
+def parse_claude_output(store, task_id, line):
+    with store.lock(task_id):
+        if 'CLAUDE_STATUS:' in line:
+            store.tasks[task_id]['claude_status'] = 'RUNNING'
+
+
+def summarize(items):
+    counts = {}
+    for _, task in items:
+        counts[task.get('status')] = counts.get(task.get('status'), 0) + 1
+    recent = sorted(items, key=lambda x: x[1].get('created_at', ''), reverse=True)[:10]
+    return counts, recent
+
+
+def dashboard(store):
+    if isinstance(store, GlobalLockStore):
+        # Original /api/dashboard: scan and sort while holding tasks_lock
+        with store.global_lock:
+            counts, recent = summarize(list(store.tasks.items()))
+            return counts, [dict(task) for _, task in recent]
+    counts, recent = summarize(store.tasks.items())
+    return counts, [store.tasks.snapshot(task_id) for task_id, _ in recent]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000 if values else 0.0
+
+
+def run(store, args):
+    start_time = datetime.now()
+    for i in range(args.tasks):
+        store.tasks[f'task-{i}'] = {
+            'status': 'completed' if i % 3 else 'failed', 'progress': 100, 'logs': ['done'] * 20,
+            'created_at': (start_time - timedelta(seconds=i)).isoformat()
+        }
+    ingest_ids = [f'ingest-{i}' for i in range(args.ingest)]
+    for task_id in ingest_ids:
+        store.tasks[task_id] = {'status': 'executing_task', 'progress': 60, 'logs': [],
+                                'created_at': datetime.now().isoformat()}
+
+    stop = threading.Event()
+    add_latencies, dash_latencies, lines = [], [], [0] * args.ingest
+
+    def ingest(index, task_id):
+        local = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            add_log(store, task_id, 'output line ' + 'x' * 60)
+            local.append(time.perf_counter() - started)
+            parse_claude_output(store, task_id, 'CLAUDE_STATUS: RUNNING')
+            lines[index] += 1
+            time.sleep(args.line_interval)
+        add_latencies.extend(local)
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            dashboard(store)
+            local.append(time.perf_counter() - started)
+            time.sleep(args.poll_interval)
+        dash_latencies.extend(local)
+
+    threads = [threading.Thread(target=ingest, args=(i, task_id)) for i, task_id in enumerate(ingest_ids)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'lines_per_sec': sum(lines) / args.seconds,
+        'add_p50': percentile(add_latencies, 0.5),
+        'add_p99': percentile(add_latencies, 0.99),
+        'add_max': max(add_latencies) * 1000,
+        'dash_p50': percentile(dash_latencies, 0.5),
+        'dash_count': len(dash_latencies),
+    }
+
+
+def main(args):
+    print(f"{args.tasks} tasks in memory, {args.ingest} ingesting tasks, {args.readers} dashboard readers, "
+          f"{args.seconds}s\n")
+    for name, store in (('Global tasks_lock', GlobalLockStore()), ('Per-task locks', PerTaskStore())):
+        result = run(store, args)
+        print(f"{name}:")
+        print(f"  ingest            {result['lines_per_sec']:.0f} lines/s")
+        print(f"  add_log latency   p50 {result['add_p50']:.3f}ms  p99 {result['add_p99']:.3f}ms  "
+              f"max {result['add_max']:.1f}ms")
+        print(f"  dashboard         p50 {result['dash_p50']:.1f}ms ({result['dash_count']} requests)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--ingest', type=int, default=50)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--line-interval', type=float, default=0.001)
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    main(parser.parse_args())
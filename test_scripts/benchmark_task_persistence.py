@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Benchmark task status persistence: full-document saves vs the coalescing persister
+
+Runs N synthetic tasks concurrently. Each walks through the execute_remote_task
+phases and logs --logs lines, saving status at every phase change and every
+tenth line. The fake MongoDB write serializes its $set payload and sleeps
+--rtt; the JSON backup is written to a temp directory. Reports database
+writes, bytes written and time spent holding the shared tasks_lock.
+
+    python test_scripts/benchmark_task_persistence.py --tasks 50 --logs 300
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.task_persister import TaskPersister
+
+PHASES = [('creating_devpod', 10), ('cloning_repository', 20), ('setting_up_claude', 30),
+          ('preparing_workspace', 40), ('executing_task', 60), ('reviewing_changes', 75),
+          ('checking_server', 85), ('completed', 100)]
+
+
+class TimedLock:
+    """Reentrant lock that records how long it is held"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._acquired_at = 0.0
+        self.held = 0.0
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            self._acquired_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self.held += time.perf_counter() - self._acquired_at
+        self._lock.release()
+
+
+class FakeMongo:
+    """Counts writes; encoding the payload stands in for BSON serialization"""
+
+    def __init__(self, rtt):
+        self.rtt = rtt
+        self.writes = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def save_task(self, task_id, fields, unset=()):
+        payload = json.dumps({'$set': fields, '$unset': dict.fromkeys(unset, '')}, default=str)
+        time.sleep(self.rtt)
+        with self.lock:
+            self.writes += 1
+            self.bytes += len(payload)
+        return True
+
+
+class Harness:
+    def __init__(self, args, coalescing):
+        self.args = args
+        self.tasks_status = {}
+        self.tasks_lock = TimedLock()
+        self.mongo = FakeMongo(args.rtt)
+        self.tasks_dir = Path(tempfile.mkdtemp(prefix='persist-bench-'))
+        self.persister = None
+        if coalescing:
+            self.persister = TaskPersister(self.snapshot, self.mongo.save_task, self.write_file,
+                                           interval=args.interval)
+            self.persister.start()
+
+    # Original save_task_status: everything under tasks_lock, whole document
+    def save_full(self, task_id):
+        with self.tasks_lock:
+            task_data = dict(self.tasks_status[task_id])
+            for key, value in task_data.items():
+                if isinstance(value, datetime):
+                    task_data[key] = value.isoformat()
+            self.mongo.save_task(task_id, task_data)
+            with open(self.tasks_dir / f"{task_id}.json", 'w') as f:
+                json.dump(task_data, f, indent=2, default=str)
+
+    def snapshot(self, task_id):
+        with self.tasks_lock:
+            task = self.tasks_status.get(task_id)
+            return {key: list(value) if isinstance(value, list) else value
+                    for key, value in task.items()} if task else None
+
+    def write_file(self, task_id, record):
+        with open(self.tasks_dir / f"{task_id}.json", 'w') as f:
+            json.dump(record, f, default=str)
+
+    def save(self, task_id):
+        if self.persister:
+            self.persister.mark_dirty(task_id)
+        else:
+            self.save_full(task_id)
+
+    def add_log(self, task_id, message):
+        with self.tasks_lock:
+            task = self.tasks_status[task_id]
+            task['logs'].append(message)
+            if len(task['logs']) > 100:
+                task['logs'] = task['logs'][-100:]
+            task['last_updated'] = datetime.now().isoformat()
+            if len(task['logs']) % 10 == 0:
+                self.save(task_id)
+
+    def run_task(self, task_id):
+        with self.tasks_lock:
+            self.tasks_status[task_id] = {
+                'status': 'initializing', 'progress': 0, 'logs': [],
+                'created_at': datetime.now().isoformat(), 'devpod_name': task_id,
+                'github_repo': 'owner/repo', 'task_description': 'Synthetic load ' * 10
+            }
+        self.save(task_id)
+        lines_per_phase = self.args.logs // len(PHASES)
+        for status, progress in PHASES:
+            with self.tasks_lock:
+                self.tasks_status[task_id].update(status=status, progress=progress)
+            self.save(task_id)
+            for i in range(lines_per_phase):
+                self.add_log(task_id, f'[{status}] output line {i}: ' + 'x' * 60)
+                time.sleep(self.args.line_interval)
+        if self.persister:
+            self.persister.flush([task_id])
+
+    def run(self):
+        threads = [threading.Thread(target=self.run_task, args=(f'task-{i}',)) for i in range(self.args.tasks)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        if self.persister:
+            self.persister.close()
+        return elapsed
+
+
+def report(name, harness, elapsed):
+    mongo = harness.mongo
+    print(f"{name}:")
+    print(f"  wall time         {elapsed:.2f}s")
+    print(f"  db writes         {mongo.writes} ({mongo.writes / elapsed:.0f}/s), {mongo.bytes / 1e6:.1f}MB sent")
+    print(f"  tasks_lock held   {harness.tasks_lock.held:.2f}s total")
+
+
+def main(args):
+    print(f"{args.tasks} tasks x {args.logs} log lines, db rtt {args.rtt * 1000:.1f}ms\n")
+    before = Harness(args, coalescing=False)
+    report('Full-document save under tasks_lock', before, before.run())
+    after = Harness(args, coalescing=True)
+    report(f'Coalescing persister ({args.interval}s interval)', after, after.run())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=50)
+    parser.add_argument('--logs', type=int, default=300)
+    parser.add_argument('--rtt', type=float, default=0.001)
+    parser.add_argument('--line-interval', type=float, default=0.002)
+    parser.add_argument('--interval', type=float, default=1.0)
+    main(parser.parse_args())
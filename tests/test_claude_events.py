@@ -0,0 +1,63 @@
+"""
+Tests for stream-json Claude event parsing
+"""
+
+import json
+from pathlib import Path
+from src.claude_events import ClaudeStreamParser
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'claude_stream_streamlit.txt'
+
+
+def parse_fixture():
+    """Feed the recorded run through a parser; returns (parser, events, text lines)"""
+    parser, events, text_lines = ClaudeStreamParser(), [], []
+    for line in FIXTURE.read_text(encoding='utf-8').splitlines():
+        parsed = parser.feed(line)
+        if parsed is None:
+            text_lines.append(line)
+        else:
+            events.extend(parsed)
+    return parser, events, text_lines
+
+
+class TestClaudeStreamParser:
+    """Test cases for ClaudeStreamParser"""
+
+    def test_recorded_run(self):
+        """Test events and summary of a recorded stream-json run"""
+        parser, events, text_lines = parse_fixture()
+        assert [event.type for event in events if event.type != 'tool_result'] == [
+            'init', 'text', 'tool_use', 'tool_use', 'tool_use', 'tool_use', 'tool_use', 'tool_use', 'text', 'result']
+        assert [event.file_path for event in events if event.file_path] == [
+            '/home/devpod/auto-worker-demo/app.py', '/home/devpod/auto-worker-demo/app.py',
+            '/home/devpod/auto-worker-demo/requirements.txt']
+        assert events[-1].log.startswith('✅ Claude finished in 9 turns')
+        assert [event.tool for event in events if event.is_error] == ['Edit']
+
+        summary = parser.summary()
+        assert summary['tool_calls'] == 6
+        assert summary['tool_errors'] == 1
+        assert summary['files_modified'] == 2
+        assert summary['last_tool'] == 'Bash python -m py_compile app.py'
+        assert summary['model'] == 'claude-sonnet-4-20250514'
+        assert (summary['num_turns'], summary['cost_usd'], summary['is_error']) == (9, 0.0421, False)
+        assert parser.finished and parser.structured
+
+        # The run script's own lines are left to the caller
+        assert '=== Claude 실행 완료 ===' in text_lines
+        assert not any(line.startswith('{') for line in text_lines)
+
+    def test_error_result_and_non_events(self):
+        """Test failed runs and lines that only look like JSON"""
+        parser = ClaudeStreamParser()
+        assert parser.feed('{not json') is None
+        assert parser.feed('[1, 2]') is None
+        assert parser.feed('{"no_type": 1}') is None
+        assert not parser.structured
+
+        result = {'type': 'result', 'subtype': 'error_max_turns', 'is_error': True, 'num_turns': 30}
+        events = parser.feed(json.dumps(result))
+        assert events[0].is_error and parser.is_error
+        assert 'error_max_turns' in events[0].log
+        assert parser.feed('{"type": "stream_event"}') == []
@@ -0,0 +1,81 @@
+"""
+Tests for the dashboard change feed
+"""
+
+import threading
+import time
+from src.dashboard_feed import DashboardFeed, parse_cursor
+
+
+class TestDashboardFeed:
+    """Test cases for DashboardFeed"""
+
+    def test_publish_sends_only_changed_fields(self):
+        """Test that the first publish sends the full record and later ones only diffs"""
+        feed = DashboardFeed()
+        assert feed.publish('task-1', {'status': 'queued', 'progress': 0, 'github_repo': 'o/r'})
+        delivery = feed.poll(0, timeout=0)
+        assert delivery.changes == {'task-1': {'status': 'queued', 'progress': 0, 'github_repo': 'o/r'}}
+
+        assert feed.publish('task-1', {'status': 'executing_task', 'progress': 60, 'github_repo': 'o/r'})
+        assert not feed.publish('task-1', {'status': 'executing_task', 'progress': 60, 'github_repo': 'o/r'})
+        delivery = feed.poll(delivery.version, timeout=0)
+        assert delivery.changes == {'task-1': {'status': 'executing_task', 'progress': 60}}
+        assert not delivery.reset
+
+    def test_changes_are_coalesced_per_task(self):
+        """Test that a client behind several updates gets each task once, with the latest values"""
+        feed = DashboardFeed()
+        feed.publish('task-1', {'status': 'creating_devpod', 'progress': 10})
+        feed.publish('task-2', {'status': 'queued', 'progress': 0})
+        feed.publish('task-1', {'status': 'cloning_repository', 'progress': 20})
+
+        delivery = feed.poll(0, timeout=0)
+        assert delivery.version == 3
+        assert delivery.changes == {'task-1': {'status': 'cloning_repository', 'progress': 20},
+                                    'task-2': {'status': 'queued', 'progress': 0}}
+        assert feed.poll(2, timeout=0).changes == {'task-1': {'status': 'cloning_repository', 'progress': 20}}
+        assert feed.poll(3, timeout=0).changes == {}
+
+    def test_client_too_far_behind_is_reset(self):
+        """Test that evicted changes, or a version from before a restart, ask for a full reload"""
+        feed = DashboardFeed(capacity=2)
+        for i in range(4):
+            feed.publish(f'task-{i}', {'status': 'queued'})
+        assert feed.poll(0, timeout=0).reset
+        assert not feed.poll(2, timeout=0).reset
+        assert feed.poll(99, timeout=0).reset
+
+    def test_evicted_tasks_are_forgotten(self):
+        """Test that records are kept only for changes the feed can still replay"""
+        feed = DashboardFeed(capacity=2)
+        for i in range(100):
+            feed.publish(f'task-{i}', {'status': 'queued', 'progress': 0})
+        assert feed.stats() == {'version': 100, 'tasks': 2, 'pending_changes': 2}
+
+        # An evicted task that changes again is sent in full
+        feed.publish('task-0', {'status': 'queued', 'progress': 5})
+        assert feed.poll(100, timeout=0).changes == {'task-0': {'status': 'queued', 'progress': 5}}
+
+    def test_poll_waits_for_a_change(self):
+        """Test that poll blocks until another thread publishes"""
+        feed = DashboardFeed()
+        threading.Timer(0.05, feed.publish, args=('task-1', {'status': 'completed'})).start()
+        started = time.time()
+        delivery = feed.poll(0, timeout=2)
+        assert delivery.changes == {'task-1': {'status': 'completed'}}
+        assert time.time() - started < 1
+
+    def test_cursor_from_another_process_is_reset(self):
+        """Test that a cursor from before a restart resets even when its version is valid here"""
+        before, feed = DashboardFeed(), DashboardFeed()
+        for i in range(3):
+            before.publish(f'task-{i}', {'status': 'queued'})
+            feed.publish(f'task-{i}', {'status': 'queued'})
+        epoch, version = parse_cursor(before.cursor(2))
+        assert version == 2
+        assert feed.poll(version, timeout=0, epoch=epoch).reset
+        epoch, version = parse_cursor(feed.cursor(2))
+        assert not feed.poll(version, timeout=0, epoch=epoch).reset
+        assert parse_cursor('7') == (None, 7)
+        assert parse_cursor(None) == (None, 0)
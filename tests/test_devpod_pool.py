@@ -0,0 +1,101 @@
+"""
+Tests for the warm devpod pool
+"""
+
+import threading
+import time
+from src.devpod_pool import DevpodPool
+
+
+class FakeProvisioner:
+    """Fake provision_warm_devpod that records the devpods it creates"""
+
+    def __init__(self, ok=True):
+        self.ok = ok
+        self.created = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name, image):
+        with self.lock:
+            self.created.append((name, image))
+        return self.ok
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestDevpodPool:
+    def test_fills_each_image_to_size(self):
+        """Each configured image gets `size` ready devpods, named after the prefix"""
+        provision = FakeProvisioner()
+        pool = DevpodPool(provision, images=[None, 'registry/devpod:1'], size=2, name_prefix='warm')
+        pool.start()
+        try:
+            assert wait_until(lambda: pool.stats()['ready'] == {'default': 2, 'registry/devpod:1': 2})
+            assert len(provision.created) == 4
+            assert all(name.startswith('warm-') for name, _ in provision.created)
+        finally:
+            pool.close()
+
+    def test_acquire_hit_miss_and_replenish(self):
+        """Acquired devpods are replaced; an unknown image or empty pool is a miss"""
+        provision = FakeProvisioner()
+        pool = DevpodPool(provision, images=[None], size=1)
+        pool.start()
+        try:
+            assert wait_until(lambda: pool.stats()['ready']['default'] == 1)
+            name = pool.acquire()
+            assert name == provision.created[0][0]
+            assert pool.acquire('other/image') is None
+            assert wait_until(lambda: pool.stats()['ready']['default'] == 1)
+            stats = pool.stats()
+            assert stats['hits'] == 1 and stats['misses'] == 1 and stats['provisioned'] == 2
+            assert stats['hit_rate'] == 0.5
+            assert stats['replenish_seconds']['last'] is not None
+        finally:
+            pool.close()
+
+    def test_ready_devpods_survive_restart(self, tmp_path):
+        """Ready devpods are persisted and taken back by a new pool"""
+        state_file = tmp_path / 'devpod_pool.json'
+        provision = FakeProvisioner()
+        pool = DevpodPool(provision, images=[None], size=2, state_file=state_file)
+        pool.start()
+        assert wait_until(lambda: pool.stats()['ready']['default'] == 2)
+        pool.close()
+        taken = pool.acquire()
+
+        restored = DevpodPool(FakeProvisioner(), images=[None], size=0, state_file=state_file)
+        assert restored.restore() == [name for name, _ in provision.created if name != taken]
+
+    def test_restored_devpods_are_checked_before_handout(self, tmp_path):
+        """Restored devpods that no longer exist are dropped instead of handed out"""
+        state_file = tmp_path / 'devpod_pool.json'
+        state_file.write_text('[{"name": "warm-gone", "image": null}, {"name": "warm-live", "image": null}]')
+        checked = []
+
+        def is_alive(name):
+            checked.append(name)
+            return name == 'warm-live'
+
+        pool = DevpodPool(FakeProvisioner(), images=[None], size=0, state_file=state_file, is_alive=is_alive)
+        pool.restore()
+        assert pool.acquire() == 'warm-live'
+        assert checked == ['warm-gone', 'warm-live']
+        assert pool.acquire() is None
+        assert (pool.stats()['stale'], pool.stats()['hits'], pool.stats()['misses']) == (1, 1, 1)
+
+    def test_failed_provisioning_is_counted(self):
+        """Failures are recorded and leave the pool empty"""
+        pool = DevpodPool(FakeProvisioner(ok=False), images=[None], size=1)
+        pool.start()
+        try:
+            assert wait_until(lambda: pool.stats()['failures'] == 1)
+            assert pool.acquire() is None
+            assert pool.stats()['ready'] == {'default': 0}
+        finally:
+            pool.close()
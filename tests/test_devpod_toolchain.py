@@ -0,0 +1,29 @@
+"""
+Tests for prebaked toolchain detection
+"""
+
+from src.devpod_toolchain import TOOLCHAIN_VERSION, parse_stamp, prebaked_toolchain
+
+STAMP = f"""toolchain_version={TOOLCHAIN_VERSION}
+node=v20.19.2
+claude=1.0.51 (Claude Code)
+gh=gh version 2.74.2 (2025-06-18)
+git=git version 2.34.1
+"""
+
+
+class TestDevpodToolchain:
+    """Test cases for the toolchain stamp check"""
+
+    def test_current_stamp_is_prebaked(self):
+        """Test that a complete stamp of the current version enables the fast path"""
+        stamp = prebaked_toolchain(STAMP)
+        assert stamp['node'] == 'v20.19.2'
+        assert stamp['claude'] == '1.0.51 (Claude Code)'
+        assert parse_stamp('a = b\nnot a pair\n=x') == {'a': 'b'}
+
+    def test_missing_old_or_incomplete_stamp_installs(self):
+        """Test that anything but a complete current stamp falls back to installing"""
+        assert prebaked_toolchain('') is None
+        assert prebaked_toolchain(STAMP.replace(f'toolchain_version={TOOLCHAIN_VERSION}', 'toolchain_version=0')) is None
+        assert prebaked_toolchain(STAMP.replace('gh=gh version 2.74.2 (2025-06-18)', 'gh=')) is None
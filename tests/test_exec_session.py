@@ -0,0 +1,108 @@
+"""
+Tests for persistent devpod exec sessions
+"""
+
+import stat
+import threading
+import time
+import pytest
+from src.exec_session import ExecSessionBusy, ExecSessionPool
+
+# Stand-in for kubectl: drop everything up to `--` and run the rest locally
+FAKE_KUBECTL = """#!/bin/bash
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do shift; done
+shift
+exec "$@"
+"""
+
+# Same, with the shell's stderr delivered late
+SLOW_STDERR_KUBECTL = """#!/bin/bash
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do shift; done
+shift
+exec "$@" 2> >(while IFS= read -r line; do sleep 0.5; echo "$line" >&2; done)
+"""
+
+
+@pytest.fixture
+def pool(tmp_path):
+    kubectl = tmp_path / 'kubectl'
+    kubectl.write_text(FAKE_KUBECTL)
+    kubectl.chmod(kubectl.stat().st_mode | stat.S_IEXEC)
+    pool = ExecSessionPool(kubectl=str(kubectl))
+    yield pool
+    pool.close_all()
+
+
+class TestExecSessionPool:
+    """Test cases for ExecSessionPool"""
+
+    def test_returns_output_and_exit_code(self, pool):
+        """Test that stdout, stderr and the exit code are separated per command"""
+        result = pool.run('pod-1', 'echo out; echo err >&2; exit 3')
+        assert result.returncode == 3
+        assert result.stdout == 'out\n'
+        assert result.stderr == 'err\n'
+
+    def test_reuses_one_session_for_sequential_commands(self, pool):
+        """Test that commands share a shell and exit in one does not end the session"""
+        for i in range(5):
+            result = pool.run('pod-1', f'echo {i}; exit 1')
+            assert result.stdout == f'{i}\n'
+        assert pool.stats['sessions_opened'] == 1
+        assert pool.stats['commands'] == 5
+
+    def test_quotes_heredocs_and_missing_newline(self, pool):
+        """Test that commands run exactly as the one-shot bash -c path would"""
+        command = """cat << 'EOF'
+it's "quoted" $HOME
+EOF
+printf 'no newline'"""
+        result = pool.run('pod-1', command)
+        assert result.returncode == 0
+        assert result.stdout == 'it\'s "quoted" $HOME\nno newline'
+
+    def test_commands_do_not_read_session_stdin(self, pool):
+        """Test that a command reading stdin does not swallow later commands"""
+        assert pool.run('pod-1', 'cat').returncode == 0
+        assert pool.run('pod-1', 'echo still here').stdout == 'still here\n'
+
+    def test_timeout_restarts_session(self, pool):
+        """Test that a timed out command returns 124 and a fresh shell is used next"""
+        result = pool.run('pod-1', 'sleep 5', timeout=0.5)
+        assert result.returncode == 124
+        assert pool.run('pod-1', 'echo ok').stdout == 'ok\n'
+        assert pool.stats['sessions_opened'] == 2
+
+    def test_stderr_timeout_restarts_session(self, tmp_path):
+        """Test that a command whose stderr sentinel is late does not leak stderr into the next one"""
+        kubectl = tmp_path / 'kubectl'
+        kubectl.write_text(SLOW_STDERR_KUBECTL)
+        kubectl.chmod(kubectl.stat().st_mode | stat.S_IEXEC)
+        pool = ExecSessionPool(kubectl=str(kubectl))
+        try:
+            result = pool.run('pod-1', 'echo out; echo err >&2', timeout=0.2)
+            assert (result.returncode, result.stdout) == (0, 'out\n')
+            result = pool.run('pod-1', 'echo ok')
+            assert (result.stdout, result.stderr) == ('ok\n', '')
+            assert pool.stats['sessions_opened'] == 2
+        finally:
+            pool.close_all()
+
+    def test_sessions_are_per_pod(self, pool):
+        """Test that each pod gets its own session"""
+        pool.run('pod-1', 'true')
+        pool.run('pod-2', 'true')
+        assert pool.stats['sessions_opened'] == 2
+
+    def test_busy_pool_waits_for_a_release(self, pool):
+        """Test that callers wait for any released session, bounded by their timeout"""
+        pool.max_sessions_per_pod = 1
+        slow = threading.Thread(target=pool.run, args=('pod-1', 'sleep 1'))
+        slow.start()
+        time.sleep(0.3)
+        with pytest.raises(ExecSessionBusy):
+            pool.run('pod-1', 'echo late', timeout=0.2)
+        assert pool.run('pod-1', 'echo next', timeout=5).stdout == 'next\n'
+        slow.join()
+        assert pool.stats['sessions_opened'] == 1
+        assert pool.stats['busy_timeouts'] == 1
@@ -0,0 +1,102 @@
+"""
+Tests for the kubectl / Kubernetes API exec backends
+"""
+
+import json
+import stat
+import pytest
+from src.kube_backend import ApiProcess, KubectlBackend, create_backend
+
+# Stand-in for kubectl: `get` lists pods (only dev-pod-1 matches a selector),
+# `exec` drops everything up to `--` and runs the rest locally
+FAKE_KUBECTL = """#!/bin/bash
+if [ "$1" = get ]; then
+  case "$*" in *" -l "*) echo -n "dev-pod-1" ;; *) echo -n "dev-pod-1 other-pod" ;; esac
+  exit 0
+fi
+while [ "$#" -gt 0 ] && [ "$1" != "--" ]; do shift; done
+shift
+exec "$@"
+"""
+
+
+class FakeExecSocket:
+    """Stands in for the client's websocket exec stream"""
+
+    def __init__(self, frames, status):
+        self.frames = list(frames)
+        self.status = status
+        self.channels = {}
+        self.stdin = []
+
+    def is_open(self):
+        return bool(self.frames)
+
+    def update(self, timeout=0):
+        if self.frames:
+            channel, data = self.frames.pop(0)
+            self.channels[channel] = self.channels.get(channel, b'') + data
+
+    def read_channel(self, channel, timeout=0):
+        return self.channels.pop(channel, b'')
+
+    def write_stdin(self, data):
+        self.stdin.append(data)
+
+    @property
+    def returncode(self):
+        status = json.loads(self.status)
+        return 0 if status['status'] == 'Success' else int(status['details']['causes'][0]['message'])
+
+    def close(self):
+        self.frames = []
+
+
+@pytest.fixture
+def kubectl(tmp_path):
+    path = tmp_path / 'kubectl'
+    path.write_text(FAKE_KUBECTL)
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return KubectlBackend(kubectl=str(path))
+
+
+class TestKubectlBackend:
+    """Test cases for KubectlBackend"""
+
+    def test_run_and_spawn_without_a_shell(self, kubectl):
+        """Test that commands keep their quoting and report their exit code"""
+        result = kubectl.run('dev-pod-1', "echo \"it's\" $((1 + 1)); exit 3")
+        assert (result.returncode, result.stdout) == (3, "it's 2\n")
+
+        process = kubectl.spawn('dev-pod-1', ['bash', '-c', 'echo out; echo err >&2'], merge_stderr=True)
+        assert process.stdout.read() == b'out\nerr\n'
+        assert process.wait() == 0
+
+    def test_find_pods(self, kubectl):
+        """Test that pods are listed with and without a label selector"""
+        assert kubectl.find_pods('devpod.sh/workspace=dev') == ['dev-pod-1']
+        assert kubectl.find_pods() == ['dev-pod-1', 'other-pod']
+
+
+class TestApiBackend:
+    """Test cases for the Kubernetes API backend"""
+
+    def test_api_process_looks_like_popen(self):
+        """Test that websocket frames come out of pipes with the exit code from the status channel"""
+        status = json.dumps({'status': 'Failure', 'details': {'causes': [{'reason': 'ExitCode', 'message': '2'}]}})
+        ws = FakeExecSocket([(1, b'line one\nline'), (2, b'warning\n'), (1, b' two\n')], status)
+        process = ApiProcess(ws, merge_stderr=True)
+        process.stdin.write(b'input\n')
+
+        assert process.stdout.read() == b'line one\nlinewarning\n two\n'
+        assert process.wait(timeout=5) == 2
+        assert process.poll() == 2
+        assert ws.stdin == [b'input\n']
+
+    def test_falls_back_to_kubectl(self, tmp_path, monkeypatch):
+        """Test that the api backend falls back to kubectl without cluster credentials"""
+        pytest.importorskip('kubernetes')
+        monkeypatch.delenv('KUBERNETES_SERVICE_HOST', raising=False)
+        monkeypatch.setenv('KUBECONFIG', str(tmp_path / 'missing'))
+        assert isinstance(create_backend('api'), KubectlBackend)
+        assert isinstance(create_backend('bogus'), KubectlBackend)
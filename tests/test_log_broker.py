@@ -0,0 +1,98 @@
+"""
+Tests for the task log broker
+"""
+
+import threading
+import time
+from src.log_broker import LogBroker
+
+
+class TestLogBroker:
+    """Test cases for LogBroker"""
+
+    def test_subscriber_receives_published_lines(self):
+        """Test that lines published after subscribing are delivered in order"""
+        broker = LogBroker()
+        subscription = broker.subscribe('task-1')
+        broker.publish('task-1', 'first', 1)
+        broker.publish('task-1', 'second', 2)
+
+        delivery = subscription.poll(timeout=0)
+        assert delivery.logs == [(1, 'first'), (2, 'second')]
+        assert delivery.dropped == 0
+        assert subscription.poll(timeout=0).logs == []
+
+    def test_subscribers_have_independent_cursors(self):
+        """Test that one subscriber reading does not consume lines for another"""
+        broker = LogBroker()
+        fast = broker.subscribe('task-1')
+        slow = broker.subscribe('task-1')
+        broker.publish('task-1', 'a', 1)
+        assert fast.poll(timeout=0).logs == [(1, 'a')]
+        broker.publish('task-1', 'b', 2)
+
+        assert fast.poll(timeout=0).logs == [(2, 'b')]
+        assert slow.poll(timeout=0).logs == [(1, 'a'), (2, 'b')]
+
+    def test_slow_consumer_is_told_about_dropped_lines(self):
+        """Test that the ring stays bounded and reports overwritten lines"""
+        broker = LogBroker(capacity=3)
+        subscription = broker.subscribe('task-1')
+        for seq in range(1, 11):
+            broker.publish('task-1', f'line {seq}', seq)
+
+        delivery = subscription.poll(timeout=0)
+        assert delivery.dropped == 7
+        assert [seq for seq, _ in delivery.logs] == [8, 9, 10]
+
+    def test_status_updates_are_coalesced(self):
+        """Test that only the newest status is delivered"""
+        broker = LogBroker()
+        subscription = broker.subscribe('task-1')
+        broker.publish_status('task-1', {'status': 'cloning_repository', 'progress': 20})
+        broker.publish_status('task-1', {'status': 'executing_task', 'progress': 60})
+
+        delivery = subscription.poll(timeout=0)
+        assert delivery.status == {'status': 'executing_task', 'progress': 60}
+        assert subscription.poll(timeout=0).status is None
+
+    def test_poll_wakes_on_publish(self):
+        """Test that a waiting subscriber is woken by a publish"""
+        broker = LogBroker()
+        subscription = broker.subscribe('task-1')
+        threading.Timer(0.05, broker.publish, args=('task-1', 'hello', 1)).start()
+
+        start = time.monotonic()
+        delivery = subscription.poll(timeout=5)
+        assert delivery.logs == [(1, 'hello')]
+        assert time.monotonic() - start < 1
+
+    def test_unsubscribe_and_discard(self):
+        """Test subscriber bookkeeping and topic removal"""
+        broker = LogBroker()
+        subscription = broker.subscribe('task-1')
+        assert broker.subscriber_count('task-1') == 1
+
+        subscription.close()
+        assert broker.subscriber_count('task-1') == 0
+
+        broker.discard('task-1')
+        assert broker.stats()['topics'] == 0
+
+    def test_subscribing_to_unknown_tasks_leaves_no_topics(self):
+        """Test that a topic nothing was published to goes with its last subscriber"""
+        broker = LogBroker()
+        for i in range(100):
+            broker.subscribe(f'bogus-{i}').close()
+        assert broker.stats()['topics'] == 0
+
+        # A live task keeps its topic, and a retired one is replaced on publish
+        live = broker.subscribe('task-1')
+        broker.publish_status('task-1', {'status': 'running'})
+        live.close()
+        idle = broker.subscribe('task-2')
+        retired = idle.topic
+        idle.close()
+        broker.publish('task-2', 'hello', seq=1)
+        assert broker.stats()['topics'] == 2
+        assert broker._topics['task-2'] is not retired
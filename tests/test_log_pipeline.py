@@ -0,0 +1,188 @@
+"""
+Tests for the write-behind log pipeline
+"""
+
+import threading
+import time
+from src.log_pipeline import LogPipeline
+
+
+class RecordingWriter:
+    """Collects batches handed to the pipeline writer"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def __call__(self, batch):
+        time.sleep(self.delay)
+        with self.lock:
+            self.batches.append(list(batch))
+        return True
+
+    @property
+    def messages(self):
+        return [entry['message'] for batch in self.batches for entry in batch]
+
+
+class TestLogPipeline:
+    """Test cases for LogPipeline"""
+
+    def test_flush_writes_everything_in_order(self):
+        """Test that flush persists all submitted lines in order"""
+        writer = RecordingWriter()
+        pipeline = LogPipeline(writer, batch_size=10, flush_interval=5)
+        for i in range(25):
+            pipeline.submit('task-1', f'line {i}')
+
+        assert pipeline.flush(timeout=5) is True
+        assert writer.messages == [f'line {i}' for i in range(25)]
+        assert all(len(batch) <= 10 for batch in writer.batches)
+        pipeline.close()
+
+    def test_flushes_on_interval(self):
+        """Test that a partial batch is written after the flush interval"""
+        writer = RecordingWriter()
+        pipeline = LogPipeline(writer, batch_size=100, flush_interval=0.05)
+        pipeline.submit('task-1', 'only line')
+
+        time.sleep(0.3)
+        assert writer.messages == ['only line']
+        pipeline.close()
+
+    def test_entries_carry_task_and_timestamp(self):
+        """Test the shape of queued log entries"""
+        writer = RecordingWriter()
+        pipeline = LogPipeline(writer)
+        entry = pipeline.submit('task-1', 'hello')
+        pipeline.close()
+
+        assert entry['task_id'] == 'task-1'
+        assert entry['message'] == 'hello'
+        assert 'timestamp' in entry
+
+    def test_close_drains_pending(self):
+        """Test that shutdown writes out everything still buffered"""
+        writer = RecordingWriter(delay=0.01)
+        pipeline = LogPipeline(writer, batch_size=5, flush_interval=10, max_buffer=20)
+        for i in range(50):
+            pipeline.submit('task-1', f'line {i}')
+        pipeline.close()
+
+        assert len(writer.messages) == 50
+        assert pipeline.pending() == 0
+
+    def test_writer_errors_do_not_stop_flusher(self):
+        """Test that a failing batch is counted and later batches still go out"""
+        calls = []
+
+        def flaky_writer(batch):
+            calls.append(len(batch))
+            if len(calls) == 1:
+                raise RuntimeError("database unavailable")
+            return True
+
+        pipeline = LogPipeline(flaky_writer, batch_size=1, flush_interval=0.01, max_retries=0)
+        pipeline.submit('task-1', 'first')
+        pipeline.flush(timeout=5)
+        pipeline.submit('task-1', 'second')
+        pipeline.flush(timeout=5)
+        pipeline.close()
+
+        assert pipeline.stats['failed'] == 1
+        assert pipeline.stats['written'] == 1
+
+    def test_sequence_numbers_are_per_task_and_monotonic(self):
+        """Test that every task gets its own increasing sequence"""
+        pipeline = LogPipeline(RecordingWriter())
+        seqs_a = [pipeline.submit('task-a', 'line')['seq'] for _ in range(3)]
+        seqs_b = [pipeline.submit('task-b', 'line')['seq'] for _ in range(2)]
+        pipeline.close()
+
+        assert seqs_a == [1, 2, 3]
+        assert seqs_b == [1, 2]
+
+    def test_sequence_continues_from_loader(self):
+        """Test that numbering resumes after the last persisted sequence"""
+        pipeline = LogPipeline(RecordingWriter(), seq_loader=lambda task_id: 41)
+        entry = pipeline.submit('task-1', 'after restart')
+        pipeline.close()
+
+        assert entry['seq'] == 42
+
+    def test_submit_many_keeps_order_and_numbering(self):
+        """Test that a batch of lines is queued in order with consecutive sequence numbers"""
+        writer = RecordingWriter()
+        pipeline = LogPipeline(writer, batch_size=3, flush_interval=5, max_buffer=4)
+        pipeline.submit('task-1', 'first')
+        entries = pipeline.submit_many('task-1', [f'line {i}' for i in range(10)])
+        pipeline.close()
+
+        assert [entry['seq'] for entry in entries] == list(range(2, 12))
+        assert writer.messages == ['first'] + [f'line {i}' for i in range(10)]
+
+    def test_falsy_writer_result_is_retried(self):
+        """Test that a batch the writer reports as failed is written again"""
+        results = [False, None, True]
+        written = []
+
+        def writer(batch):
+            written.append([entry['message'] for entry in batch])
+            return results.pop(0)
+
+        pipeline = LogPipeline(writer, batch_size=1, flush_interval=0.01, retry_delay=0.01)
+        pipeline.submit('task-1', 'line')
+        assert pipeline.flush(timeout=5)
+        pipeline.close()
+
+        assert written == [['line']] * 3
+        assert pipeline.stats['retries'] == 2
+        assert (pipeline.stats['written'], pipeline.stats['failed']) == (1, 0)
+
+    def test_non_blocking_submit_after_prepare(self):
+        """Test that prepare() takes the seed lookup and backpressure wait, and submit_many(block=False) neither"""
+        release = threading.Event()
+        loads = []
+
+        def writer(batch):
+            release.wait(5)
+            return True
+
+        def seq_loader(task_id):
+            loads.append(task_id)
+            return 7
+
+        pipeline = LogPipeline(writer, batch_size=1, flush_interval=0.01, max_buffer=2, seq_loader=seq_loader)
+        pipeline.seed('task-1')
+        # The flusher is stuck on the first batch, so the buffer fills up
+        entries = pipeline.submit_many('task-1', ['a', 'b', 'c'])
+        started = time.monotonic()
+        more = pipeline.submit_many('task-1', ['d', 'e'], block=False)
+        assert time.monotonic() - started < 0.5
+        assert loads == ['task-1']
+
+        waiter = threading.Thread(target=pipeline.prepare, args=('task-1',))
+        waiter.start()
+        waiter.join(0.2)
+        assert waiter.is_alive()
+        release.set()
+        waiter.join(5)
+        assert not waiter.is_alive()
+        pipeline.close()
+        assert [entry['seq'] for entry in entries + more] == [8, 9, 10, 11, 12]
+
+    def test_unwritten_covers_queued_and_in_flight_lines(self):
+        """Test that lines not yet written can be read back from memory, in seq order"""
+        release = threading.Event()
+        pipeline = LogPipeline(lambda batch: release.wait(5), batch_size=2, flush_interval=0.01)
+        pipeline.submit_many('task-1', ['a', 'b', 'c'])
+        pipeline.submit('task-2', 'other')
+        time.sleep(0.1)  # The flusher now holds the first batch
+
+        assert [entry['message'] for entry in pipeline.unwritten('task-1')] == ['a', 'b', 'c']
+        assert [entry['seq'] for entry in pipeline.unwritten('task-1', after_seq=1)] == [2, 3]
+        release.set()
+        assert pipeline.flush(timeout=5)
+        assert pipeline.unwritten('task-1') == []
+        pipeline.close()
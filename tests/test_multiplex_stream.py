@@ -0,0 +1,79 @@
+"""
+Tests for multiplexed task log streams
+"""
+
+import threading
+from src.log_broker import LogBroker
+from src.multiplex_stream import MultiplexRegistry
+from src.sse import format_cursor_event, format_log_event
+
+
+def make_registry(stored=None, statuses=None):
+    """Registry over a fresh broker; stored maps task_id to its (seq, message) history"""
+    stored = stored or {}
+    statuses = statuses or {}
+
+    def replay_logs(task_id, after_seq, before_seq=None):
+        return [(seq, message) for seq, message in stored.get(task_id, [])
+                if seq > after_seq and (before_seq is None or seq < before_seq)]
+
+    broker = LogBroker()
+    return broker, MultiplexRegistry(broker, replay_logs, statuses.get)
+
+
+class TestMultiplexStream:
+    """Test cases for MultiplexStream"""
+
+    def test_events_are_tagged_by_task(self):
+        """Test that replay and live lines of several tasks share one stream"""
+        broker, registry = make_registry(stored={'task-a': [(1, 'a1')]})
+        stream = registry.open({'task-a': 0, 'task-b': 0})
+
+        assert stream.collect() == format_log_event(1, 'a1', 'task-a') + format_cursor_event({'task-a': 1, 'task-b': 0})
+        broker.publish('task-b', 'b1', 1)
+        broker.publish('task-a', 'a2', 2)
+        events = stream.collect()
+        assert format_log_event(1, 'b1', 'task-b') in events
+        assert format_log_event(2, 'a2', 'task-a') in events
+        assert events.endswith(format_cursor_event({'task-a': 2, 'task-b': 1}))
+        assert stream.collect() == ''
+
+    def test_tasks_can_be_added_and_removed(self):
+        """Test changing the watched set of an open stream"""
+        broker, registry = make_registry(stored={'task-b': [(1, 'b1'), (2, 'b2')]})
+        stream = registry.open({'task-a': 0})
+        stream.collect()
+
+        stream.add('task-b', after_seq=1)
+        stream.remove('task-a')
+        assert stream.tasks() == ['task-b']
+        assert stream.collect() == format_log_event(2, 'b2', 'task-b') + format_cursor_event({'task-b': 2})
+
+        broker.publish('task-a', 'ignored', 1)
+        assert stream.collect() == ''
+        assert broker.subscriber_count('task-a') == 0
+
+    def test_finished_task_leaves_the_stream(self):
+        """Test that a final status ends that task's part of the stream only"""
+        broker, registry = make_registry(statuses={'task-a': {'status': 'completed'}})
+        stream = registry.open({'task-a': 0, 'task-b': 0})
+
+        events = stream.collect()
+        assert '"task_id": "task-a", "status": "completed", "complete": true' in events
+        assert stream.tasks() == ['task-b']
+        assert broker.subscriber_count('task-a') == 0
+
+    def test_publish_wakes_the_stream(self):
+        """Test that a publish on any watched task wakes a waiting stream"""
+        broker, registry = make_registry()
+        stream = registry.open({'task-a': 0, 'task-b': 0})
+        stream.collect()
+        assert stream.wait(timeout=0) is False
+
+        threading.Timer(0.05, broker.publish, args=('task-b', 'b1', 1)).start()
+        assert stream.wait(timeout=2) is True
+        assert format_log_event(1, 'b1', 'task-b') in stream.collect()
+
+        registry.close(stream)
+        assert registry.get(stream.stream_id) is None
+        assert broker._topics['task-b'].listeners == ()
@@ -0,0 +1,63 @@
+"""
+Tests for the single-pass output classifier
+"""
+
+from src.output_classifier import DEFAULT_RULES, OutputClassifier, OutputRule
+
+
+def legacy_kind(line):
+    """The if/elif keyword chain parse_claude_output used before the classifier"""
+    lower = line.lower()
+    if "CLAUDE_STATUS:" in line:
+        return 'claude_status'
+    if "█" in line or "▓" in line:
+        return 'progress_bar'
+    if any(keyword in lower for keyword in ['creating', 'writing', 'updating', 'modifying']):
+        return 'file_operation'
+    if any(keyword in lower for keyword in ['thinking', 'planning', 'analyzing']):
+        return 'thinking'
+    if any(keyword in lower for keyword in ['completed', 'finished', 'done', '완료']):
+        return 'completed'
+    return None
+
+
+LINES = [
+    'CLAUDE_STATUS: RUNNING (12 minutes elapsed)',
+    'CLAUDE_STATUS: COMPLETED',
+    '[████████▓▓      ] 60%',
+    'Creating src/app.py',
+    'Now WRITING the tests and updating docs',
+    'Thinking about the approach...',
+    'Analyzing repository structure, then done',
+    '✅ Task completed! Branch: auto-pr-1',
+    'All tasks finished',
+    '작업 완료',
+    'Installing requirements...',
+    '',
+]
+
+
+class TestOutputClassifier:
+    """Test cases for OutputClassifier"""
+
+    def test_matches_legacy_keyword_chain(self):
+        """Test that the first event of each line is what the old chain picked"""
+        classifier = OutputClassifier()
+        for line in LINES:
+            events = [event for event in classifier.classify(line) if event.kind != 'task_finished']
+            assert (events[0].kind if events else None) == legacy_kind(line), line
+
+    def test_status_and_finish_details(self):
+        """Test status/runtime extraction and add_log's completion markers"""
+        classifier = OutputClassifier()
+        status = classifier.classify('CLAUDE_STATUS: RUNNING (12 minutes elapsed)')[0]
+        assert (status.status, status.runtime) == ('RUNNING', 720)
+        assert classifier.classify('claude_status: running') == []
+        for line in ('Build completed!', 'ALL TASKS FINISHED', 'finished!'):
+            assert 'task_finished' in [event.kind for event in classifier.classify(line)], line
+        assert 'task_finished' not in [event.kind for event in classifier.classify('completed')]
+
+    def test_extra_rules(self):
+        """Test that rules can be added"""
+        classifier = OutputClassifier(DEFAULT_RULES + [OutputRule(('error',), ('traceback', 'error:'))])
+        assert [event.kind for event in classifier.classify('Error: boom while writing')] == ['file_operation', 'error']
@@ -0,0 +1,96 @@
+"""
+Tests for the cached devpod -> pod resolver
+"""
+
+import stat
+import threading
+import time
+import pytest
+from src.pod_resolver import PodResolver
+
+
+class CountingLookup:
+    """Fake kubectl lookup returning <devpod>-pod-<n>"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, devpod_name):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            return f'{devpod_name}-pod-{self.calls}'
+
+
+class TestPodResolver:
+    """Test cases for PodResolver"""
+
+    def test_repeat_lookups_hit_cache(self):
+        """Test that only the first lookup runs kubectl"""
+        lookup = CountingLookup()
+        resolver = PodResolver(lookup, watch=False)
+        assert [resolver.resolve('dev') for _ in range(5)] == ['dev-pod-1'] * 5
+        stats = resolver.get_stats()
+        assert lookup.calls == 1
+        assert (stats['hits'], stats['misses']) == (4, 1)
+
+    def test_ttl_expires_entries(self):
+        """Test that an entry is looked up again after the TTL"""
+        lookup = CountingLookup()
+        resolver = PodResolver(lookup, ttl=0.05, watch=False)
+        resolver.resolve('dev')
+        time.sleep(0.1)
+        assert resolver.resolve('dev') == 'dev-pod-2'
+        assert resolver.get_stats()['expired'] == 1
+
+    def test_concurrent_misses_share_one_lookup(self):
+        """Test that simultaneous first lookups run kubectl once"""
+        lookup = CountingLookup(delay=0.1)
+        resolver = PodResolver(lookup, watch=False)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve('dev'))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == ['dev-pod-1'] * 5
+        assert lookup.calls == 1
+
+    def test_failed_lookup_is_not_cached(self):
+        """Test that lookup errors propagate and are retried next time"""
+        def lookup(devpod_name):
+            raise Exception(f"Pod not found for devpod {devpod_name}")
+        resolver = PodResolver(lookup, watch=False)
+        for _ in range(2):
+            with pytest.raises(Exception):
+                resolver.resolve('dev')
+        assert resolver.get_stats()['misses'] == 2
+
+    def test_invalidate_pod_drops_matching_devpods(self):
+        """Test that a pod change only invalidates devpods mapped to it"""
+        lookup = CountingLookup()
+        resolver = PodResolver(lookup, watch=False)
+        resolver.resolve('a')
+        resolver.resolve('b')
+        resolver.invalidate_pod('a-pod-1')
+        assert resolver.resolve('a') == 'a-pod-3'
+        assert resolver.resolve('b') == 'b-pod-2'
+
+    def test_watch_event_invalidates_entry(self, tmp_path):
+        """Test that a pod reported by the watch is looked up again"""
+        kubectl = tmp_path / 'kubectl'
+        kubectl.write_text('#!/bin/bash\nsleep 0.3\necho pod/dev-pod-1\nsleep 10\n')
+        kubectl.chmod(kubectl.stat().st_mode | stat.S_IEXEC)
+        lookup = CountingLookup()
+        resolver = PodResolver(lookup, kubectl=str(kubectl))
+        try:
+            time.sleep(0.1)
+            resolver.resolve('dev')
+            deadline = time.monotonic() + 5
+            while resolver.get_stats()['watch_events'] == 0 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert resolver.resolve('dev') != 'dev-pod-1'
+        finally:
+            resolver.close()
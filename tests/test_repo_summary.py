@@ -0,0 +1,120 @@
+"""
+Tests for materialized repository summaries
+"""
+
+from src.repo_summary import grouped_tasks, removal_updates, repository_stats, status_key, summary_update
+
+
+def apply(summaries, change):
+    """Minimal in-memory version of update_one for the operators summary_update emits"""
+    summary = summaries.get(change.repo)
+    if summary is None:
+        if not change.upsert:
+            return
+        summary = summaries[change.repo] = {'_id': change.repo}
+    for path, amount in change.update.get('$inc', {}).items():
+        target = summary
+        *parents, field = path.split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = target.get(field, 0) + amount
+    for field, value in change.update.get('$min', {}).items():
+        summary[field] = min(summary.get(field, value), value)
+    for field, value in change.update.get('$max', {}).items():
+        summary[field] = max(summary.get(field, value), value)
+    push = change.update.get('$push', {}).get('recent_tasks')
+    if push:
+        recent = summary.get('recent_tasks', []) + push['$each']
+        recent.sort(key=lambda task: task['created_at'], reverse=True)
+        summary['recent_tasks'] = recent[:push['$slice']]
+    pull = change.update.get('$pull', {}).get('recent_tasks')
+    if pull:
+        summary['recent_tasks'] = [task for task in summary.get('recent_tasks', [])
+                                   if task['task_id'] not in pull['task_id']['$in']]
+    for path, value in change.update.get('$set', {}).items():
+        task_id = change.array_filters[0]['task.task_id']
+        for task in summary.get('recent_tasks', []):
+            if task['task_id'] == task_id:
+                task[path.rsplit('.', 1)[1]] = value
+
+
+class TestRepoSummary:
+    """Test cases for repository summary updates"""
+
+    def save(self, summaries, documents, task_id, **fields):
+        """Save fields like MongoDB.save_task and apply the resulting summary update"""
+        fields['task_id'] = task_id
+        before = documents.get(task_id)
+        documents[task_id] = {**(before or {}), **fields}
+        change = summary_update(dict(before) if before else None, fields)
+        if change:
+            apply(summaries, change)
+
+    def test_counts_follow_task_lifecycle(self):
+        """Test that counts match a full recount after creates, transitions and commits"""
+        summaries, documents = {}, {}
+        self.save(summaries, documents, 'a', github_repo='o/r', status='queued', created_at='2026-01-01',
+                  task_description='first', last_updated='2026-01-01')
+        self.save(summaries, documents, 'b', github_repo='o/r', status='queued', created_at='2026-01-02',
+                  task_description='second', last_updated='2026-01-02')
+        self.save(summaries, documents, 'a', status='executing_task', progress=60, last_updated='2026-01-03')
+        self.save(summaries, documents, 'a', status='completed', progress=100, last_updated='2026-01-04')
+        self.save(summaries, documents, 'a', is_committed=True)
+        self.save(summaries, documents, 'b', status='failed', last_updated='2026-01-05')
+        self.save(summaries, documents, 'c', github_repo='o/other', status='interrupted', created_at='2026-01-03')
+
+        stats = {item['repository']: item for item in repository_stats(list(summaries.values()))}
+        assert stats['o/r']['total_tasks'] == 2
+        assert stats['o/r']['completed_tasks'] == 1
+        assert stats['o/r']['failed_tasks'] == 1
+        assert stats['o/r']['total_commits'] == 1
+        assert stats['o/r']['success_rate'] == 50
+        assert stats['o/r']['first_activity'] == '2026-01-01'
+        assert stats['o/r']['last_activity'] == '2026-01-05'
+
+        grouped = grouped_tasks(list(summaries.values()))
+        assert grouped['o/r']['stats'] == {'total': 2, 'completed': 1, 'failed': 1, 'running': 0}
+        assert grouped['o/other']['stats']['running'] == 0
+        assert [task['task_id'] for task in grouped['o/r']['tasks']] == ['b', 'a']
+        assert grouped['o/r']['tasks'][1]['status'] == 'completed'
+        assert grouped['o/r']['tasks'][1]['is_committed'] is True
+
+    def test_recent_tasks_are_capped(self):
+        """Test that only the 10 newest tasks are listed while all are counted"""
+        summaries, documents = {}, {}
+        for i in range(12):
+            self.save(summaries, documents, f'task-{i:02}', github_repo='o/r', status='executing_task',
+                      created_at=f'2026-01-{i + 1:02}')
+        grouped = grouped_tasks(list(summaries.values()))
+        assert grouped['o/r']['stats']['running'] == 12
+        assert [task['task_id'] for task in grouped['o/r']['tasks']] == [f'task-{i:02}' for i in range(11, 1, -1)]
+
+    def test_unrelated_saves_do_not_touch_summary(self):
+        """Test claims without a repository and saves of unlisted fields"""
+        assert summary_update(None, {'task_id': 'a', 'idempotency_key': 'k', 'status': 'queued'}) is None
+        change = summary_update({'task_id': 'a', 'status': 'queued', 'created_at': '1'},
+                                {'task_id': 'a', 'github_repo': 'o/r', 'status': 'queued'})
+        assert change.upsert and change.update['$inc'] == {'total_tasks': 1, 'status_counts.queued': 1}
+
+        before = {'task_id': 'a', 'github_repo': 'o/r', 'status': 'executing_task'}
+        assert summary_update(before, {'task_id': 'a', 'claude_status': 'RUNNING'}) is None
+        assert status_key('a.b') == 'a_b'
+        assert status_key(None) == 'unknown'
+
+    def test_removal_matches_recount(self):
+        """Test that removing deleted tasks leaves the counts of the remaining tasks"""
+        summaries, documents = {}, {}
+        self.save(summaries, documents, 'a', github_repo='o/r', status='completed', created_at='2026-01-01')
+        self.save(summaries, documents, 'a', is_committed=True)
+        self.save(summaries, documents, 'b', github_repo='o/r', status='failed', created_at='2026-01-02')
+        self.save(summaries, documents, 'c', github_repo='o/r', status='completed', created_at='2026-01-03')
+        self.save(summaries, documents, 'claim', idempotency_key='k', status='queued', created_at='2026-01-01')
+
+        changes = removal_updates([documents['a'], documents['b'], documents['claim']])
+        assert len(changes) == 1
+        apply(summaries, changes[0])
+
+        grouped = grouped_tasks(list(summaries.values()))
+        assert grouped['o/r']['stats'] == {'total': 1, 'completed': 1, 'failed': 0, 'running': 0}
+        assert [task['task_id'] for task in grouped['o/r']['tasks']] == ['c']
+        assert summaries['o/r']['total_commits'] == 0
@@ -0,0 +1,108 @@
+"""
+Tests for the repository sync script
+"""
+
+import os
+import subprocess
+import pytest
+from src.repo_sync import (SyncOptions, parse_sync_output, sync_options, sync_script, worktree_path,
+                           worktree_remove_command)
+
+
+def git(*args, cwd=None, env=None):
+    return subprocess.run(['git', *args], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def github(tmp_path):
+    """A local 'owner/project' repository that https://github.com/ URLs are redirected to"""
+    remote = tmp_path / 'remote' / 'owner' / 'project.git'
+    seed = tmp_path / 'seed'
+    home = tmp_path / 'home'
+    home.mkdir()
+    git_config = tmp_path / 'gitconfig'
+    git_config.write_text(
+        f'[url "file://{tmp_path}/remote/"]\n\tinsteadOf = https://github.com/\n'
+        '[user]\n\tname = Test\n\temail = test@example.com\n'
+        '[init]\n\tdefaultBranch = main\n'
+        '[protocol "file"]\n\tallow = always\n'
+    )
+    env = {**os.environ, 'HOME': str(home), 'GIT_CONFIG_GLOBAL': str(git_config), 'GIT_CONFIG_NOSYSTEM': '1'}
+    git('init', '--quiet', str(seed), env=env)
+    (seed / 'README.md').write_text('v1\n')
+    git('add', '-A', cwd=seed, env=env)
+    git('commit', '--quiet', '-m', 'v1', cwd=seed, env=env)
+    git('clone', '--quiet', '--bare', str(seed), str(remote), env=env)
+    return {'seed': seed, 'home': home, 'env': env, 'remote': remote}
+
+
+def run_sync(github, options=SyncOptions(), **worktree):
+    result = subprocess.run(['bash', '-c', sync_script('owner/project', '$HOME/project', options, **worktree)],
+                            env=github['env'], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return parse_sync_output(result.stdout)
+
+
+class TestRepoSync:
+    def test_clone_then_refresh(self, github):
+        """First sync clones via the mirror; later syncs fast-forward and discard local changes"""
+        first = run_sync(github)
+        workspace = github['home'] / 'project'
+        assert first.cloned and first.branch == 'main'
+        assert set(first.timings) == {'cache', 'clone'}
+        assert (workspace / '.git' / 'objects' / 'info' / 'alternates').exists()
+
+        (github['seed'] / 'README.md').write_text('v2\n')
+        git('commit', '--quiet', '-am', 'v2', cwd=github['seed'], env=github['env'])
+        git('push', '--quiet', str(github['remote']), 'main', cwd=github['seed'], env=github['env'])
+        (workspace / 'README.md').write_text('local edit\n')
+        (workspace / 'stray.txt').write_text('untracked\n')
+
+        second = run_sync(github)
+        assert not second.cloned and second.branch == 'main'
+        assert set(second.timings) == {'cache', 'fetch', 'checkout'}
+        assert (workspace / 'README.md').read_text() == 'v2\n'
+        assert not (workspace / 'stray.txt').exists()
+
+    def test_broken_workspace_is_recloned(self, github):
+        """A workspace whose refresh fails is cloned again"""
+        run_sync(github)
+        git('remote', 'remove', 'origin', cwd=github['home'] / 'project', env=github['env'])
+        result = run_sync(github)
+        assert result.cloned and result.branch == 'main'
+
+    def test_options_per_repository(self):
+        """Per-repository overrides apply; filter or depth turn the mirror off"""
+        settings = {'cache': True, 'cache_dir': '/mnt/git', 'repositories': {'owner/big': {'filter': 'blob:none'}}}
+        assert sync_options(settings, 'owner/small') == SyncOptions(cache=True, cache_dir='/mnt/git')
+        big = sync_options(settings, 'owner/big')
+        assert big.filter == 'blob:none' and not big.cache
+        assert '--filter=blob:none' in sync_script('owner/big', '$HOME/big', big)
+        with pytest.raises(ValueError):
+            sync_script('owner/x; rm -rf /', '$HOME/x')
+
+    def test_worktree_per_task(self, github):
+        """Each task gets its own worktree; stale ones are collected, finished ones removed"""
+        home = github['home']
+        first = run_sync(github, worktree=worktree_path('project', 'task-a'))
+        assert first.cloned and 'worktree' in first.timings
+        run_sync(github, worktree=worktree_path('project', 'task-b'))
+        task_a, task_b = home / '.worktrees' / 'project' / 'task-a', home / '.worktrees' / 'project' / 'task-b'
+        (task_a / 'README.md').write_text('task a\n')
+        assert (task_b / 'README.md').read_text() == 'v1\n'
+
+        # A third task's sync drops stale worktrees, but not uncommitted edits or tasks still in use
+        run_sync(github, worktree=worktree_path('project', 'task-d'))
+        task_d = home / '.worktrees' / 'project' / 'task-d'
+        for stale in (task_a, task_b, task_d):
+            os.utime(stale, (0, 0))
+        run_sync(github, worktree=worktree_path('project', 'task-c'), keep_worktrees=['task-d', '$(x)'])
+        assert (task_a / 'README.md').read_text() == 'task a\n'
+        assert not task_b.exists()
+        assert task_d.exists()
+
+        subprocess.run(['bash', '-c', worktree_remove_command('$HOME/project', worktree_path('project', 'task-a'))],
+                       env=github['env'], check=True)
+        assert not task_a.exists()
+        listed = git('worktree', 'list', '--porcelain', cwd=home / 'project', env=github['env'])
+        assert 'task-a' not in listed and 'task-b' not in listed and 'task-c' in listed
@@ -0,0 +1,56 @@
+"""
+Tests for the bounded ring buffer
+"""
+
+import json
+import pytest
+from src.ring_buffer import RingBuffer, bounded
+from src.task_store import TaskStore
+
+
+class TestRingBuffer:
+    """Test cases for RingBuffer"""
+
+    def test_keeps_last_items_in_order(self):
+        """Test that appends past capacity overwrite the oldest items"""
+        buffer = RingBuffer(3)
+        for i in range(7):
+            buffer.append(i)
+        assert buffer.to_list() == [4, 5, 6]
+        assert list(buffer) == [4, 5, 6]
+        assert len(buffer) == 3
+        assert buffer.total == 7
+        assert buffer[0] == 4 and buffer[-1] == 6
+        assert buffer[-2:] == [5, 6]
+        with pytest.raises(IndexError):
+            buffer[3]
+
+    def test_bounded_converts_loaded_lists(self):
+        """Test that lists loaded from storage become buffers once"""
+        buffer = bounded(['a', 'b', 'c', 'd'], 2)
+        assert buffer == ['c', 'd']
+        assert bounded(buffer, 2) is buffer
+        assert bounded(None, 2) == []
+        assert bounded(buffer, 5).capacity == 5
+        with pytest.raises(ValueError):
+            RingBuffer(0)
+
+    def test_snapshot_serializes_as_list(self):
+        """Test that task snapshots carry plain lists for JSON and MongoDB"""
+        store = TaskStore()
+        store['a'] = {'status': 'running', 'logs': RingBuffer(2, ['one', 'two', 'three'])}
+        snapshot = store.snapshot('a')
+        store['a']['logs'].append('four')
+        assert snapshot['logs'] == ['two', 'three']
+        assert type(snapshot['logs']) is list
+        assert json.loads(json.dumps(snapshot)) == {'status': 'running', 'logs': ['two', 'three']}
+
+    def test_tail_and_snapshot_without_logs(self):
+        """Test that the dashboard can read the last lines without copying the whole buffer"""
+        store = TaskStore()
+        store['a'] = {'status': 'running', 'logs': RingBuffer(3, ['one', 'two', 'three', 'four'])}
+        assert store.tail('a', 'logs', 2) == ['three', 'four']
+        assert store.tail('a', 'logs', 10) == ['two', 'three', 'four']
+        assert store.tail('a', 'logs', 0) == []
+        assert store.tail('missing', 'logs', 5) == []
+        assert store.snapshot('a', exclude=('logs',)) == {'status': 'running'}
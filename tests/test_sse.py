@@ -0,0 +1,54 @@
+"""
+Tests for SSE event formatting of task log streams
+"""
+
+from src.log_broker import Delivery
+from src.sse import TaskLogStream, format_log_event, parse_cursors, parse_last_event_id, HEARTBEAT_EVENT
+
+
+class TestTaskLogStream:
+    """Test cases for TaskLogStream"""
+
+    def test_log_event_uses_seq_as_id(self):
+        """Test the wire format of a log event"""
+        assert format_log_event(7, 'hi') == 'id: 7\ndata: {"log": "hi"}\n\n'
+        assert format_log_event(None, 'hi') == 'data: {"log": "hi"}\n\n'
+
+    def test_parse_last_event_id(self):
+        """Test Last-Event-ID parsing"""
+        assert parse_last_event_id('42') == 42
+        assert parse_last_event_id(None) == 0
+        assert parse_last_event_id('garbage') == 0
+
+    def test_parse_cursors(self):
+        """Test parsing a multiplexed stream's Last-Event-ID"""
+        assert parse_cursors('task-a:3,task-b:12') == {'task-a': 3, 'task-b': 12}
+        assert parse_cursors('task-a:x,,:4') == {'task-a': 0}
+        assert parse_cursors(None) == {}
+
+    def test_live_lines_covered_by_replay_are_skipped(self):
+        """Test that lines published during replay are not sent twice"""
+        stream = TaskLogStream(after_seq=0)
+        list(stream.replay([(1, 'a'), (2, 'b')]))
+
+        events = list(stream.deliver(Delivery([(2, 'b'), (3, 'c')], 0, None)))
+        assert events == [format_log_event(3, 'c')]
+        assert stream.last_seq == 3
+
+    def test_final_status_finishes_stream(self):
+        """Test that a completed status ends the stream with a final event"""
+        stream = TaskLogStream()
+        events = list(stream.deliver(Delivery([], 0, {'status': 'completed', 'progress': 100})))
+
+        assert stream.finished is True
+        assert '"final": true' in events[-1]
+
+    def test_idle_delivery_sends_heartbeat(self):
+        """Test that an empty poll produces a heartbeat"""
+        stream = TaskLogStream()
+        assert list(stream.deliver(Delivery([], 0, None))) == [HEARTBEAT_EVENT]
+
+    def test_gap_is_bounded_by_first_buffered_line(self):
+        """Test the backfill range for a slow consumer"""
+        stream = TaskLogStream(after_seq=10)
+        assert stream.gap(Delivery([(50, 'x'), (51, 'y')], 39, None)) == (10, 50)
@@ -0,0 +1,132 @@
+"""
+Tests for the asyncio stream executor
+"""
+
+import subprocess
+import threading
+import time
+import pytest
+from src.stream_executor import LineSplitter, StreamExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = StreamExecutor(batch_size=50, batch_interval=0.01, max_batches_in_flight=2)
+    yield executor
+    executor.close()
+
+
+def spawn(script):
+    return subprocess.Popen(['bash', '-c', script], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+class TestLineSplitter:
+    """Test cases for LineSplitter"""
+
+    def test_lines_split_across_chunks(self):
+        """Test that lines spanning chunks come out whole and the tail on flush"""
+        splitter = LineSplitter()
+        assert splitter.feed(b'first li') == []
+        assert splitter.feed(b'ne\r\nsecond\n\nthi') == ['first line', 'second', '']
+        assert splitter.feed(b'rd \xe2\x9c\x85') == []
+        assert splitter.flush() == ['third ✅']
+        assert splitter.flush() == []
+
+    def test_long_lines_are_truncated(self):
+        """Test that over-long lines are cut, whether complete or still arriving"""
+        splitter = LineSplitter(max_line_length=10, truncation_marker='…')
+        assert splitter.feed(b'x' * 25 + b'\nshort\n') == ['x' * 10 + '…', 'short']
+        for _ in range(100):
+            assert splitter.feed(b'y' * 1000) == []
+        assert len(splitter._buffer) <= 40
+        assert splitter.feed(b'yy\nnext\ntail') == ['y' * 10 + '…', 'next']
+        assert splitter.flush() == ['tail']
+        assert splitter.truncated == 2
+
+    def test_matches_naive_split_on_large_bursts(self):
+        """Test that offset-based splitting gives the same lines as bytes.split"""
+        data = b''.join(b'line %d ' % i + b'z' * (i % 300) + b'\n' for i in range(20000)) + b'end'
+        splitter = LineSplitter()
+        lines = []
+        for offset in range(0, len(data), 65536 + 7):
+            lines.extend(splitter.feed(data[offset:offset + 65536 + 7]))
+        lines.extend(splitter.flush())
+        assert lines == [line.decode().rstrip() for line in data.split(b'\n')]
+
+
+class TestStreamExecutor:
+    """Test cases for StreamExecutor"""
+
+    def test_delivers_every_line_in_order(self, executor):
+        """Test that all output arrives in order, in batches, with the exit code"""
+        batches = []
+        returncode = executor.run(spawn('seq 1 5000; printf tail >&2; exit 3'), batches.append, timeout=10)
+
+        lines = [line for batch in batches for line in batch]
+        assert returncode == 3
+        assert lines == [str(i) for i in range(1, 5001)] + ['tail']
+        assert len(batches) < len(lines)
+
+    def test_slow_consumer_pauses_reading(self, executor):
+        """Test that a stream waits for its handler instead of buffering everything"""
+        lines = []
+
+        def slow(batch):
+            time.sleep(0.02)
+            lines.extend(batch)
+
+        assert executor.run(spawn('seq 1 20000'), slow, timeout=30) == 0
+        assert len(lines) == 20000
+        assert executor.stats['pauses'] > 0
+
+    def test_many_concurrent_streams(self, executor):
+        """Test that one loop serves many processes at once"""
+        counts = {}
+        lock = threading.Lock()
+
+        def counter(index):
+            def count(batch):
+                with lock:
+                    counts[index] = counts.get(index, 0) + len(batch)
+            return count
+
+        futures = [executor.submit(spawn('for i in $(seq 1 200); do echo $i; done'), counter(i)) for i in range(30)]
+        assert [future.result(30) for future in futures] == [0] * 30
+        assert counts == {i: 200 for i in range(30)}
+        assert executor.stats['active'] == 0
+
+    def test_uncapped_streams_keep_long_lines(self, executor):
+        """Test that cap_lines=False hands on over-long lines (e.g. stream-json events) whole"""
+        executor.max_line_length = 100
+        batches = []
+        script = "head -c 5000 /dev/zero | tr '\\0' x; echo; echo short"
+        assert executor.run(spawn(script), batches.append, timeout=10, cap_lines=False) == 0
+        assert [len(line) for batch in batches for line in batch] == [5000, 5]
+
+    def test_slow_handler_does_not_stall_other_tasks(self):
+        """Test that a blocked handler only holds up streams on its own dispatcher"""
+        executor = StreamExecutor(batch_interval=0.01, dispatch_threads=2)
+        release = threading.Event()
+        try:
+            blocked = executor.submit(spawn('echo stuck'), lambda batch: release.wait(10), key=0)
+            lines = []
+            assert executor.run(spawn('seq 1 100'), lines.extend, timeout=5, key=1) == 0
+            assert len(lines) == 100
+            assert not blocked.done()
+            release.set()
+            assert blocked.result(5) == 0
+        finally:
+            release.set()
+            executor.close()
+
+    def test_streams_with_one_key_share_a_dispatcher(self):
+        """Test that a task's streams are delivered by one thread, in submission order"""
+        executor = StreamExecutor(batch_interval=0.01, dispatch_threads=4)
+        threads = set()
+        try:
+            futures = [executor.submit(spawn('echo x'), lambda batch: threads.add(threading.current_thread().name),
+                                       key='task-1') for _ in range(8)]
+            assert [future.result(5) for future in futures] == [0] * 8
+            assert len(threads) == 1
+        finally:
+            executor.close()
@@ -0,0 +1,41 @@
+"""
+Tests for task ID generation
+"""
+
+import threading
+from src.task_ids import CROCKFORD_ALPHABET, ULID_LENGTH, new_task_id, new_ulid
+
+
+class TestTaskIds:
+    """Test cases for ULID task IDs"""
+
+    def test_format(self):
+        """Test that task IDs are task-<26 char Crockford base32>"""
+        task_id = new_task_id()
+        assert task_id.startswith('task-')
+        ulid = task_id[len('task-'):]
+        assert len(ulid) == ULID_LENGTH
+        assert set(ulid) <= set(CROCKFORD_ALPHABET)
+
+    def test_ids_sort_in_creation_order(self):
+        """Test that IDs from the same millisecond are still strictly increasing"""
+        ids = [new_ulid() for _ in range(1000)]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == len(ids)
+
+    def test_unique_across_threads(self):
+        """Test that concurrent requests never get the same ID"""
+        results = []
+        lock = threading.Lock()
+
+        def generate():
+            ids = [new_task_id() for _ in range(500)]
+            with lock:
+                results.extend(ids)
+
+        threads = [threading.Thread(target=generate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(results)) == 8 * 500
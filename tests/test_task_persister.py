@@ -0,0 +1,121 @@
+"""
+Tests for the coalescing task persister
+"""
+
+import threading
+import time
+from src.task_persister import TaskPersister
+
+
+class FakeStore:
+    """Task records plus a writer recording every $set"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.lock = threading.Lock()
+        self.writes = []
+        self.unsets = []
+        self.files = {}
+        self.fail = False
+
+    def snapshot(self, task_id):
+        with self.lock:
+            task = self.tasks.get(task_id)
+            return {key: list(value) if isinstance(value, list) else value
+                    for key, value in task.items()} if task else None
+
+    def writer(self, task_id, fields, unset=()):
+        if self.fail:
+            return False
+        self.writes.append((task_id, fields))
+        self.unsets.append((task_id, list(unset)))
+        return True
+
+    def file_writer(self, task_id, record):
+        self.files[task_id] = record
+
+
+class TestTaskPersister:
+    """Test cases for TaskPersister"""
+
+    def test_burst_is_coalesced_into_one_write(self):
+        """Test that many saves within the interval produce one write per task"""
+        store = FakeStore()
+        store.tasks['t1'] = {'status': 'initializing', 'progress': 0}
+        persister = TaskPersister(store.snapshot, store.writer, store.file_writer, interval=0.2)
+        persister.start()
+        for progress in range(50):
+            store.tasks['t1']['progress'] = progress
+            persister.mark_dirty('t1')
+
+        time.sleep(0.5)
+        assert store.writes == [('t1', {'status': 'initializing', 'progress': 49})]
+        persister.close()
+
+    def test_only_changed_fields_are_written(self):
+        """Test that later writes $set just the fields that changed"""
+        store = FakeStore()
+        store.tasks['t1'] = {'status': 'executing_task', 'progress': 60, 'logs': ['a']}
+        persister = TaskPersister(store.snapshot, store.writer, store.file_writer, interval=10)
+        persister.mark_dirty('t1')
+        persister.flush()
+
+        store.tasks['t1']['logs'].append('b')
+        persister.mark_dirty('t1')
+        persister.flush()
+
+        assert store.writes[1] == ('t1', {'logs': ['a', 'b']})
+        assert store.files['t1'] == {'status': 'executing_task', 'progress': 60, 'logs': ['a', 'b']}
+
+    def test_unchanged_task_is_not_written(self):
+        """Test that saving an unchanged task does no I/O"""
+        store = FakeStore()
+        store.tasks['t1'] = {'status': 'completed'}
+        persister = TaskPersister(store.snapshot, store.writer, interval=10)
+        for _ in range(3):
+            persister.mark_dirty('t1')
+            persister.flush()
+        assert len(store.writes) == 1
+
+    def test_failed_write_is_retried_in_full(self):
+        """Test that a failed write keeps the task dirty and resends every field"""
+        store = FakeStore()
+        store.tasks['t1'] = {'status': 'queued', 'progress': 0}
+        persister = TaskPersister(store.snapshot, store.writer, interval=10)
+        persister.mark_dirty('t1')
+        persister.flush()
+
+        store.fail = True
+        store.tasks['t1']['status'] = 'failed'
+        persister.mark_dirty('t1')
+        persister.flush()
+        assert persister.pending() == 1
+
+        store.fail = False
+        persister.flush()
+        assert store.writes[-1] == ('t1', {'status': 'failed', 'progress': 0})
+        assert persister.pending() == 0
+
+    def test_dropped_fields_are_unset(self):
+        """Test that fields removed from the record are unset, also when retrying a failed write"""
+        store = FakeStore()
+        store.tasks['t1'] = {'status': 'queued', 'idempotency_key': 'k', 'devpod_pool': 'hit'}
+        persister = TaskPersister(store.snapshot, store.writer, interval=10)
+        persister.mark_dirty('t1')
+        persister.flush()
+        assert store.unsets[-1] == ('t1', [])
+
+        store.tasks['t1'] = {'status': 'initializing', 'idempotency_key': 'k'}
+        persister.mark_dirty('t1')
+        persister.flush()
+        assert store.writes[-1] == ('t1', {'status': 'initializing'})
+        assert store.unsets[-1] == ('t1', ['devpod_pool'])
+
+        store.fail = True
+        store.tasks['t1'] = {'status': 'running'}
+        persister.mark_dirty('t1')
+        persister.flush()
+        store.fail = False
+        persister.flush()
+        assert store.writes[-1] == ('t1', {'status': 'running'})
+        assert store.unsets[-1] == ('t1', ['idempotency_key'])
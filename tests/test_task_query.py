@@ -0,0 +1,76 @@
+"""
+Tests for paged task listing queries
+"""
+
+import pytest
+from src.task_query import (InvalidQuery, build_filter, build_projection, decode_cursor, encode_cursor,
+                            parse_page_size, split_page)
+
+
+def matches(task, query):
+    """Minimal in-memory evaluation of the filters build_filter emits"""
+    for field, condition in query.items():
+        if field == '$or':
+            if not any(matches(task, option) for option in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = task.get(field)
+            if '$in' in condition and value not in condition['$in']:
+                return False
+            if '$lt' in condition and not value < condition['$lt']:
+                return False
+            if '$gte' in condition and not value >= condition['$gte']:
+                return False
+        elif task.get(field) != condition:
+            return False
+    return True
+
+
+def find(tasks, query, limit):
+    """find(query).sort(TASK_SORT).limit(limit + 1) over a list"""
+    found = [task for task in tasks if matches(task, query)]
+    found.sort(key=lambda task: (task['created_at'], task['task_id']), reverse=True)
+    return found[:limit + 1]
+
+
+class TestTaskQuery:
+    """Test cases for task listing queries"""
+
+    def test_cursor_pages_cover_every_task_once(self):
+        """Test paging through tasks that share created_at values"""
+        tasks = [{'task_id': f'task-{i:02}', 'created_at': f'2026-01-0{i % 3 + 1}T00:00:00',
+                  'github_repo': 'o/r' if i % 2 else 'o/other', 'status': 'completed'} for i in range(11)]
+        seen, cursor = [], None
+        while True:
+            page, cursor = split_page(find(tasks, build_filter(cursor=cursor), 4), 4)
+            seen.extend(task['task_id'] for task in page)
+            if cursor is None:
+                break
+        assert sorted(seen) == sorted(task['task_id'] for task in tasks)
+        assert len(seen) == len(set(seen))
+
+        page, cursor = split_page(find(tasks, build_filter('o/r', ['completed', 'failed'],
+                                                           created_after='2026-01-02'), 10), 10)
+        assert cursor is None
+        assert {task['task_id'] for task in page} == {'task-01', 'task-05', 'task-07'}
+
+    def test_cursor_round_trip_and_rejects_garbage(self):
+        """Test that cursors decode to the sort key and malformed ones are refused"""
+        cursor = encode_cursor({'task_id': 'task-1', 'created_at': '2026-01-01T00:00:00'})
+        assert decode_cursor(cursor) == ('2026-01-01T00:00:00', 'task-1')
+        for bad in ('not-a-cursor', encode_cursor({'task_id': 5})):
+            with pytest.raises(InvalidQuery):
+                build_filter(cursor=bad)
+
+    def test_projection_and_page_size(self):
+        """Test field projection and limit parsing"""
+        assert build_projection(None) == {'logs': 0}
+        assert build_projection(['status']) == {'status': 1, 'task_id': 1, 'created_at': 1}
+        for bad in ('$where', 'logs.0'):
+            with pytest.raises(InvalidQuery):
+                build_projection([bad])
+        assert parse_page_size(None) == 100
+        assert parse_page_size('5000') == 500
+        assert parse_page_size('0') == 1
+        with pytest.raises(InvalidQuery):
+            parse_page_size('ten')
@@ -0,0 +1,151 @@
+"""
+Tests for the bounded task scheduler
+"""
+
+import json
+import threading
+import time
+from src.task_scheduler import TaskScheduler
+
+
+class BlockingRunner:
+    """Fake execute_remote_task that runs until released"""
+
+    def __init__(self):
+        self.started = []
+        self.running = set()
+        self.max_running = 0
+        self.release = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, task_id, **kwargs):
+        event = threading.Event()
+        with self.lock:
+            self.started.append((task_id, kwargs))
+            self.running.add(task_id)
+            self.max_running = max(self.max_running, len(self.running))
+            self.release[task_id] = event
+        event.wait(5)
+        with self.lock:
+            self.running.discard(task_id)
+
+    def finish(self, task_id):
+        deadline = time.monotonic() + 5
+        while task_id not in self.release and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.release[task_id].set()
+
+    def started_ids(self):
+        with self.lock:
+            return [task_id for task_id, _ in self.started]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestTaskScheduler:
+    """Test cases for TaskScheduler"""
+
+    def test_limits_concurrency_and_reports_positions(self):
+        """Test that tasks beyond max_workers wait in FIFO order"""
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, max_workers=2, daemon_threads=True)
+        positions = [scheduler.submit(f't{i}', f'dev{i}', {}, {'github_token': 'x'}) for i in range(4)]
+
+        assert positions == [None, None, 1, 2]
+        assert wait_for(lambda: len(runner.started_ids()) == 2)
+
+        runner.finish('t0')
+        assert wait_for(lambda: runner.started_ids() == ['t0', 't1', 't2'])
+        assert scheduler.positions() == {'t3': 1}
+        for task_id in ('t1', 't2', 't3'):
+            runner.finish(task_id)
+        assert wait_for(lambda: scheduler.stats()['running'] == 0)
+        assert runner.max_running == 2
+
+    def test_serializes_tasks_on_same_devpod(self):
+        """Test that a devpod runs one task at a time while others proceed"""
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, max_workers=4, daemon_threads=True)
+        scheduler.submit('a1', 'dev-a', {}, {'github_token': 'x'})
+        scheduler.submit('a2', 'dev-a', {}, {'github_token': 'x'})
+        scheduler.submit('b1', 'dev-b', {}, {'github_token': 'x'})
+
+        assert wait_for(lambda: sorted(runner.started_ids()) == ['a1', 'b1'])
+        assert scheduler.queue_position('a2') == 1
+
+        runner.finish('a1')
+        assert wait_for(lambda: 'a2' in runner.started_ids())
+        runner.finish('a2')
+        runner.finish('b1')
+
+    def test_tasks_per_devpod(self):
+        """Test that a devpod runs up to tasks_per_devpod tasks at once (worktree isolation)"""
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, max_workers=4, daemon_threads=True, tasks_per_devpod=2)
+        for task_id in ('a1', 'a2', 'a3'):
+            scheduler.submit(task_id, 'dev-a', {}, {'github_token': 'x'})
+
+        assert wait_for(lambda: sorted(runner.started_ids()) == ['a1', 'a2'])
+        assert scheduler.queue_position('a3') == 1
+
+        runner.finish('a2')
+        assert wait_for(lambda: 'a3' in runner.started_ids())
+        runner.finish('a1')
+        runner.finish('a3')
+
+    def test_passes_params_and_secrets(self):
+        """Test that run_task receives params and secrets as keyword arguments"""
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, daemon_threads=True)
+        scheduler.submit('t1', 'dev', {'github_repo': 'o/r'}, {'github_token': 'secret'})
+        assert wait_for(lambda: runner.started)
+        assert runner.started[0] == ('t1', {'github_repo': 'o/r', 'github_token': 'secret'})
+        runner.finish('t1')
+
+    def test_registered_before_the_task_runs(self):
+        """Test that on_start runs before the task, so a task that finishes at once is unregistered last"""
+        events = []
+        scheduler = TaskScheduler(lambda task_id, **kwargs: events.append(('run', task_id)), daemon_threads=True,
+                                  on_start=lambda task_id, thread: events.append(('start', task_id)))
+        scheduler.submit('t1', 'dev', {}, {'github_token': 'secret'})
+        assert wait_for(lambda: len(events) == 2)
+        assert events == [('start', 't1'), ('run', 't1')]
+
+    def test_persisted_queue_has_no_secrets(self, tmp_path):
+        """Test that the queue file never contains the GitHub token"""
+        state_file = tmp_path / 'pending_queue.json'
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, max_workers=1, state_file=state_file, daemon_threads=True)
+        scheduler.submit('t1', 'dev', {'github_repo': 'o/r'}, {'github_token': 'secret-token'})
+        scheduler.submit('t2', 'dev', {'github_repo': 'o/r'}, {'github_token': 'secret-token'})
+
+        content = state_file.read_text()
+        assert 'secret-token' not in content
+        assert [job['task_id'] for job in json.loads(content)] == ['t2']
+        runner.finish('t1')
+        runner.finish('t2')
+
+    def test_restored_tasks_wait_for_resume(self, tmp_path):
+        """Test that a restarted scheduler holds restored tasks until resumed"""
+        state_file = tmp_path / 'pending_queue.json'
+        state_file.write_text(json.dumps([
+            {'task_id': 't1', 'devpod_name': 'dev', 'params': {'github_repo': 'o/r'}, 'queued_at': ''}
+        ]))
+        runner = BlockingRunner()
+        scheduler = TaskScheduler(runner, state_file=state_file, daemon_threads=True)
+
+        assert [job['task_id'] for job in scheduler.restore()] == ['t1']
+        scheduler.submit('t2', 'dev2', {}, {'github_token': 'x'})
+        assert wait_for(lambda: runner.started_ids() == ['t2'])
+        assert scheduler.held() == ['t1']
+
+        assert scheduler.resume('t1', {'github_token': 'y'}) is True
+        assert wait_for(lambda: 't1' in runner.started_ids())
+        assert scheduler.resume('t1', {'github_token': 'y'}) is False
+        runner.finish('t1')
+        runner.finish('t2')
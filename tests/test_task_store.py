@@ -0,0 +1,99 @@
+"""
+Tests for the per-task locked task store
+"""
+
+import threading
+from src.task_store import TaskStore
+
+
+class TestTaskStore:
+    """Test cases for TaskStore"""
+
+    def test_task_locks_are_independent(self):
+        """Test that holding one task's lock does not block another task"""
+        store = TaskStore()
+        store['a'] = {'status': 'running'}
+        store['b'] = {'status': 'running'}
+        acquired = []
+
+        def lock_b():
+            if store.lock('b').acquire(timeout=1):
+                acquired.append('b')
+                store.lock('b').release()
+
+        with store.lock('a'):
+            thread = threading.Thread(target=lock_b)
+            thread.start()
+            thread.join()
+        assert acquired == ['b']
+
+    def test_lock_is_stable_and_reentrant(self):
+        """Test that a task always gets the same reentrant lock"""
+        store = TaskStore()
+        assert store.lock('a') is store.lock('a')
+        with store.lock('a'):
+            with store.lock('a'):
+                store['a'] = {'status': 'queued'}
+        assert store['a']['status'] == 'queued'
+
+    def test_snapshot_is_a_copy(self):
+        """Test that snapshots do not change with the live record"""
+        store = TaskStore()
+        store['a'] = {'status': 'running', 'logs': ['one']}
+        snapshot = store.snapshot('a')
+        store['a']['logs'].append('two')
+        store['a']['status'] = 'completed'
+        assert snapshot == {'status': 'running', 'logs': ['one']}
+        assert store.snapshot('missing') is None
+
+    def test_items_is_a_point_in_time_list(self):
+        """Test that iterating while tasks are added does not fail"""
+        store = TaskStore()
+        store['a'] = {}
+        for task_id, _ in store.items():
+            store[task_id + '-child'] = {}
+        assert sorted(store) == ['a', 'a-child']
+        assert len(store) == 2
+        del store['a']
+        assert 'a' not in store
+
+    def test_status_counts_follow_transitions(self):
+        """Test that counters track inserts, status updates, replacements and deletes"""
+        store = TaskStore()
+        store['a'] = {'status': 'queued', 'created_at': '1'}
+        store['b'] = {'status': 'queued', 'created_at': '2'}
+        store.update_fields('a', {'status': 'executing_task', 'progress': 60})
+        store['b'] = {'status': 'initializing', 'created_at': '2'}
+        store.update_fields('b', {'progress': 10})
+        assert store.status_counts() == {'executing_task': 1, 'initializing': 1}
+
+        store.update_fields('a', {'status': 'completed'})
+        del store['b']
+        assert store.status_counts() == {'completed': 1}
+        assert store.update_fields('missing', {'status': 'failed'}) is False
+
+    def test_recent_is_ordered_by_created_at(self):
+        """Test that recent() returns newest first regardless of insert order"""
+        store = TaskStore()
+        for task_id, created_at in [('b', '2026-01-02'), ('c', '2026-01-03'), ('a', '2026-01-01')]:
+            store[task_id] = {'status': 'completed', 'created_at': created_at}
+        assert store.recent(2) == ['c', 'b']
+
+        store.update_fields('a', {'created_at': '2026-01-04'})
+        assert store.recent(10) == ['a', 'c', 'b']
+        del store['c']
+        assert store.recent(10) == ['a', 'b']
+
+    def test_lookups_of_unknown_tasks_create_no_locks(self):
+        """Test that read paths given unknown IDs leave nothing behind"""
+        store = TaskStore()
+        store['a'] = {'status': 'running', 'logs': ['one']}
+        for i in range(100):
+            assert store.snapshot(f'bogus-{i}') is None
+            assert store.tail(f'bogus-{i}', 'logs', 5) == []
+            assert not store.update_fields(f'bogus-{i}', {'status': 'failed'})
+            with store.locked(f'bogus-{i}') as task:
+                assert task is None
+        with store.locked('a') as task:
+            assert task['logs'] == ['one']
+        assert list(store._locks) == ['a']